@@ -15,18 +15,43 @@ if os.environ.get('FLASK_TESTING') == '1':
 else:
     testing_mode = False
 
-from flask import Flask, request, jsonify, render_template, redirect, url_for, flash, session
+from flask import Flask, request, jsonify, render_template, redirect, url_for, flash, session, abort, g, make_response, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.exc import IntegrityError
 from marshmallow import ValidationError, Schema, fields
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import wraps
+from contextlib import contextmanager
 import random
 import json
+import csv
+import io
+import time
+import click
+import logging
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user, UserMixin
 from flask_mail import Mail, Message
 from werkzeug.security import generate_password_hash, check_password_hash
 from itsdangerous import URLSafeTimedSerializer
 from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.orm import make_transient_to_detached, joinedload, contains_eager, selectinload
+from caching import LRUCache
+from fast_read import FastReader
+from pagination import requested_page
+from compression import init_compression
+from bulk_import import BulkImporter, parse_import, IMPORT_CHUNK_SIZE
+from datagen import TenantGenerator, TENANT_DEFAULTS, seed_family
+from sparse_fields import requested_only, sparse_schema
+from query_budget import query_budget, QUERY_BUDGETS
+from request_profiler import init_profiler
+from metrics import init_metrics
+from slow_queries import init_slow_query_log
+from structured_logging import init_logging
+from debug_utils import create_profiler_routes, create_slow_query_routes
+from sqlite_profile import load_sqlite_profile, sqlite_engine_options, install_sqlite_pragmas, describe_sqlite_profile
 
 # Import routes
 try:
@@ -41,43 +66,101 @@ except ImportError:
 # Initialize extensions
 db = SQLAlchemy()
 
+logger = logging.getLogger('homeinventory')
+auth_log = logging.getLogger('homeinventory.auth')
+mail_log = logging.getLogger('homeinventory.mail')
+
 def create_app():
     app = Flask(__name__)
     app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
     
+    # SQLite engine profile (SQLITE_PROFILE, SQLITE_BUSY_TIMEOUT, SQLITE_POOL_SIZE, ...)
+    database_uri = os.environ.get('DATABASE_URL', 'sqlite:///homeinventory.db')
+    profile_name, sqlite_pragmas, sqlite_pool = load_sqlite_profile()
+    
     # Load configuration
     app.config.from_mapping(
         SECRET_KEY=os.environ.get('FLASK_SECRET_KEY', 'dev'),
-        SQLALCHEMY_DATABASE_URI=os.environ.get('DATABASE_URL', 'sqlite:///homeinventory.db'),
+        SQLALCHEMY_DATABASE_URI=database_uri,
+        SQLALCHEMY_ENGINE_OPTIONS=sqlite_engine_options(database_uri, sqlite_pragmas, sqlite_pool),
+        SQLITE_PROFILE=profile_name,
+        SQLITE_PRAGMAS=sqlite_pragmas,
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         SECURITY_PASSWORD_SALT=os.environ.get('SECURITY_PASSWORD_SALT', 'dev-salt'),
         SESSION_COOKIE_SECURE=os.environ.get('FLASK_ENV') == 'production',
         SESSION_COOKIE_HTTPONLY=True,
-        SESSION_COOKIE_SAMESITE='Lax'
+        SESSION_COOKIE_SAMESITE='Lax',
+        # Per-family sidebar cache; TTL bounds staleness across gunicorn workers
+        NAV_CACHE_ENABLED=os.environ.get('NAV_CACHE_ENABLED', 'true').lower() == 'true',
+        NAV_CACHE_SIZE=int(os.environ.get('NAV_CACHE_SIZE', '512')),
+        NAV_CACHE_TTL=int(os.environ.get('NAV_CACHE_TTL', '60')),
+        # Per-worker cache of authenticated principals; 0 disables it
+        PRINCIPAL_CACHE_TTL=int(os.environ.get('PRINCIPAL_CACHE_TTL', '0')),
+        PRINCIPAL_CACHE_SIZE=int(os.environ.get('PRINCIPAL_CACHE_SIZE', '1024')),
+        # Serve JSON list endpoints from Core selects instead of ORM objects + marshmallow
+        FAST_READ_ENABLED=os.environ.get('FAST_READ_ENABLED', 'true').lower() == 'true',
+        # Largest ?limit= a paginated collection request may ask for
+        PAGINATION_MAX_LIMIT=int(os.environ.get('PAGINATION_MAX_LIMIT', '500')),
+        # Response compression (gzip, plus brotli when the package is installed)
+        COMPRESS_ENABLED=os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true',
+        COMPRESS_MIN_SIZE=int(os.environ.get('COMPRESS_MIN_SIZE', '500')),
+        COMPRESS_LEVEL=int(os.environ.get('COMPRESS_LEVEL', '6')),
+        COMPRESS_BR_LEVEL=int(os.environ.get('COMPRESS_BR_LEVEL', '5')),
+        # Per-request query counts and timings in X-Query-Count/Server-Timing, browsable at /debug/requests
+        PROFILER_ENABLED=os.environ.get('PROFILER_ENABLED', 'false').lower() == 'true',
+        PROFILER_HISTORY=int(os.environ.get('PROFILER_HISTORY', '50')),
+        # Prometheus /metrics; METRICS_DIR aggregates across gunicorn workers
+        METRICS_ENABLED=os.environ.get('METRICS_ENABLED', 'true').lower() == 'true',
+        METRICS_DIR=os.environ.get('METRICS_DIR') or None,
+        METRICS_FLUSH_INTERVAL=float(os.environ.get('METRICS_FLUSH_INTERVAL', '1.0')),
+        METRICS_TOKEN=os.environ.get('METRICS_TOKEN') or None,
+        # Statements slower than this are logged with their query plan; 0 turns it off
+        SLOW_QUERY_MS=float(os.environ.get('SLOW_QUERY_MS', '250')),
+        SLOW_QUERY_LOG_FILE=os.environ.get('SLOW_QUERY_LOG_FILE'),
+        SLOW_QUERY_LOG_MAX_BYTES=int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', str(5 * 1024 * 1024))),
+        SLOW_QUERY_LOG_BACKUPS=int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', '3')),
+        # JSON-line logs written off the request thread; LOG_LEVELS sets per-logger levels
+        LOG_LEVEL=os.environ.get('LOG_LEVEL', 'INFO'),
+        LOG_LEVELS=os.environ.get('LOG_LEVELS', ''),
+        LOG_FORMAT=os.environ.get('LOG_FORMAT', 'json'),
+        LOG_FILE=os.environ.get('LOG_FILE') or None,
+        LOG_DEBUG_SAMPLE_RATE=float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '1.0'))
     )
     
     if testing_mode:
         app.config['TESTING'] = True
     
-    print('FLASK APP STARTED: TESTING =', app.config.get('TESTING'), 'ENV =', dict(os.environ))
+    # Before the other extensions, so their request hooks already have a request id
+    init_logging(app)
+    logger.info('App started', extra={'testing': bool(app.config.get('TESTING'))})
     
     # Initialize extensions with app
     db.init_app(app)
+    with app.app_context():
+        install_sqlite_pragmas(db.engine, sqlite_pragmas)
+        profiler = init_profiler(app, db.engine)
+        init_metrics(app, db.engine)
+        slow_log = init_slow_query_log(app, db.engine)
+    logger.info(describe_sqlite_profile(profile_name, sqlite_pragmas, sqlite_pool))
     login_manager = LoginManager()
     login_manager.init_app(app)
     login_manager.login_view = 'auth_page'
     mail = Mail()
     mail.init_app(app)
+    init_compression(app)
+    create_profiler_routes(app, profiler)
+    create_slow_query_routes(app, slow_log)
     
     # Register blueprints if available
     if HAS_ROUTE_MODULES:
         # API blueprint has been removed as we integrated the endpoints directly into app.py
-        print('Route modules available')
+        logger.debug('Route modules available')
     
     return app
 
 # Create the Flask application
 app = create_app()
+metrics = app.extensions['metrics']
 
 # Add context processor to include locations in all templates
 @app.context_processor
@@ -85,25 +168,9 @@ def inject_locations():
     if current_user.is_authenticated:
         try:
             family_id = get_current_family_id()
-            locs = Location.query.filter_by(family_id=family_id).order_by(Location.name).all()
-            
-            # Get locations with schema
-            result = locations_schema.dump(locs)
-            
-            # Add item count for each location
-            for loc_data in result:
-                # Get item count for this location
-                item_count = db.session.query(db.func.count(Inventory.id)).filter(
-                    Inventory.location_id == loc_data['id'],
-                    Inventory.family_id == family_id
-                ).scalar() or 0
-                
-                # Add item count to the location data
-                loc_data['item_count'] = item_count
-            
-            return {'nav_locations': result}
+            return {'nav_locations': get_nav_locations(family_id)}
         except Exception as e:
-            print(f"Error in context processor: {e}")
+            logger.exception('Could not load nav locations')
             return {'nav_locations': []}
     return {'nav_locations': []}
 
@@ -114,15 +181,12 @@ app.config['SECURITY_PASSWORD_SALT'] = os.environ.get('SECURITY_PASSWORD_SALT',
 # Use persistent DB for normal app, special test DB for E2E, in-memory for unit tests
 if os.environ.get('E2E_TEST') == '1':
     db_path = os.environ.get('TEST_DB_PATH', os.path.abspath('test.db'))
-    print(f"[DEBUG] E2E_TEST db_path: {db_path}")
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
-    print(f"[DEBUG] E2E_TEST SQLALCHEMY_DATABASE_URI: {app.config['SQLALCHEMY_DATABASE_URI']}")
     app.config['TESTING'] = True
 else:
     db_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'homeinventory.db')
-    print(f"[DEBUG] PROD db_path: {db_path}")
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
-    print(f"[DEBUG] PROD SQLALCHEMY_DATABASE_URI: {app.config['SQLALCHEMY_DATABASE_URI']}")
+logger.debug('Using database %s', db_path)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # --- Flask-Mail Setup ---
@@ -161,12 +225,9 @@ def validate_env_vars():
         if not os.environ.get('MAILJET_SECRET_KEY'):
             required_vars.append('MAILJET_SECRET_KEY')
     
-    # Print warnings
-    if warnings:
-        print('\nWARNING: Environment configuration issues detected:')
-        for warning in warnings:
-            print(f'  - {warning}')
-        print('These should be fixed before deploying to production.\n')
+    # Log warnings
+    for warning in warnings:
+        logger.warning('%s; fix this before deploying to production', warning)
     
     # Raise error for missing required variables
     if required_vars:
@@ -212,7 +273,7 @@ def verify_password_reset_token(token, expiration=3600):
         email = serializer.loads(token, salt='password-reset-salt', max_age=expiration)
         return email
     except Exception as e:
-        print(f"Token verification error: {e}")
+        auth_log.info('Password reset token rejected: %s', e)
         return None
 
 def send_password_reset_email(user_email, reset_url):
@@ -224,22 +285,15 @@ def send_password_reset_email(user_email, reset_url):
     }
     
     try:
-        print(f"\n===== PASSWORD RESET EMAIL ATTEMPT =====")
-        print(f"Timestamp: {datetime.now().isoformat()}")
-        print(f"Recipient: {user_email}")
-        print(f"Reset URL: {reset_url}")
-        print(f"Environment: FLASK_ENV={os.environ.get('FLASK_ENV', 'not set')}")
-        print(f"Debug mode: {app.config.get('DEBUG', False)}")
+        mail_log.debug('Sending password reset email', extra={'recipient': user_email})
         
         # Check if Mailjet credentials are configured
         if not app.config.get('MAILJET_API_KEY') or not app.config.get('MAILJET_SECRET_KEY'):
             error_msg = "Mailjet API credentials not configured"
-            print(f"ERROR: {error_msg}")
+            mail_log.error(error_msg)
+            metrics.inc('homeinventory_mailjet_send_failures_total', reason='not_configured')
             result_info['error'] = error_msg
             return False
-            
-        print(f"Sender email: {app.config['MAILJET_SENDER_EMAIL']}")
-        print(f"Sender name: {app.config['MAILJET_SENDER_NAME']}")
         
         # Prepare email data
         data = {
@@ -257,43 +311,42 @@ def send_password_reset_email(user_email, reset_url):
             ]
         }
         
-        print(f"Sending email via Mailjet API...")
-        response = mailjet.send.create(data=data)
+        send_started = time.perf_counter()
+        try:
+            response = mailjet.send.create(data=data)
+        except Exception as e:
+            metrics.inc('homeinventory_mailjet_send_failures_total', reason=type(e).__name__)
+            raise
+        finally:
+            metrics.observe('homeinventory_mailjet_send_duration_seconds', time.perf_counter() - send_started)
         result_info['details']['status_code'] = response.status_code
-        print(f"Mailjet API response status code: {response.status_code}")
         
         if response.status_code == 200:
-            print(f"Email sent successfully to {user_email}")
             json_response = response.json()
             message_id = json_response.get('Messages', [{}])[0].get('To', [{}])[0].get('MessageID', 'Unknown')
             result_info['details']['message_id'] = message_id
-            print(f"Mailjet message ID: {message_id}")
+            mail_log.info('Password reset email sent', extra={'recipient': user_email, 'message_id': message_id})
             result_info['success'] = True
             return True
         else:
             error_msg = f"Failed to send email. Mailjet response: {response.status_code}"
-            print(error_msg)
+            metrics.inc('homeinventory_mailjet_send_failures_total', reason=f'http_{response.status_code}')
             try:
                 response_body = response.json()
-                print(f"Response body: {response_body}")
                 result_info['details']['response_body'] = response_body
-            except Exception as json_err:
-                print(f"Could not parse response JSON: {json_err}")
-                result_info['details']['response_content'] = str(response.content)
+            except Exception:
+                response_body = str(response.content)
+                result_info['details']['response_content'] = response_body
+            mail_log.error(error_msg, extra={'recipient': user_email, 'response_body': response_body})
             
             result_info['error'] = error_msg
             return False
     except Exception as e:
         error_msg = f"Error sending password reset email: {e}"
-        print(error_msg)
-        import traceback
-        traceback_text = traceback.format_exc()
-        print(traceback_text)
+        mail_log.exception(error_msg, extra={'recipient': user_email})
         result_info['error'] = error_msg
-        result_info['details']['traceback'] = traceback_text
         return False
     finally:
-        print("===== END PASSWORD RESET EMAIL ATTEMPT =====\n")
         return result_info['success']
 
 # Models
@@ -303,6 +356,7 @@ class Location(db.Model):
     family_id = db.Column(db.Integer, db.ForeignKey('family.id'), nullable=False)
     family = db.relationship('Family', back_populates='locations')
     inventory = db.relationship('Inventory', back_populates='location', cascade='all, delete-orphan')
+    __table_args__ = (db.Index('ix_location_family_name', 'family_id', 'name'),)
 
 class Aisle(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -310,13 +364,16 @@ class Aisle(db.Model):
     family_id = db.Column(db.Integer, db.ForeignKey('family.id'), nullable=False)
     family = db.relationship('Family', back_populates='aisles')
     items = db.relationship('MasterItem', back_populates='aisle')
+    __table_args__ = (db.Index('ix_aisle_family_name', 'family_id', 'name'),)
 
 class Store(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(80), unique=True, nullable=False)
+    name = db.Column(db.String(80), nullable=False)
     family_id = db.Column(db.Integer, db.ForeignKey('family.id'), nullable=False)
     family = db.relationship('Family', back_populates='stores')
     items = db.relationship('MasterItem', secondary='item_stores', back_populates='stores')
+    # Also serves the family's name-ordered store lists
+    __table_args__ = (db.UniqueConstraint('family_id', 'name', name='_store_family_name_uc'),)
 
 class MasterItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -330,6 +387,10 @@ class MasterItem(db.Model):
     stores = db.relationship('Store', secondary='item_stores', back_populates='items')
     inventory = db.relationship('Inventory', back_populates='master_item', cascade='all, delete-orphan')
     shopping_list_items = db.relationship('ShoppingListItem', back_populates='item', cascade='all, delete-orphan')
+    __table_args__ = (
+        db.Index('ix_master_item_family_name', 'family_id', 'name'),
+        db.Index('ix_master_item_aisle', 'aisle_id'),
+    )
 
 class Inventory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -337,12 +398,17 @@ class Inventory(db.Model):
     master_item_id = db.Column(db.Integer, db.ForeignKey('master_item.id'), nullable=False)
     quantity = db.Column(db.Float, nullable=False, default=0)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
+    # Only ever written by the insert, so upsert_inventory can tell an insert from an update
+    created_at = db.Column(db.DateTime, default=db.func.now())
     family_id = db.Column(db.Integer, db.ForeignKey('family.id'), nullable=False)
     family = db.relationship('Family', back_populates='inventory')
     location = db.relationship('Location', back_populates='inventory')
     master_item = db.relationship('MasterItem', back_populates='inventory')
     __table_args__ = (
         db.UniqueConstraint('location_id', 'master_item_id', 'family_id', name='_location_item_family_uc'),
+        db.Index('ix_inventory_family_location', 'family_id', 'location_id'),
+        # Covers the per-item quantity totals on the shopping list
+        db.Index('ix_inventory_item_quantity', 'master_item_id', 'quantity'),
     )
 
 class ShoppingListItem(db.Model):
@@ -350,12 +416,20 @@ class ShoppingListItem(db.Model):
     item_id = db.Column(db.Integer, db.ForeignKey('master_item.id'), nullable=False)
     checked = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=db.func.now())
+    family_id = db.Column(db.Integer, db.ForeignKey('family.id'), nullable=False)
+    family = db.relationship('Family', back_populates='shopping_list_items')
     item = db.relationship('MasterItem', back_populates='shopping_list_items')
-    __table_args__ = (db.UniqueConstraint('item_id', name='_item_uc'),)
+    __table_args__ = (
+        db.UniqueConstraint('item_id', name='_item_uc'),
+        db.Index('ix_shopping_list_item_family_checked_created', 'family_id', 'checked', 'created_at'),
+        # Range scans for paginated GET /shopping-list
+        db.Index('ix_shopping_list_item_family_id', 'family_id', 'id'),
+    )
 
 item_stores = db.Table('item_stores',
     db.Column('item_id', db.Integer, db.ForeignKey('master_item.id'), primary_key=True),
-    db.Column('store_id', db.Integer, db.ForeignKey('store.id'), primary_key=True)
+    db.Column('store_id', db.Integer, db.ForeignKey('store.id'), primary_key=True),
+    db.Index('ix_item_stores_store_item', 'store_id', 'item_id')
 )
 
 class User(UserMixin, db.Model):
@@ -375,7 +449,8 @@ class User(UserMixin, db.Model):
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    principal = load_principal(int(user_id))
+    return principal.user if principal else None
 
 class Family(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -390,6 +465,7 @@ class Family(db.Model):
     stores = db.relationship('Store', back_populates='family', cascade='all, delete-orphan')
     master_items = db.relationship('MasterItem', back_populates='family', cascade='all, delete-orphan')
     inventory = db.relationship('Inventory', back_populates='family', cascade='all, delete-orphan')
+    shopping_list_items = db.relationship('ShoppingListItem', back_populates='family', cascade='all, delete-orphan')
 
 class FamilyMember(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -399,6 +475,10 @@ class FamilyMember(db.Model):
     joined_at = db.Column(db.DateTime, default=db.func.now())
     user = db.relationship('User', back_populates='memberships')
     family = db.relationship('Family', back_populates='members')
+    __table_args__ = (
+        db.Index('ix_family_member_user_family', 'user_id', 'family_id', 'role'),
+        db.Index('ix_family_member_family_role', 'family_id', 'role'),
+    )
 
 class Invitation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -411,6 +491,296 @@ class Invitation(db.Model):
     expires_at = db.Column(db.DateTime)
     family = db.relationship('Family', back_populates='invitations')
     inviter = db.relationship('User', back_populates='invitations_sent', foreign_keys=[invited_by_user_id])
+    __table_args__ = (db.Index('ix_invitation_token_status', 'token', 'status'),)
+
+class FamilyDataVersion(db.Model):
+    """Per-family change counter, bumped in the same transaction as any write to the family's rows."""
+    __tablename__ = 'family_data_version'
+    family_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+class ItemCount(db.Model):
+    """Item counts per location, store and aisle, maintained by the SQLite triggers below."""
+    __tablename__ = 'item_count'
+    scope = db.Column(db.String(16), primary_key=True)  # 'location', 'store' or 'aisle'
+    scope_id = db.Column(db.Integer, primary_key=True)
+    family_id = db.Column(db.Integer, nullable=False)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+
+# location: inventory rows per location; store: master items linked through
+# item_stores; aisle: master items assigned to the aisle.
+ITEM_COUNT_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS trg_item_count_inventory_insert AFTER INSERT ON inventory BEGIN
+        INSERT INTO item_count (scope, scope_id, family_id, item_count) VALUES ('location', NEW.location_id, NEW.family_id, 1)
+        ON CONFLICT(scope, scope_id) DO UPDATE SET item_count = item_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_item_count_inventory_delete AFTER DELETE ON inventory BEGIN
+        UPDATE item_count SET item_count = item_count - 1 WHERE scope = 'location' AND scope_id = OLD.location_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_item_count_inventory_move AFTER UPDATE OF location_id ON inventory
+    WHEN OLD.location_id IS NOT NEW.location_id BEGIN
+        UPDATE item_count SET item_count = item_count - 1 WHERE scope = 'location' AND scope_id = OLD.location_id;
+        INSERT INTO item_count (scope, scope_id, family_id, item_count) VALUES ('location', NEW.location_id, NEW.family_id, 1)
+        ON CONFLICT(scope, scope_id) DO UPDATE SET item_count = item_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_item_count_location_delete AFTER DELETE ON location BEGIN
+        DELETE FROM item_count WHERE scope = 'location' AND scope_id = OLD.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_item_count_item_stores_insert AFTER INSERT ON item_stores BEGIN
+        INSERT INTO item_count (scope, scope_id, family_id, item_count)
+        SELECT 'store', NEW.store_id, store.family_id, 1 FROM store WHERE store.id = NEW.store_id
+        ON CONFLICT(scope, scope_id) DO UPDATE SET item_count = item_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_item_count_item_stores_delete AFTER DELETE ON item_stores BEGIN
+        UPDATE item_count SET item_count = item_count - 1 WHERE scope = 'store' AND scope_id = OLD.store_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_item_count_store_delete AFTER DELETE ON store BEGIN
+        DELETE FROM item_count WHERE scope = 'store' AND scope_id = OLD.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_item_count_master_item_insert AFTER INSERT ON master_item
+    WHEN NEW.aisle_id IS NOT NULL BEGIN
+        INSERT INTO item_count (scope, scope_id, family_id, item_count) VALUES ('aisle', NEW.aisle_id, NEW.family_id, 1)
+        ON CONFLICT(scope, scope_id) DO UPDATE SET item_count = item_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_item_count_master_item_delete AFTER DELETE ON master_item
+    WHEN OLD.aisle_id IS NOT NULL BEGIN
+        UPDATE item_count SET item_count = item_count - 1 WHERE scope = 'aisle' AND scope_id = OLD.aisle_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_item_count_master_item_move AFTER UPDATE OF aisle_id ON master_item
+    WHEN OLD.aisle_id IS NOT NEW.aisle_id BEGIN
+        UPDATE item_count SET item_count = item_count - 1 WHERE scope = 'aisle' AND scope_id = OLD.aisle_id;
+        INSERT INTO item_count (scope, scope_id, family_id, item_count)
+        SELECT 'aisle', NEW.aisle_id, NEW.family_id, 1 WHERE NEW.aisle_id IS NOT NULL
+        ON CONFLICT(scope, scope_id) DO UPDATE SET item_count = item_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_item_count_aisle_delete AFTER DELETE ON aisle BEGIN
+        DELETE FROM item_count WHERE scope = 'aisle' AND scope_id = OLD.id;
+    END""",
+]
+
+def rebuild_item_counts(connection):
+    """Recompute every row of item_count from the base tables."""
+    connection.exec_driver_sql("DELETE FROM item_count")
+    connection.exec_driver_sql(
+        "INSERT INTO item_count (scope, scope_id, family_id, item_count) "
+        "SELECT 'location', location.id, location.family_id, COUNT(inventory.id) "
+        "FROM location LEFT JOIN inventory ON inventory.location_id = location.id GROUP BY location.id"
+    )
+    connection.exec_driver_sql(
+        "INSERT INTO item_count (scope, scope_id, family_id, item_count) "
+        "SELECT 'store', store.id, store.family_id, COUNT(item_stores.item_id) "
+        "FROM store LEFT JOIN item_stores ON item_stores.store_id = store.id GROUP BY store.id"
+    )
+    connection.exec_driver_sql(
+        "INSERT INTO item_count (scope, scope_id, family_id, item_count) "
+        "SELECT 'aisle', aisle.id, aisle.family_id, COUNT(master_item.id) "
+        "FROM aisle LEFT JOIN master_item ON master_item.aisle_id = aisle.id GROUP BY aisle.id"
+    )
+
+@event.listens_for(db.metadata, 'after_create')
+def _install_item_count_triggers(target, connection, tables=(), **kw):
+    if connection.dialect.name != 'sqlite':
+        return
+    for ddl in ITEM_COUNT_TRIGGERS:
+        connection.exec_driver_sql(ddl)
+    # Table was just added to an existing database: backfill from current data
+    if ItemCount.__table__ in tables:
+        rebuild_item_counts(connection)
+
+def get_item_counts(scope, ids):
+    """Return {id: item_count} for the given ids in one indexed lookup."""
+    ids = list(ids)
+    if not ids:
+        return {}
+    rows = db.session.query(ItemCount.scope_id, ItemCount.item_count).filter(
+        ItemCount.scope == scope,
+        ItemCount.scope_id.in_(ids)
+    ).all()
+    return {scope_id: count for scope_id, count in rows}
+
+@app.cli.command('rebuild-item-counts')
+def rebuild_item_counts_command():
+    """Recompute the item_count aggregate table."""
+    with db.engine.begin() as connection:
+        rebuild_item_counts(connection)
+    print('item_count rebuilt.')
+
+# Representative statement for each hot route, used by 'flask ensure-indexes'
+# to show EXPLAIN QUERY PLAN before and after the indexes are created.
+HOT_QUERIES = [
+    ('get_current_family_id', "SELECT family_id FROM family_member WHERE user_id = 1 LIMIT 1"),
+    ('get_locations', "SELECT id, name FROM location WHERE family_id = 1 ORDER BY name"),
+    ('web_locations (exists)', "SELECT id FROM location WHERE name = 'Pantry' AND family_id = 1 LIMIT 1"),
+    ('get_aisles', "SELECT id, name FROM aisle WHERE family_id = 1 ORDER BY name"),
+    ('get_stores', "SELECT id, name FROM store WHERE family_id = 1 ORDER BY name"),
+    ('get_master_items', "SELECT id, name FROM master_item WHERE family_id = 1 ORDER BY name"),
+    ('web_master_items (exists)', "SELECT id FROM master_item WHERE name = 'Milk' AND family_id = 1 LIMIT 1"),
+    ('get_inventory', "SELECT id FROM inventory WHERE family_id = 1"),
+    ('get_inventory (page)', "SELECT id FROM inventory WHERE family_id = 1 AND (location_id, id) > (1, 1) ORDER BY location_id, id LIMIT 51"),
+    ('get_master_items (page)', "SELECT id FROM master_item WHERE family_id = 1 AND (name, id) > ('Milk', 1) ORDER BY name, id LIMIT 51"),
+    ('get_shopping_list (page)', "SELECT id FROM shopping_list_item WHERE family_id = 1 AND id > 1 ORDER BY id LIMIT 51"),
+    ('web_inventory', "SELECT id FROM inventory WHERE location_id = 1 AND family_id = 1"),
+    ('web_shopping_list (totals)', "SELECT SUM(quantity) FROM inventory WHERE master_item_id = 1"),
+    ('web_shopping_list', "SELECT id FROM shopping_list_item WHERE family_id = 1 ORDER BY created_at"),
+    ('api_get_shopping_list_count', "SELECT COUNT(*) FROM shopping_list_item WHERE family_id = 1 AND checked = 0"),
+    ('web_shopping_list (store filter)', "SELECT item_id FROM item_stores WHERE store_id = 1"),
+    ('family_dashboard (admins)', "SELECT COUNT(*) FROM family_member WHERE family_id = 1 AND role = 'admin'"),
+    ('invite_accept', "SELECT id FROM invitation WHERE token = 'x' AND status = 'pending' LIMIT 1"),
+]
+
+def explain_query_plan(connection, sql):
+    """Return the EXPLAIN QUERY PLAN detail lines for a statement."""
+    return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+def print_query_plans(connection, heading):
+    print(heading)
+    for route, sql in HOT_QUERIES:
+        print(f"  {route}:")
+        for detail in explain_query_plan(connection, sql):
+            print(f"    {detail}")
+
+@app.cli.command('ensure-indexes')
+def ensure_indexes_command():
+    """Create any declared indexes missing from the current database."""
+    with db.engine.begin() as connection:
+        print_query_plans(connection, 'Query plans before:')
+        created = create_missing_indexes(connection)
+        connection.exec_driver_sql('ANALYZE')
+        print_query_plans(connection, 'Query plans after:')
+    print(f"Created {len(created)} index(es): {', '.join(created) if created else 'none'}")
+
+def create_missing_indexes(connection):
+    """Create declared indexes that an existing table doesn't have yet; returns their names."""
+    inspector = db.inspect(connection)
+    existing = set(inspector.get_table_names())
+    created = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        present = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in present:
+                index.create(connection)
+                created.append(index.name)
+    return created
+
+@contextmanager
+def schema_transaction(engine):
+    """
+    A connection inside BEGIN IMMEDIATE with foreign keys off, for schema changes.
+
+    BEGIN IMMEDIATE makes concurrent workers serialize on the write lock.
+    Foreign keys have to be switched off outside the transaction for table
+    rebuilds (see rebuild_sqlite_table) and are restored afterwards. Commits
+    when the block finishes, rolls back if it raises.
+    """
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        foreign_keys = connection.exec_driver_sql('PRAGMA foreign_keys').scalar()
+        connection.exec_driver_sql('PRAGMA foreign_keys = OFF')
+        try:
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+            try:
+                yield connection
+                connection.exec_driver_sql('COMMIT')
+            except Exception:
+                connection.exec_driver_sql('ROLLBACK')
+                raise
+        finally:
+            connection.exec_driver_sql(f'PRAGMA foreign_keys = {foreign_keys}')
+
+def rebuild_sqlite_table(connection, table):
+    """
+    Recreate table from its model definition, keeping its rows.
+
+    SQLite can't alter constraints in place, so this follows its table
+    rebuild procedure: create the new definition under a temporary name, copy
+    the columns both versions share, drop the old table and rename the new
+    one into place. The old table's indexes and triggers are dropped with it
+    and created again. Run it inside schema_transaction(), which turns
+    foreign keys off; rows that break the table's foreign keys abort the
+    rebuild.
+    """
+    temp_name = f'_new_{table.name}'
+    triggers = connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table.name,)
+    ).scalars().all()
+    create = str(CreateTable(table).compile(dialect=connection.dialect))
+    connection.exec_driver_sql(create.replace(f'CREATE TABLE {table.name} ', f'CREATE TABLE {temp_name} ', 1))
+    old_columns = {col['name'] for col in db.inspect(connection).get_columns(table.name)}
+    columns = ', '.join(col.name for col in table.columns if col.name in old_columns)
+    connection.exec_driver_sql(f"INSERT INTO {temp_name} ({columns}) SELECT {columns} FROM {table.name}")
+    connection.exec_driver_sql(f"DROP TABLE {table.name}")
+    # Triggers on other tables may name the dropped table; the modern rename
+    # would re-check them and fail while it's missing
+    connection.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+    connection.exec_driver_sql(f"ALTER TABLE {temp_name} RENAME TO {table.name}")
+    connection.exec_driver_sql("PRAGMA legacy_alter_table = OFF")
+    for index in table.indexes:
+        index.create(connection)
+    for ddl in triggers:
+        connection.exec_driver_sql(ddl)
+    broken = connection.exec_driver_sql(f"PRAGMA foreign_key_check({table.name})").fetchall()
+    if broken:
+        raise RuntimeError(f"{len(broken)} {table.name} row(s) reference missing rows; fix them before migrating")
+
+def migrate_shopping_list_family(connection):
+    """
+    Add shopping_list_item.family_id to a database created before it existed.
+
+    Rows whose master item is gone belong to no family and are deleted; the
+    rest are backfilled from their master item's family. The table is then
+    rebuilt (see rebuild_sqlite_table) so family_id is NOT NULL and the
+    model's indexes exist. Safe to run repeatedly.
+    """
+    columns = {col['name'] for col in db.inspect(connection).get_columns('shopping_list_item')}
+    if 'family_id' in columns:
+        return False
+    orphans = connection.exec_driver_sql(
+        "DELETE FROM shopping_list_item WHERE item_id NOT IN (SELECT id FROM master_item)"
+    ).rowcount
+    if orphans:
+        logger.warning('Deleted %d shopping list row(s) whose master item no longer exists', orphans)
+    connection.exec_driver_sql("ALTER TABLE shopping_list_item ADD COLUMN family_id INTEGER")
+    connection.exec_driver_sql(
+        "UPDATE shopping_list_item SET family_id = "
+        "(SELECT master_item.family_id FROM master_item WHERE master_item.id = shopping_list_item.item_id)"
+    )
+    rebuild_sqlite_table(connection, ShoppingListItem.__table__)
+    return True
+
+def migrate_inventory_created_at(connection):
+    """
+    Add inventory.created_at to a database created before it existed.
+
+    Existing rows keep NULL, which upsert_inventory reads as "not just
+    inserted". Safe to run repeatedly.
+    """
+    columns = {col['name'] for col in db.inspect(connection).get_columns('inventory')}
+    if 'created_at' in columns:
+        return False
+    connection.exec_driver_sql("ALTER TABLE inventory ADD COLUMN created_at DATETIME")
+    return True
+
+def migrate_store_family_unique(connection):
+    """
+    Make store names unique per family rather than across all families.
+
+    Databases created before this have UNIQUE (name) and get the table
+    rebuilt. Safe to run repeatedly.
+    """
+    unique = [constraint['column_names'] for constraint in db.inspect(connection).get_unique_constraints('store')]
+    if ['name'] not in unique:
+        return False
+    rebuild_sqlite_table(connection, Store.__table__)
+    return True
+
+@app.cli.command('migrate-shopping-list')
+def migrate_shopping_list_command():
+    """Add and backfill shopping_list_item.family_id."""
+    with schema_transaction(db.engine) as connection:
+        migrated = migrate_shopping_list_family(connection)
+    print('shopping_list_item.family_id added and backfilled.' if migrated else 'shopping_list_item is already family-scoped.')
 
 # Schemas (plain Marshmallow)
 class LocationSchema(Schema):
@@ -448,6 +818,7 @@ class InventorySchema(Schema):
 
 class ShoppingListItemSchema(Schema):
     id = fields.Int(dump_only=True)
+    family_id = fields.Int(dump_only=True)
     item = fields.Nested('MasterItemSchema', dump_only=True)
     checked = fields.Bool()
     created_at = fields.DateTime()
@@ -462,47 +833,399 @@ master_item_schema = MasterItemSchema()
 master_items_schema = MasterItemSchema(many=True)
 inventory_schema = InventorySchema()
 inventories_schema = InventorySchema(many=True)
+# For rows returned by upsert_inventory/adjust_inventory, which carry no nested objects
+inventory_row_schema = InventorySchema(exclude=('location', 'master_item'))
 shopping_list_item_schema = ShoppingListItemSchema()
 shopping_list_items_schema = ShoppingListItemSchema(many=True)
 
+# Relationships each schema dumps through fields.Nested. List endpoints query
+# through query_for_schema() so the nested objects arrive with the rows instead
+# of being lazy-loaded one row at a time during dump(). All nested fields are
+# many-to-one, so joinedload keeps it to a single SELECT. Keyed by nested
+# field name so a schema restricted with only= skips what it doesn't dump.
+SCHEMA_LOAD_OPTIONS = {
+    InventorySchema: {'location': joinedload(Inventory.location), 'master_item': joinedload(Inventory.master_item)},
+    ShoppingListItemSchema: {'item': joinedload(ShoppingListItem.item)},
+}
+
+def query_for_schema(model, schema):
+    """Return model.query with the eager loading the schema's nested fields need."""
+    options = SCHEMA_LOAD_OPTIONS.get(type(schema), {})
+    return model.query.options(*(option for name, option in options.items() if name in schema.dump_fields))
+
+# Fast read path: the same JSON as the schemas above, built straight from rows
+location_reader = FastReader(LocationSchema, Location.__table__, extra={
+    'item_count': db.func.coalesce(ItemCount.item_count, 0),
+})
+aisle_reader = FastReader(AisleSchema, Aisle.__table__)
+store_reader = FastReader(StoreSchema, Store.__table__)
+master_item_reader = FastReader(MasterItemSchema, MasterItem.__table__)
+inventory_reader = FastReader(InventorySchema, Inventory.__table__, nested={
+    'location': Location.__table__,
+    'master_item': MasterItem.__table__,
+})
+
+def location_select(reader=location_reader):
+    """Locations with their item_count, in the order the sidebar shows them."""
+    if 'item_count' not in reader.extra:
+        return reader.select().order_by(Location.name)
+    return reader.select().outerjoin(ItemCount.__table__, db.and_(
+        ItemCount.scope == 'location', ItemCount.scope_id == Location.id
+    )).order_by(Location.name)
+
+def fast_read_enabled():
+    return app.config.get('FAST_READ_ENABLED', True)
+
+def fast_read_family(reader, family_id, statement=None):
+    """Dump every row of reader's table that belongs to family_id."""
+    if statement is None:
+        statement = reader.select()
+    statement = statement.where(reader.table.c.family_id == family_id)
+    return reader.dump(db.session.execute(statement))
+
+def requested_family_page(sort_column, id_column):
+    """The keyset page asked for by ?limit=/&cursor=, or None for the whole collection."""
+    return requested_page(sort_column, id_column, app.config.get('PAGINATION_MAX_LIMIT', 500))
+
+def requested_family_fields(schema, page=None, extra=()):
+    """The only= subset asked for by ?fields=/&embed=; keeps what the next-page cursor needs."""
+    always = {'id'} if page is None else {'id', page.sort_column.key}
+    return requested_only(schema, always=always, extra=extra)
+
+def dump_family_collection(model, schema, reader, family_id, page=None, only=None, where=None):
+    """Dump a family's rows (or one page of them) through the fast path or the ORM."""
+    schema, reader = sparse_schema(schema, only), reader.restrict(only)
+    if fast_read_enabled():
+        statement = reader.select()
+        if where is not None:
+            statement = statement.where(where)
+        if page is not None:
+            statement = page.apply(statement)
+        return fast_read_family(reader, family_id, statement)
+    query = query_for_schema(model, schema).filter_by(family_id=family_id)
+    if where is not None:
+        query = query.filter(where)
+    if page is not None:
+        query = page.apply(query)
+    return schema.dump(query.all())
+
+def collection_response(items, page):
+    """A plain JSON list, or the {items, next} envelope when paginating."""
+    return jsonify(items) if page is None else page.response(items)
+
+# --- Request principal: user, membership, role and family loaded once ---
+class Principal:
+    """The authenticated user together with their family membership."""
+
+    def __init__(self, user, membership_id=None, family_id=None, role=None, family_name=None):
+        self.user = user
+        self.user_id = user.id
+        self.membership_id = membership_id
+        self.family_id = family_id
+        self.role = role
+        self.family_name = family_name
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    @property
+    def family(self):
+        return db.session.get(Family, self.family_id) if self.family_id else None
+
+principal_cache = LRUCache(maxsize=app.config['PRINCIPAL_CACHE_SIZE'], ttl=app.config['PRINCIPAL_CACHE_TTL'])
+metrics.track_cache('principal', principal_cache)
+
+def load_principal(user_id):
+    """
+    Load the principal for user_id with one joined query and store it on g.
+
+    With PRINCIPAL_CACHE_TTL set, a detached copy is kept per worker and
+    merged back into the session without touching the database.
+    """
+    principal_cache.ttl = app.config.get('PRINCIPAL_CACHE_TTL', 0)
+    principal_cache.enabled = bool(principal_cache.ttl)
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        snapshot, membership = cached
+        principal = Principal(db.session.merge(snapshot, load=False), *membership)
+    else:
+        row = db.session.query(User, FamilyMember.id, FamilyMember.family_id, FamilyMember.role, Family.name).outerjoin(
+            FamilyMember, FamilyMember.user_id == User.id
+        ).outerjoin(
+            Family, Family.id == FamilyMember.family_id
+        ).filter(User.id == user_id).order_by(FamilyMember.id).first()
+        if row is None:
+            return None
+        user, membership = row[0], tuple(row[1:])
+        principal = Principal(user, *membership)
+        if principal_cache.enabled:
+            snapshot = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+            make_transient_to_detached(snapshot)
+            principal_cache.set(user_id, (snapshot, membership))
+    g.principal = principal
+    return principal
+
+def get_current_principal():
+    """Return the current request's principal, loading it if login happened mid-request."""
+    if not current_user.is_authenticated:
+        return None
+    principal = g.get('principal')
+    if principal is None or principal.user_id != current_user.id:
+        principal = load_principal(current_user.id)
+    return principal
+
+def get_current_membership():
+    """Return the principal if the current user belongs to a family, else None."""
+    principal = get_current_principal()
+    return principal if principal and principal.family_id else None
+
+@app.before_request
+def _reset_principal():
+    g.pop('principal', None)
+
 # --- Helper: get current user's family_id ---
 def get_current_family_id():
-    fam_member = FamilyMember.query.filter_by(user_id=current_user.id).first()
-    if not fam_member:
+    principal = get_current_principal()
+    if not principal:
         return None
-    return fam_member.family_id
+    return principal.family_id
 
-# Ensure tables exist before first request
-tables_created = False
-@app.before_request
-def ensure_tables():
-    global tables_created
-    if not tables_created:
-        db.create_all()
-        tables_created = True
+# --- Navigation cache: per-family locations + item counts for the sidebar ---
+nav_cache = LRUCache(maxsize=app.config['NAV_CACHE_SIZE'], ttl=app.config['NAV_CACHE_TTL'])
+metrics.track_cache('nav', nav_cache)
+
+def dump_locations_with_counts(family_id, only=None):
+    if fast_read_enabled():
+        reader = location_reader.restrict(only)
+        return fast_read_family(reader, family_id, location_select(reader))
+    locs = Location.query.filter_by(family_id=family_id).order_by(Location.name).all()
+    result = sparse_schema(locations_schema, only, extra=('item_count',)).dump(locs)
+    if only is not None and 'item_count' not in only:
+        return result
+    counts = get_item_counts('location', [loc.id for loc in locs])
+    for loc_data in result:
+        loc_data['item_count'] = counts.get(loc_data['id'], 0)
+    return result
+
+def get_nav_locations(family_id):
+    """Return the sidebar locations for a family, served from nav_cache when possible."""
+    if family_id is None:
+        return []
+    nav_cache.enabled = app.config.get('NAV_CACHE_ENABLED', True)
+    # Keyed on the persisted data version, so a write through any worker process invalidates it
+    version = get_family_data_version(family_id)[0] if nav_cache.enabled else None
+    return nav_cache.get_or_load(family_id, lambda: dump_locations_with_counts(family_id), version=version)
+
+# --- Per-family data versions (ETags on the JSON GET endpoints) ---
+def bump_family_versions(connection, family_ids):
+    """Increment the data version of each family, creating its row on first use."""
+    family_ids = sorted({family_id for family_id in family_ids if family_id is not None})
+    if not family_ids:
+        return
+    table = FamilyDataVersion.__table__
+    now = datetime.utcnow()
+    stmt = sqlite_insert(table).values([
+        {'family_id': family_id, 'version': 1, 'updated_at': now} for family_id in family_ids
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.family_id],
+        set_={'version': table.c.version + 1, 'updated_at': stmt.excluded.updated_at},
+    )
+    connection.execute(stmt)
+
+def mark_family_changed(family_id, session=None):
+    """Bump a family's data version on commit; for writes that bypass the ORM unit of work."""
+    session = session or db.session
+    session.info.setdefault('data_changed_families', set()).add(family_id)
+
+def get_family_data_version(family_id):
+    """(version, updated_at) for a family; (0, None) before its first write."""
+    row = db.session.execute(
+        db.select(FamilyDataVersion.version, FamilyDataVersion.updated_at).where(FamilyDataVersion.family_id == family_id)
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_changed_family_versions(session, flush_context):
+    """Any flushed change to a family-scoped row bumps that family's data version."""
+    changed = set()
+    for obj in list(session.new) + list(session.deleted) + list(session.dirty):
+        if getattr(type(obj), 'family_id', None) is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        changed.add(obj.family_id)
+    bump_family_versions(session.connection(), changed)
+
+@event.listens_for(db.session, 'before_commit')
+def _bump_marked_family_versions(session):
+    changed = session.info.pop('data_changed_families', None)
+    if changed:
+        bump_family_versions(session.connection(), changed)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_marked_family_versions(session):
+    session.info.pop('data_changed_families', None)
+
+def family_etag(view):
+    """
+    Conditional GET for family-scoped JSON endpoints.
+
+    The family's data version becomes a weak ETag (and updated_at the
+    Last-Modified). A matching If-None-Match gets a 304 after one primary-key
+    lookup, without running the view.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        family_id = get_current_family_id()
+        if family_id is None:
+            return view(*args, **kwargs)
+        version, updated_at = get_family_data_version(family_id)
+        etag = f'{family_id}-{version}'
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag, weak=True)
+        if updated_at is not None:
+            response.last_modified = updated_at
+        # Clients may keep the body but must revalidate before using it
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
+
+# --- Inventory service ---
+def upsert_inventory(family_id, location_id, master_item_id, quantity, mode='set'):
+    """
+    Insert or update the inventory row for (location, item, family) in one statement.
+
+    mode='set' replaces the quantity, mode='add' adds quantity to the current
+    value. The row is only written when both the location and the master item
+    belong to family_id. Returns the inventory row plus `inserted` (False when
+    an existing row was updated) and the master item's `item_name`, or None
+    when they don't belong to family_id. The caller commits.
+    """
+    if mode not in ('set', 'add'):
+        raise ValueError(f"Unknown upsert mode '{mode}'")
+    inventory = Inventory.__table__
+    now = datetime.utcnow()
+    source = db.select(
+        db.literal(location_id),
+        db.literal(master_item_id),
+        db.literal(family_id),
+        db.literal(quantity, db.Float),
+        db.literal(now, db.DateTime),
+        db.literal(now, db.DateTime),
+    ).where(
+        db.exists().where(Location.id == location_id, Location.family_id == family_id),
+        db.exists().where(MasterItem.id == master_item_id, MasterItem.family_id == family_id),
+    )
+    stmt = sqlite_insert(inventory).from_select(
+        ['location_id', 'master_item_id', 'family_id', 'quantity', 'last_updated', 'created_at'], source
+    )
+    new_quantity = inventory.c.quantity + stmt.excluded.quantity if mode == 'add' else stmt.excluded.quantity
+    # The update leaves created_at alone, so only a row inserted just now carries this call's timestamp
+    inserted = db.type_coerce(inventory.c.created_at == db.literal(now, db.DateTime), db.Boolean)
+    item_name = db.select(MasterItem.name).where(MasterItem.id == master_item_id).scalar_subquery()
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['location_id', 'master_item_id', 'family_id'],
+        set_={'quantity': new_quantity, 'last_updated': stmt.excluded.last_updated},
+    ).returning(*inventory.c, inserted.label('inserted'), item_name.label('item_name'))
+    row = db.session.execute(stmt).first()
+    if row is not None:
+        mark_family_changed(family_id)
+    return row
+
+def adjust_inventory(family_id, inv_id, delta):
+    """
+    Add delta to an inventory quantity in a single UPDATE, clamping at zero.
+
+    Returns the updated inventory row, or None if it doesn't exist in
+    family_id. The caller commits.
+    """
+    inventory = Inventory.__table__
+    stmt = db.update(inventory).where(
+        inventory.c.id == inv_id,
+        inventory.c.family_id == family_id
+    ).values(
+        quantity=db.func.max(0, inventory.c.quantity + delta),
+        last_updated=datetime.utcnow()
+    ).returning(*inventory.c)
+    row = db.session.execute(stmt).first()
+    if row is not None:
+        mark_family_changed(family_id)
+    return row
+
+def parse_delta(value):
+    """Parse '+n' / '-n' (or a plain number) into a float, or None if invalid."""
+    try:
+        delta = float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    if delta != delta or delta in (float('inf'), float('-inf')):
+        return None
+    return delta
+
+# --- Schema bootstrap ---
+# Bump whenever a model, trigger, index or migration changes the schema.
+SCHEMA_VERSION = 5
+
+def schema_is_current(connection):
+    """Cheap check: user_version matches and every declared table exists."""
+    if connection.exec_driver_sql('PRAGMA user_version').scalar() != SCHEMA_VERSION:
+        return False
+    names = set(db.metadata.tables)
+    present = connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'").scalars().all()
+    return names.issubset(present)
+
+def bootstrap_schema(engine):
+    """
+    Bring the database up to SCHEMA_VERSION: tables, triggers, migrations, indexes.
+
+    Returns False without writing anything when the schema is already current.
+    The work runs in schema_transaction() so concurrent workers starting
+    against the same file serialize, and only the first one does it.
+    user_version and BEGIN IMMEDIATE are SQLite-only; other backends just get
+    missing tables.
+    """
+    if engine.dialect.name != 'sqlite':
+        missing = set(db.metadata.tables) - set(db.inspect(engine).get_table_names())
+        db.metadata.create_all(engine)
+        return bool(missing)
+    with engine.connect() as connection:
+        if schema_is_current(connection):
+            return False
+    with schema_transaction(engine) as connection:
+        if schema_is_current(connection):
+            return False
+        db.metadata.create_all(connection)
+        migrate_shopping_list_family(connection)
+        migrate_inventory_created_at(connection)
+        migrate_store_family_unique(connection)
+        create_missing_indexes(connection)
+        connection.exec_driver_sql(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    return True
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create or upgrade the database schema (run once per deployment)."""
+    if bootstrap_schema(db.engine):
+        print(f'Database schema bootstrapped to version {SCHEMA_VERSION}.')
+    else:
+        print(f'Database schema already at version {SCHEMA_VERSION}.')
 
 # Location endpoints
 @app.route('/locations', methods=['GET'])
 @login_required
+@family_etag
+@query_budget(3)
 def get_locations():
     family_id = get_current_family_id()
-    locs = Location.query.filter_by(family_id=family_id).order_by(Location.name).all()
-    
-    # Get the locations with schema
-    result = locations_schema.dump(locs)
-    
-    # Add item count for each location
-    for loc_data in result:
-        # Get item count for this location
-        item_count = db.session.query(db.func.count(Inventory.id)).filter(
-            Inventory.location_id == loc_data['id'],
-            Inventory.family_id == family_id
-        ).scalar() or 0
-        
-        # Add item count to the location data
-        loc_data['item_count'] = item_count
-    
-    return jsonify(result)
+    only = requested_family_fields(LocationSchema, extra=('item_count',))
+    return jsonify(dump_locations_with_counts(family_id, only))
 
 @app.route('/locations', methods=['POST'])
 @login_required
@@ -541,10 +1264,13 @@ def update_or_delete_location(loc_id):
 # Aisle endpoints
 @app.route('/aisles', methods=['GET'])
 @login_required
+@family_etag
+@query_budget(3)
 def get_aisles():
     family_id = get_current_family_id()
-    aisles = Aisle.query.filter_by(family_id=family_id).all()
-    return jsonify(aisles_schema.dump(aisles))
+    page = requested_family_page(Aisle.name, Aisle.id)
+    only = requested_family_fields(aisles_schema, page)
+    return collection_response(dump_family_collection(Aisle, aisles_schema, aisle_reader, family_id, page, only), page)
 
 @app.route('/aisles', methods=['POST'])
 @login_required
@@ -580,10 +1306,13 @@ def update_or_delete_aisle(aisle_id):
 # MasterItem endpoints
 @app.route('/master-items', methods=['GET'])
 @login_required
+@family_etag
+@query_budget(3)
 def get_master_items():
     family_id = get_current_family_id()
-    items = MasterItem.query.filter_by(family_id=family_id).all()
-    return jsonify(master_items_schema.dump(items))
+    page = requested_family_page(MasterItem.name, MasterItem.id)
+    only = requested_family_fields(master_items_schema, page)
+    return collection_response(dump_family_collection(MasterItem, master_items_schema, master_item_reader, family_id, page, only), page)
 
 @app.route('/master-items', methods=['POST'])
 @login_required
@@ -625,10 +1354,13 @@ def update_or_delete_master_item(item_id):
 # Store endpoints
 @app.route('/stores', methods=['GET'])
 @login_required
+@family_etag
+@query_budget(3)
 def get_stores():
     family_id = get_current_family_id()
-    stores = Store.query.filter_by(family_id=family_id).all()
-    return jsonify(stores_schema.dump(stores))
+    page = requested_family_page(Store.name, Store.id)
+    only = requested_family_fields(stores_schema, page)
+    return collection_response(dump_family_collection(Store, stores_schema, store_reader, family_id, page, only), page)
 
 @app.route('/stores', methods=['POST'])
 @login_required
@@ -664,10 +1396,13 @@ def update_or_delete_store(store_id):
 # Inventory endpoints
 @app.route('/inventory', methods=['GET'])
 @login_required
+@family_etag
+@query_budget(3)
 def get_inventory():
     family_id = get_current_family_id()
-    invs = Inventory.query.filter_by(family_id=family_id).all()
-    return jsonify(inventories_schema.dump(invs))
+    page = requested_family_page(Inventory.location_id, Inventory.id)
+    only = requested_family_fields(inventories_schema, page)
+    return collection_response(dump_family_collection(Inventory, inventories_schema, inventory_reader, family_id, page, only), page)
 
 @app.route('/inventory', methods=['POST'])
 @login_required
@@ -675,19 +1410,35 @@ def create_inventory():
     family_id = get_current_family_id()
     json_data = request.get_json()
     try:
-        inv = Inventory(family_id=family_id, **json_data)
-    except TypeError as err:
+        location_id = int(json_data['location_id'])
+        master_item_id = int(json_data['master_item_id'])
+        quantity = float(json_data.get('quantity', 0))
+    except (TypeError, KeyError, ValueError):
         return jsonify({'error': 'Invalid JSON'}), 400
-    db.session.add(inv)
+    row = upsert_inventory(family_id, location_id, master_item_id, quantity, mode='set')
+    if row is None:
+        db.session.rollback()
+        return jsonify({'error': 'Location or item not found'}), 404
     db.session.commit()
-    return jsonify(inventory_schema.dump(inv)), 201
+    return jsonify(inventory_row_schema.dump(row)), 201 if row.inserted else 200
 
 @app.route('/inventory/<int:inv_id>', methods=['PATCH'])
 @login_required
 def update_inventory(inv_id):
     family_id = get_current_family_id()
+    json_data = request.get_json(silent=True)
+    if not isinstance(json_data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    if 'delta' in json_data:
+        delta = parse_delta(json_data['delta'])
+        if delta is None:
+            return jsonify({'error': 'Delta must be a number such as +1 or -1'}), 400
+        row = adjust_inventory(family_id, inv_id, delta)
+        if row is None:
+            return jsonify({'error': 'Not found'}), 404
+        db.session.commit()
+        return jsonify(inventory_row_schema.dump(row))
     inv = Inventory.query.filter_by(id=inv_id, family_id=family_id).first_or_404()
-    json_data = request.get_json()
     if 'quantity' in json_data:
         try:
             qty = float(json_data['quantity'])
@@ -700,6 +1451,34 @@ def update_inventory(inv_id):
     db.session.commit()
     return jsonify(inventory_schema.dump(inv))
 
+@app.route('/inventory/<int:inv_id>/adjust', methods=['POST'])
+@login_required
+def adjust_inventory_quantity(inv_id):
+    """Atomically add to or subtract from a quantity; used by the +/- buttons and the JSON API."""
+    family_id = get_current_family_id()
+    sort_col = request.form.get('sort_col')
+    sort_dir = request.form.get('sort_dir')
+    if request.is_json:
+        json_data = request.get_json(silent=True)
+        if not isinstance(json_data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        delta = parse_delta(json_data.get('delta'))
+        if delta is None:
+            return jsonify({'error': 'Delta must be a number such as +1 or -1'}), 400
+        row = adjust_inventory(family_id, inv_id, delta)
+        if row is None:
+            return jsonify({'error': 'Not found'}), 404
+        db.session.commit()
+        return jsonify({'id': row.id, 'location_id': row.location_id, 'quantity': row.quantity})
+    delta = parse_delta(request.form.get('delta'))
+    if delta is None:
+        return redirect(url_for('web_inventory', error='Quantity change must be a number.', sort_col=sort_col, sort_dir=sort_dir))
+    row = adjust_inventory(family_id, inv_id, delta)
+    if row is None:
+        return redirect(url_for('web_inventory', error='Inventory item not found.', sort_col=sort_col, sort_dir=sort_dir))
+    db.session.commit()
+    return redirect(url_for('web_inventory', location_id=row.location_id, sort_col=sort_col, sort_dir=sort_dir))
+
 @app.route('/inventory/<int:inv_id>', methods=['DELETE'])
 @login_required
 def delete_inventory(inv_id):
@@ -712,8 +1491,17 @@ def delete_inventory(inv_id):
 # Inventory by ID (for family isolation test)
 @app.route('/inventory/<int:inventory_id>', methods=['GET'])
 @login_required
+@family_etag
+@query_budget(3)
 def get_inventory_by_id(inventory_id):
     family_id = get_current_family_id()
+    only = requested_family_fields(inventory_schema)
+    if only is not None:
+        rows = dump_family_collection(Inventory, inventories_schema, inventory_reader, family_id, only=only,
+                                      where=Inventory.id == inventory_id)
+        if not rows:
+            return {'error': 'Not found'}, 404
+        return jsonify(rows[0])
     inv = Inventory.query.filter_by(id=inventory_id, family_id=family_id).first()
     if not inv:
         return {'error': 'Not found'}, 404
@@ -725,13 +1513,180 @@ def get_inventory_by_id(inventory_id):
         'last_updated': inv.last_updated.isoformat() if inv.last_updated else None
     }, 200
 
+# Export endpoints
+EXPORT_COLUMNS = ['id', 'location', 'item', 'quantity', 'unit', 'aisle', 'stores', 'last_updated']
+EXPORT_CHUNK_SIZE = 500
+
+def inventory_export_select(family_id, since=None):
+    """One row per inventory entry with its location, item, aisle and store names."""
+    store_names = db.select(db.func.group_concat(Store.name, ', ')).select_from(
+        item_stores.join(Store, Store.id == item_stores.c.store_id)
+    ).where(item_stores.c.item_id == Inventory.master_item_id).scalar_subquery()
+    stmt = db.select(
+        Inventory.id,
+        Location.name.label('location'),
+        MasterItem.name.label('item'),
+        Inventory.quantity,
+        MasterItem.default_unit.label('unit'),
+        Aisle.name.label('aisle'),
+        store_names.label('stores'),
+        Inventory.last_updated,
+    ).select_from(Inventory).join(Location, Location.id == Inventory.location_id).join(
+        MasterItem, MasterItem.id == Inventory.master_item_id
+    ).outerjoin(Aisle, Aisle.id == MasterItem.aisle_id).where(Inventory.family_id == family_id)
+    if since is not None:
+        stmt = stmt.where(Inventory.last_updated > since)
+    # (family_id, location_id) index order, so rows stream without a sort step
+    return stmt.order_by(Inventory.location_id, Inventory.id)
+
+def stream_inventory_export(family_id, since, fmt):
+    """
+    Yield the export in chunks from a single SELECT.
+
+    The whole export is one statement on its own connection, so it reads a
+    single consistent snapshot, and yield_per keeps only EXPORT_CHUNK_SIZE
+    rows in memory at a time.
+    """
+    with db.engine.connect() as connection:
+        result = connection.execution_options(yield_per=EXPORT_CHUNK_SIZE).execute(
+            inventory_export_select(family_id, since)
+        )
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            yield buffer.getvalue()
+            for rows in result.partitions():
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(
+                    [*row[:-1], row.last_updated.isoformat() if row.last_updated else ''] for row in rows
+                )
+                yield buffer.getvalue()
+        else:
+            for rows in result.partitions():
+                yield ''.join(
+                    json.dumps(dict(row._mapping, last_updated=row.last_updated.isoformat() if row.last_updated else None)) + '\n'
+                    for row in rows
+                )
+
+@app.route('/export/inventory.<fmt>', methods=['GET'])
+@login_required
+@query_budget(2)
+def export_inventory(fmt):
+    """
+    Stream the family's inventory as CSV or NDJSON.
+
+    ?since= (ISO timestamp) limits the export to rows updated after it; pass
+    the largest last_updated from the previous export. Deleted rows are not
+    reported by incremental exports.
+    """
+    if fmt not in ('csv', 'ndjson'):
+        abort(404)
+    family_id = get_current_family_id()
+    if family_id is None:
+        abort(404)
+    since = request.args.get('since')
+    if since:
+        try:
+            since = datetime.fromisoformat(since)
+        except ValueError:
+            return jsonify({'error': 'since must be an ISO 8601 timestamp'}), 400
+        if since.tzinfo is not None:
+            # last_updated is stored as naive UTC
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = Response(stream_with_context(stream_inventory_export(family_id, since or None, fmt)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=inventory.{fmt}'
+    return response
+
+# Bulk import
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
+def import_inventory(family_id, data, fmt, mode='set', chunk_size=IMPORT_CHUNK_SIZE):
+    """Parse and bulk-write an import for a family; returns a summary with per-row errors."""
+    rows, errors = parse_import(data, fmt)
+    importer = BulkImporter(
+        db.engine, db.metadata.tables, family_id, mode=mode, chunk_size=chunk_size,
+        before_commit=lambda connection: bump_family_versions(connection, [family_id]),
+    )
+    importer.run(rows)
+    summary = importer.summary()
+    summary['rows'] = len(rows) + len(errors)
+    summary['errors'] = sorted(errors + summary['errors'], key=lambda error: error['line'])
+    return summary
+
+@app.route('/import/inventory', methods=['POST'])
+@login_required
+def import_inventory_upload():
+    """
+    Bulk import name/location/quantity/aisle/store rows.
+
+    Accepts a multipart 'file' upload (.csv or .json), or the CSV/JSON as the
+    request body. ?mode=add adds quantities to existing stock instead of
+    replacing them. Bad rows are reported and skipped; the rest is imported.
+    """
+    family_id = get_current_family_id()
+    if family_id is None:
+        return jsonify({'error': 'No family membership found.'}), 400
+    mode = request.args.get('mode', 'set')
+    if mode not in ('set', 'add'):
+        return jsonify({'error': "mode must be 'set' or 'add'"}), 400
+    upload = request.files.get('file')
+    try:
+        if upload is not None:
+            data = upload.read().decode('utf-8-sig')
+            fmt = 'json' if (upload.filename or '').lower().endswith('.json') else 'csv'
+        else:
+            data = request.get_data().decode('utf-8-sig')
+            fmt = 'json' if request.is_json else 'csv'
+        # End the request's read transaction before the import takes the write lock
+        db.session.commit()
+        summary = import_inventory(family_id, data, fmt, mode=mode)
+    except ValueError as e:
+        return jsonify({'error': f'Could not read import: {e}'}), 400
+    summary['error_count'] = len(summary['errors'])
+    summary['errors'] = summary['errors'][:IMPORT_MAX_REPORTED_ERRORS]
+    return jsonify(summary)
+
+@app.cli.command('import-inventory')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--family-id', type=int, required=True, help='Family to import into')
+@click.option('--mode', type=click.Choice(['set', 'add']), default='set', help='Replace or add to existing quantities')
+@click.option('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Rows per transaction')
+def import_inventory_command(path, family_id, mode, chunk_size):
+    """Bulk import a CSV or JSON file of name,location,quantity,aisle,store rows."""
+    if db.session.get(Family, family_id) is None:
+        print(f'No family with id {family_id}.')
+        return
+    with open(path, encoding='utf-8-sig') as f:
+        data = f.read()
+    fmt = 'json' if path.lower().endswith('.json') else 'csv'
+    start = time.perf_counter()
+    summary = import_inventory(family_id, data, fmt, mode=mode, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    created = ', '.join(f'{count} {kind}' for kind, count in summary['created'].items())
+    print(f"Imported {summary['imported']} of {summary['rows']} row(s) in {elapsed:.2f}s; created {created}.")
+    for error in summary['errors'][:20]:
+        print(f"  line {error['line']}: {error['error']}")
+    if len(summary['errors']) > 20:
+        print(f"  ... and {len(summary['errors']) - 20} more error(s)")
+
 # Shopping List endpoints
 @app.route('/shopping-list', methods=['GET'])
 @login_required
+@family_etag
+@query_budget(3)
 def get_shopping_list():
     family_id = get_current_family_id()
-    items = ShoppingListItem.query.all()
-    return jsonify(shopping_list_items_schema.dump(items))
+    # Pages follow id (insertion) order: created_at is written by SQLite's
+    # CURRENT_TIMESTAMP without microseconds, so a bound datetime cursor
+    # would never compare equal to it
+    page = requested_family_page(ShoppingListItem.id, ShoppingListItem.id)
+    schema = sparse_schema(shopping_list_items_schema, requested_family_fields(shopping_list_items_schema, page))
+    query = query_for_schema(ShoppingListItem, schema).filter_by(family_id=family_id)
+    query = query.order_by(ShoppingListItem.created_at) if page is None else page.apply(query)
+    return collection_response(schema.dump(query.all()), page)
 
 @app.route('/shopping-list', methods=['POST'])
 @login_required
@@ -739,9 +1694,11 @@ def create_shopping_list_item():
     family_id = get_current_family_id()
     json_data = request.get_json()
     try:
-        item = ShoppingListItem(**json_data)
+        item = ShoppingListItem(family_id=family_id, **json_data)
     except TypeError as err:
         return jsonify({'error': 'Invalid JSON'}), 400
+    if not MasterItem.query.filter_by(id=item.item_id, family_id=family_id).first():
+        return jsonify({'error': 'Item not found'}), 404
     db.session.add(item)
     db.session.commit()
     return jsonify(shopping_list_item_schema.dump(item)), 201
@@ -750,48 +1707,14 @@ def create_shopping_list_item():
 @app.route('/seed')
 @login_required
 def seed():
-    # Only seed if tables are empty
-    if Location.query.first() or MasterItem.query.first() or Inventory.query.first():
+    family_id = get_current_family_id()
+    if family_id is None:
+        return jsonify({'error': 'No family membership found.'}), 400
+    # Only seed a family that has no data yet
+    if Location.query.filter_by(family_id=family_id).first() or MasterItem.query.filter_by(family_id=family_id).first():
         return 'Already seeded.', 200
-
-    locations = [
-        Location(name='Pantry'),
-        Location(name='Refrigerator'),
-        Location(name='Freezer')
-    ]
-    db.session.add_all(locations)
-    db.session.commit()
-
-    aisles = [
-        Aisle(name='Bakery'),
-        Aisle(name='Canned Goods'),
-        Aisle(name='Dairy'),
-        Aisle(name='Meat'),
-        Aisle(name='Produce'),
-        Aisle(name='Spices')
-    ]
-    db.session.add_all(aisles)
-    db.session.commit()
-
-    grocery_items = [
-        'Milk', 'Eggs', 'Butter', 'Cheddar Cheese', 'Yogurt', 'Orange Juice', 'Apples', 'Bananas', 'Grapes', 'Strawberries',
-        'Chicken Breast', 'Ground Beef', 'Pork Chops', 'Bacon', 'Ham', 'Salmon', 'Tilapia', 'Shrimp', 'Broccoli', 'Carrots',
-        'Potatoes', 'Onions', 'Tomatoes', 'Lettuce', 'Spinach', 'Cucumber', 'Bell Peppers', 'Mushrooms', 'Zucchini', 'Corn',
-        'Rice', 'Pasta', 'Bread', 'Tortillas', 'Cereal', 'Oatmeal', 'Peanut Butter', 'Jelly', 'Canned Beans', 'Canned Corn',
-        'Soup', 'Crackers', 'Chips', 'Cookies', 'Ice Cream', 'Frozen Pizza', 'Frozen Vegetables', 'Ketchup', 'Mustard', 'Mayonnaise'
-    ]
-    items = [MasterItem(name=name.title()) for name in grocery_items]
-    db.session.add_all(items)
-    db.session.commit()
-
-    # Assign each item to a random location with a random quantity (0-5)
-    all_locations = Location.query.all()
-    all_items = MasterItem.query.all()
-    for item in all_items:
-        loc = random.choice(all_locations)
-        qty = random.randint(0, 5)
-        db.session.add(Inventory(location_id=loc.id, master_item_id=item.id, quantity=qty))
-    db.session.commit()
+    seed_family(db.session.connection(), db.metadata.tables, family_id, random.Random(family_id))
+    mark_family_changed(family_id)
     db.session.commit()
     return 'Database seeded!', 201
 
@@ -799,11 +1722,58 @@ def seed():
 @app.route('/seed_stores')
 @login_required
 def seed_stores():
-    stores = [Store(name=s) for s in ['Walmart', 'Costco', 'No Frills']]
-    db.session.add_all(stores)
-    db.session.commit()
+    family_id = get_current_family_id()
+    if family_id is None:
+        return jsonify({'error': 'No family membership found.'}), 400
+    names = ['Walmart', 'Costco', 'No Frills']
+    existing = set(db.session.scalars(db.select(Store.name).where(Store.family_id == family_id, Store.name.in_(names))))
+    if existing.issuperset(names):
+        return 'Already seeded.', 200
+    db.session.add_all(Store(name=name, family_id=family_id) for name in names if name not in existing)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return 'Already seeded.', 200
     return 'Stores seeded.'
 
+def generate_tenants(families, seed=0, password='password', **options):
+    """
+    Bulk-create synthetic families with users, inventory and shopping lists.
+
+    Output is reproducible for a given seed and options; see TenantGenerator
+    for the size options. Every generated user logs in with password.
+    """
+    generator = TenantGenerator(db.metadata.tables, seed=seed, password_hash=generate_password_hash(password), **options)
+    with db.engine.begin() as connection:
+        summary = generator.run(connection, families)
+        family_ids = [family['id'] for family in summary['families']]
+        bump_family_versions(connection, family_ids)
+    return summary
+
+@app.cli.command('generate-tenants')
+@click.option('--families', type=int, default=100, help='Number of families to create')
+@click.option('--seed', type=int, default=0, help='Random seed; the same seed reproduces the same data')
+@click.option('--skew', type=float, default=TENANT_DEFAULTS['skew'], help='Zipf exponent for family sizes (0 = all equal)')
+@click.option('--max-items', type=int, default=TENANT_DEFAULTS['max_items'], help='Master items in the largest family')
+@click.option('--max-users', type=int, default=TENANT_DEFAULTS['max_users'], help='Users in the largest family')
+@click.option('--max-locations', type=int, default=TENANT_DEFAULTS['max_locations'], help='Locations in the largest family')
+@click.option('--max-aisles', type=int, default=TENANT_DEFAULTS['max_aisles'], help='Aisles in the largest family')
+@click.option('--max-stores', type=int, default=TENANT_DEFAULTS['max_stores'], help='Stores in the largest family')
+@click.option('--password', default='password', help='Password for every generated user')
+def generate_tenants_command(families, seed, skew, max_items, max_users, max_locations, max_aisles, max_stores, password):
+    """Fill the database with synthetic families of skewed sizes for load and benchmark runs."""
+    start = time.perf_counter()
+    summary = generate_tenants(families, seed=seed, password=password, skew=skew, max_items=max_items,
+                               max_users=max_users, max_locations=max_locations, max_aisles=max_aisles,
+                               max_stores=max_stores)
+    elapsed = time.perf_counter() - start
+    counts = ', '.join(f'{count} {name}' for name, count in summary['counts'].items())
+    print(f'Generated {families} families in {elapsed:.2f}s: {counts}.')
+    largest = sorted(summary['families'], key=lambda family: family['counts']['inventory'], reverse=True)[:3]
+    for family in largest:
+        print(f"  family {family['id']}: {family['counts']['inventory']} inventory rows, login {family['users'][0]}")
+
 # User endpoints
 @app.route('/signup', methods=['POST'])
 def signup():
@@ -823,24 +1793,20 @@ def signup():
     # Handle family creation or invitation acceptance
     if invite_token:
         try:
-            print(f"[DEBUG] /signup received invite_token: {invite_token}")
             invite_data = serializer.loads(invite_token, max_age=86400, salt='invite')
             invitation = Invitation.query.filter_by(token=invite_token, status='pending').first()
-            print(f"[DEBUG] /signup invitation: {invitation}")
-            if invitation:
-                print(f"[DEBUG] /signup invitation status: {invitation.status}, email: {invitation.email}, family_id: {invitation.family_id}")
             if not invitation:
-                print(f"[DEBUG] /signup: No pending invitation found for token {invite_token}")
+                auth_log.info('Signup with an invitation that is not pending')
                 return jsonify({'error': 'Invalid or expired invitation.'}), 400
             if invitation.email != email:
-                print(f"[DEBUG] /signup: Invitation email {invitation.email} does not match submitted email {email}")
+                auth_log.info('Signup email does not match the invitation', extra={'family_id': invitation.family_id})
                 return jsonify({'error': 'Invitation email does not match.'}), 400
             # Accept invitation: add user to family
             fam_member = FamilyMember(user_id=user.id, family_id=invitation.family_id, role='member')
             invitation.status = 'accepted'
             db.session.add(fam_member)
         except Exception as e:
-            print(f"[DEBUG] /signup exception: {e}")
+            auth_log.info('Signup with an invalid invitation token: %s', e)
             return jsonify({'error': 'Invalid or expired invitation.'}), 400
     else:
         # Create a default family for the user if no family name or invite token is provided
@@ -946,7 +1912,7 @@ def logout():
 @app.route('/invite', methods=['POST'])
 @login_required
 def invite():
-    fam_member = FamilyMember.query.filter_by(user_id=current_user.id).first()
+    fam_member = get_current_membership()
     if not fam_member or fam_member.role != 'admin':
         return jsonify({'error': 'Only admins can invite.'}), 403
     data = request.get_json()
@@ -968,15 +1934,11 @@ def invite():
 @app.route('/invite/accept', methods=['GET'])
 def invite_accept():
     token = request.args.get('token')
-    print(f"[DEBUG] /invite/accept received token: {token}")
     try:
         invite_data = serializer.loads(token, max_age=86400, salt='invite')
         invitation = Invitation.query.filter_by(token=token, status='pending').first()
-        print(f"[DEBUG] /invite/accept invitation: {invitation}")
-        if invitation:
-            print(f"[DEBUG] /invite/accept invitation status: {invitation.status}, email: {invitation.email}, family_id: {invitation.family_id}")
         if not invitation:
-            print(f"[DEBUG] /invite/accept: No pending invitation found for token {token}")
+            auth_log.info('Invitation link is not pending')
             return render_template('auth.html', invite_error='Invalid or expired invitation.', invite_token=token)
         family = Family.query.get(invitation.family_id)
         family_name = family.name if family else None
@@ -989,13 +1951,15 @@ def invite_accept():
             invite_family_name=family_name
         )
     except Exception as e:
-        print(f"[DEBUG] /invite/accept exception: {e}")
+        auth_log.info('Invalid invitation link: %s', e)
         return render_template('auth.html', invite_error='Invalid or expired invitation.', invite_token=token)
 
 @app.route('/family/<int:family_id>/role', methods=['POST'])
 @login_required
 def change_family_role(family_id):
-    fam_member = FamilyMember.query.filter_by(user_id=current_user.id, family_id=family_id).first()
+    fam_member = get_current_membership()
+    if fam_member and fam_member.family_id != family_id:
+        fam_member = FamilyMember.query.filter_by(user_id=current_user.id, family_id=family_id).first()
     if not fam_member or fam_member.role != 'admin':
         return jsonify({'error': 'Only family admin can change roles.'}), 403
     data = request.get_json()
@@ -1013,14 +1977,17 @@ def change_family_role(family_id):
             return jsonify({'error': 'There must be at least one admin in the family.'}), 400
     target_member.role = new_role
     db.session.commit()
+    principal_cache.invalidate(target_member.user_id)
     return jsonify({'success': True, 'user_id': user_id, 'role': new_role})
 
 # Web interface routes
 @app.route('/')
+@query_budget(0)
 def index():
     return redirect(url_for('web_locations'))
 
 @app.route('/web/locations', methods=['GET', 'POST'])
+@query_budget(5)
 def web_locations():
     import os
     if not current_user.is_authenticated:
@@ -1033,7 +2000,7 @@ def web_locations():
             error = "Location name cannot be blank."
         else:
             norm_name = name.strip().title()
-            fam_member = FamilyMember.query.filter_by(user_id=current_user.id).first()
+            fam_member = get_current_membership()
             if fam_member is None:
                 error = "No family found for current user."
             else:
@@ -1044,27 +2011,23 @@ def web_locations():
                     loc = Location(name=norm_name, family_id=fam_member.family_id)
                     db.session.add(loc)
                     db.session.commit()
-                    # DEBUG: print DB path and locations table after commit
-                    db_path = os.path.abspath(db.engine.url.database)
-                    print(f"FLASK DEBUG: DB path after add: {db_path}", flush=True)
-                    locations = Location.query.all()
-                    print(f"FLASK DEBUG: Locations in table after add: {[l.name for l in locations]}", flush=True)
         return redirect(url_for('web_locations', error=error) if error else url_for('web_locations'))
     error = request.args.get('error')
     locations = []
-    fam_member = FamilyMember.query.filter_by(user_id=current_user.id).first()
+    fam_member = get_current_membership()
     if fam_member:
         locations = Location.query.filter_by(family_id=fam_member.family_id).order_by(Location.name).all()
     # Attach number of items for each location
+    counts = get_item_counts('location', [loc.id for loc in locations])
     for loc in locations:
-        loc.num_items = Inventory.query.filter_by(location_id=loc.id).count()
+        loc.num_items = counts.get(loc.id, 0)
     return render_template('locations.html', locations=locations, error=error, confirmation=confirmation)
 
 @app.route('/web/locations/delete/<int:loc_id>', methods=['POST'])
 @login_required
 def web_delete_location(loc_id):
     loc = Location.query.get_or_404(loc_id)
-    if Inventory.query.filter_by(location_id=loc_id).count() > 0:
+    if get_item_counts('location', [loc_id]).get(loc_id, 0) > 0:
         error = f"Cannot delete '{loc.name}' because it still contains inventory. Remove all items first."
         return redirect(url_for('web_locations', error=error))
     db.session.delete(loc)
@@ -1073,6 +2036,7 @@ def web_delete_location(loc_id):
     return redirect(url_for('web_locations', confirmation=confirmation))
 
 @app.route('/web/master-items', methods=['GET', 'POST'])
+@query_budget(7)
 def web_master_items():
     if not current_user.is_authenticated:
         return redirect(url_for('auth_page'))
@@ -1085,7 +2049,7 @@ def web_master_items():
             error = "Item name cannot be blank."
         else:
             norm_name = name.strip().title()
-            fam_member = FamilyMember.query.filter_by(user_id=current_user.id).first()
+            fam_member = get_current_membership()
             if fam_member is None:
                 error = "No family found for current user."
             else:
@@ -1098,19 +2062,24 @@ def web_master_items():
                     db.session.commit()
         return redirect(url_for('web_master_items', error=error) if error else url_for('web_master_items'))
     error = request.args.get('error')
-    fam_member = FamilyMember.query.filter_by(user_id=current_user.id).first()
+    fam_member = get_current_membership()
     items = []
     if fam_member:
-        items = MasterItem.query.filter_by(family_id=fam_member.family_id).order_by(MasterItem.name).all()
-    aisles = Aisle.query.order_by(Aisle.name).all()
+        # The template shows each item's stores and whether it's on the shopping list
+        items = (MasterItem.query
+                 .options(selectinload(MasterItem.stores), selectinload(MasterItem.shopping_list_items))
+                 .filter_by(family_id=fam_member.family_id).order_by(MasterItem.name).all())
+    aisles = Aisle.query.filter_by(family_id=fam_member.family_id).order_by(Aisle.name).all() if fam_member else []
     return render_template('master_items.html', items=items, aisles=aisles, error=error)
 
 @app.route('/web/master-items/edit/<int:item_id>', methods=['GET', 'POST'])
 @login_required
+@query_budget(7)
 def web_edit_master_item(item_id):
-    item = MasterItem.query.get_or_404(item_id)
-    stores = Store.query.order_by(Store.name).all()
-    aisles = Aisle.query.order_by(Aisle.name).all()
+    family_id = get_current_family_id()
+    item = MasterItem.query.filter_by(id=item_id, family_id=family_id).first_or_404()
+    stores = Store.query.filter_by(family_id=family_id).order_by(Store.name).all()
+    aisles = Aisle.query.filter_by(family_id=family_id).order_by(Aisle.name).all()
     confirmation = None
     error = None
     if request.method == 'POST':
@@ -1125,7 +2094,7 @@ def web_edit_master_item(item_id):
         add_store_id = request.form.get('add_store_id')
         if add_store_id and not request.form.get('name'):
             # Only add store, don't touch name/aisle/notes
-            store = Store.query.get(int(add_store_id))
+            store = Store.query.filter_by(id=int(add_store_id), family_id=family_id).first()
             if store and store not in item.stores:
                 item.stores.append(store)
                 db.session.commit()
@@ -1157,7 +2126,7 @@ def web_edit_master_item(item_id):
 @app.route('/web/master-items/delete/<int:item_id>', methods=['POST'])
 @login_required
 def web_delete_master_item(item_id):
-    item = MasterItem.query.get_or_404(item_id)
+    item = MasterItem.query.filter_by(id=item_id, family_id=get_current_family_id()).first_or_404()
     item_name = item.name
     db.session.delete(item)
     db.session.commit()
@@ -1167,8 +2136,9 @@ def web_delete_master_item(item_id):
 @app.route('/web/master-items/remove-store/<int:item_id>/<int:store_id>', methods=['POST'])
 @login_required
 def web_remove_store_from_item(item_id, store_id):
-    item = MasterItem.query.get_or_404(item_id)
-    store = Store.query.get_or_404(store_id)
+    family_id = get_current_family_id()
+    item = MasterItem.query.filter_by(id=item_id, family_id=family_id).first_or_404()
+    store = Store.query.filter_by(id=store_id, family_id=family_id).first_or_404()
     item_name = item.name
     store_name = store.name
     if store in item.stores:
@@ -1203,7 +2173,7 @@ def web_create_and_add_inventory():
         norm_name = name.strip().title()
         
         # Get family ID
-        fam_member = FamilyMember.query.filter_by(user_id=current_user.id).first()
+        fam_member = get_current_membership()
         family_id = fam_member.family_id if fam_member else None
         
         if not family_id:
@@ -1212,38 +2182,10 @@ def web_create_and_add_inventory():
             # Check if item already exists
             existing_item = MasterItem.query.filter_by(name=norm_name, family_id=family_id).first()
             
-            if existing_item:
-                # Item exists, just add it to inventory
-                try:
-                    # Check if item is already in this location
-                    existing_inv = Inventory.query.filter_by(
-                        master_item_id=existing_item.id,
-                        location_id=location_id,
-                        family_id=family_id
-                    ).first()
-                    
-                    if existing_inv:
-                        # Update quantity
-                        existing_inv.quantity += 1
-                        db.session.commit()
-                        confirmation = f"Updated quantity of '{norm_name}' to {existing_inv.quantity}."
-                    else:
-                        # Add to inventory with quantity 1
-                        new_inv = Inventory(
-                            master_item_id=existing_item.id,
-                            location_id=location_id,
-                            quantity=1,
-                            family_id=family_id
-                        )
-                        db.session.add(new_inv)
-                        db.session.commit()
-                        confirmation = f"Added '{norm_name}' to inventory."
-                except IntegrityError:
-                    db.session.rollback()
-                    error = f"Error adding '{norm_name}' to inventory."
-            else:
-                # Create new master item and add to inventory
-                try:
+            try:
+                if existing_item:
+                    item_id = existing_item.id
+                else:
                     # Create master item
                     new_item = MasterItem(
                         name=norm_name,
@@ -1251,29 +2193,34 @@ def web_create_and_add_inventory():
                     )
                     db.session.add(new_item)
                     db.session.flush()  # To get the new item ID
-                    
-                    # Add to inventory with quantity 1
-                    new_inv = Inventory(
-                        master_item_id=new_item.id,
-                        location_id=location_id,
-                        quantity=1,
-                        family_id=family_id
-                    )
-                    db.session.add(new_inv)
-                    db.session.commit()
-                    confirmation = f"Created and added '{norm_name}' to inventory."
-                except IntegrityError:
+                    item_id = new_item.id
+                
+                # Add one to inventory, creating the row if needed
+                row = upsert_inventory(family_id, int(location_id), item_id, 1, mode='add')
+                if row is None:
                     db.session.rollback()
-                    error = f"Error creating or adding '{norm_name}'."
+                    error = "Location not found."
+                else:
+                    db.session.commit()
+                    if not existing_item:
+                        confirmation = f"Created and added '{norm_name}' to inventory."
+                    elif row.quantity == 1:
+                        confirmation = f"Added '{norm_name}' to inventory."
+                    else:
+                        confirmation = f"Updated quantity of '{norm_name}' to {row.quantity}."
+            except (IntegrityError, ValueError):
+                db.session.rollback()
+                error = f"Error creating or adding '{norm_name}'."
     
     # Redirect back to inventory page
     return redirect(url_for('web_inventory', location_id=location_id, confirmation=confirmation, error=error, sort_col=sort_col, sort_dir=sort_dir))
 
 @app.route('/web/inventory', methods=['GET', 'POST'])
+@query_budget(5)
 def web_inventory():
     if not current_user.is_authenticated:
         return redirect(url_for('auth_page'))
-    fam_member = FamilyMember.query.filter_by(user_id=current_user.id).first()
+    fam_member = get_current_membership()
     family_id = fam_member.family_id if fam_member else None
     locations = Location.query.filter_by(family_id=family_id).order_by(Location.name).all() if family_id else []
     location_id = request.args.get('location_id', type=int) or request.form.get('location_id', type=int)
@@ -1288,15 +2235,13 @@ def web_inventory():
         if not (location_id and master_item_id and quantity is not None):
             error = 'Please select an item and specify a quantity.'
         else:
-            inv = Inventory.query.filter_by(location_id=location_id, master_item_id=master_item_id, family_id=family_id).first()
-            if inv:
-                inv.quantity = quantity
-                inv.last_updated = datetime.utcnow()
-                confirmation = f"Updated {inv.master_item.name} in inventory."
-            else:
-                new_inv = Inventory(location_id=location_id, master_item_id=master_item_id, quantity=quantity, last_updated=datetime.utcnow(), family_id=family_id)
-                db.session.add(new_inv)
+            row = upsert_inventory(family_id, location_id, master_item_id, quantity, mode='set')
+            if row is None:
+                error = 'Item or location not found.'
+            elif row.inserted:
                 confirmation = "Item added to inventory."
+            else:
+                confirmation = f"Updated {row.item_name} in inventory."
             db.session.commit()
         # Redirect to avoid form re-submission
         return redirect(url_for('web_inventory', location_id=location_id, confirmation=confirmation, error=error, sort_col=sort_col, sort_dir=sort_dir))
@@ -1306,7 +2251,10 @@ def web_inventory():
     items = []
     if location_id:
         selected_location = Location.query.filter_by(id=location_id, family_id=family_id).first()
-        inventory_query = Inventory.query.filter_by(location_id=location_id, family_id=family_id)
+        # The template renders inv.master_item for every row; load it with the join
+        inventory_query = (Inventory.query.join(MasterItem)
+                           .options(contains_eager(Inventory.master_item))
+                           .filter(Inventory.location_id == location_id, Inventory.family_id == family_id))
         # Sorting logic
         if sort_col == '1':  # quantity
             if sort_dir == 'desc':
@@ -1320,9 +2268,9 @@ def web_inventory():
                 inventory_query = inventory_query.order_by(Inventory.last_updated)
         else:  # item name (default)
             if sort_dir == 'desc':
-                inventory_query = inventory_query.join(MasterItem).order_by(MasterItem.name.desc())
+                inventory_query = inventory_query.order_by(MasterItem.name.desc())
             else:
-                inventory_query = inventory_query.join(MasterItem).order_by(MasterItem.name)
+                inventory_query = inventory_query.order_by(MasterItem.name)
         inventory = inventory_query.all()
         inventory_item_ids = {inv.master_item_id for inv in inventory}
         items = MasterItem.query.filter(~MasterItem.id.in_(inventory_item_ids), MasterItem.family_id==family_id).order_by(MasterItem.name).all()
@@ -1362,19 +2310,20 @@ def web_delete_inventory(inv_id):
 @app.route('/web/shopping-list/remove/<int:item_id>', methods=['POST'])
 @login_required
 def web_remove_from_shopping_list(item_id):
-    sli = ShoppingListItem.query.filter_by(item_id=item_id).first()
+    sli = ShoppingListItem.query.filter_by(item_id=item_id, family_id=get_current_family_id()).first()
     if sli:
         db.session.delete(sli)
         db.session.commit()
     return ('', 204)
 
 @app.route('/web/stores', methods=['GET', 'POST'])
+@query_budget(5)
 def web_stores():
     if not current_user.is_authenticated:
         return redirect(url_for('auth_page'))
     error = None
     confirmation = None
-    fam_member = FamilyMember.query.filter_by(user_id=current_user.id).first()
+    fam_member = get_current_membership()
     if not fam_member:
         error = "No family membership found."
         return render_template('stores.html', stores=[], error=error, confirmation=confirmation)
@@ -1396,15 +2345,16 @@ def web_stores():
     error = request.args.get('error')
     confirmation = request.args.get('confirmation')
     stores = Store.query.filter_by(family_id=fam_member.family_id).order_by(Store.name).all()
+    counts = get_item_counts('store', [store.id for store in stores])
     for store in stores:
-        store.num_items = len(store.items)
+        store.num_items = counts.get(store.id, 0)
     return render_template('stores.html', stores=stores, error=error, confirmation=confirmation)
 
 @app.route('/web/stores/delete/<int:store_id>', methods=['POST'])
 @login_required
 def web_delete_store(store_id):
     store = Store.query.get_or_404(store_id)
-    if len(store.items) > 0:
+    if get_item_counts('store', [store_id]).get(store_id, 0) > 0:
         error = f"Cannot delete '{store.name}' because it is still associated with items. Remove all associations first."
         return redirect(url_for('web_stores', error=error))
     db.session.delete(store)
@@ -1413,11 +2363,12 @@ def web_delete_store(store_id):
     return redirect(url_for('web_stores', confirmation=confirmation))
 
 @app.route('/web/aisles', methods=['GET', 'POST'])
+@query_budget(5)
 def web_aisles():
     if not current_user.is_authenticated:
         return redirect(url_for('auth_page'))
     error = None
-    fam_member = FamilyMember.query.filter_by(user_id=current_user.id).first()
+    fam_member = get_current_membership()
     family_id = fam_member.family_id if fam_member else None
     if request.method == 'POST':
         name = request.form.get('name')
@@ -1435,42 +2386,71 @@ def web_aisles():
         elif delete_id:
             aisle = Aisle.query.filter_by(id=delete_id, family_id=family_id).first()
             if aisle:
-                if aisle.items:
+                if get_item_counts('aisle', [aisle.id]).get(aisle.id, 0) > 0:
                     error = f'Cannot delete aisle "{aisle.name}" because it is in use.'
                 else:
                     db.session.delete(aisle)
                     db.session.commit()
     aisles = Aisle.query.filter_by(family_id=family_id).order_by(Aisle.name).all() if family_id else []
+    counts = get_item_counts('aisle', [aisle.id for aisle in aisles])
+    for aisle in aisles:
+        aisle.num_items = counts.get(aisle.id, 0)
     return render_template('aisles.html', aisles=aisles, error=error)
 
+def shopping_list_rows(family_id, store_id=None):
+    """
+    Build a family's shopping list view in one statement.
+
+    Each row carries the list entry (id, item_id, checked), the item and aisle
+    names, the item's total quantity across all locations and a comma
+    separated list of its store names. store_id limits the list to items
+    stocked at that store.
+    """
+    total_quantity = db.select(
+        db.func.coalesce(db.func.sum(Inventory.quantity), 0)
+    ).where(Inventory.master_item_id == ShoppingListItem.item_id).scalar_subquery()
+    query = db.session.query(
+        ShoppingListItem.id,
+        ShoppingListItem.item_id,
+        ShoppingListItem.checked,
+        MasterItem.name.label('item_name'),
+        Aisle.name.label('aisle_name'),
+        total_quantity.label('total_quantity'),
+        db.func.group_concat(Store.name, ', ').label('store_names')
+    ).join(
+        MasterItem, MasterItem.id == ShoppingListItem.item_id
+    ).outerjoin(
+        Aisle, Aisle.id == MasterItem.aisle_id
+    ).outerjoin(
+        item_stores, item_stores.c.item_id == ShoppingListItem.item_id
+    ).outerjoin(
+        Store, Store.id == item_stores.c.store_id
+    ).filter(
+        ShoppingListItem.family_id == family_id
+    )
+    if store_id:
+        store_link = item_stores.alias('store_link')
+        query = query.filter(db.exists().where(
+            store_link.c.item_id == ShoppingListItem.item_id,
+            store_link.c.store_id == store_id
+        ))
+    return query.group_by(ShoppingListItem.id).order_by(ShoppingListItem.created_at).all()
+
 @app.route('/web/shopping-list', methods=['GET'])
+@query_budget(5)
 def web_shopping_list():
     if not current_user.is_authenticated:
         return redirect(url_for('auth_page'))
+    family_id = get_current_family_id()
     store_id = request.args.get('store_id', type=int)
-    stores = Store.query.order_by(Store.name).all()
-    all_sli = ShoppingListItem.query.order_by(ShoppingListItem.created_at).all()
-    filtered_sli = []
-    for sli in all_sli:
-        item_stores = sli.item.stores  # many-to-many relationship
-        if store_id:
-            if any(s.id == store_id for s in item_stores):
-                filtered_sli.append(sli)
-        else:
-            filtered_sli.append(sli)
-    # Compute total inventory for each item
-    inventory_totals = {}
-    item_store_names = {}
-    for sli in filtered_sli:
-        total = db.session.query(db.func.sum(Inventory.quantity)).filter(Inventory.master_item_id == sli.item_id).scalar() or 0
-        inventory_totals[sli.id] = total
-        item_store_names[sli.id] = ', '.join([s.name for s in sli.item.stores]) if sli.item.stores else '—'
-    return render_template('shopping_list.html', shopping_list=filtered_sli, stores=stores, inventory_totals=inventory_totals, item_store_names=item_store_names)
+    stores = Store.query.filter_by(family_id=family_id).order_by(Store.name).all()
+    shopping_list = shopping_list_rows(family_id, store_id)
+    return render_template('shopping_list.html', shopping_list=shopping_list, stores=stores)
 
 @app.route('/web/shopping-list/toggle/<int:sli_id>', methods=['POST'])
 @login_required
 def web_toggle_shopping_list(sli_id):
-    sli = ShoppingListItem.query.get_or_404(sli_id)
+    sli = ShoppingListItem.query.filter_by(id=sli_id, family_id=get_current_family_id()).first_or_404()
     checked = request.form.get('checked') == '1'
     sli.checked = checked
     db.session.commit()
@@ -1480,9 +2460,11 @@ def web_toggle_shopping_list(sli_id):
 @login_required
 def web_add_to_shopping_list(item_id):
     # Only add if not already present (no store-specific for now)
-    existing = ShoppingListItem.query.filter_by(item_id=item_id).first()
+    family_id = get_current_family_id()
+    MasterItem.query.filter_by(id=item_id, family_id=family_id).first_or_404()
+    existing = ShoppingListItem.query.filter_by(item_id=item_id, family_id=family_id).first()
     if not existing:
-        sli = ShoppingListItem(item_id=item_id, checked=False)
+        sli = ShoppingListItem(item_id=item_id, checked=False, family_id=family_id)
         db.session.add(sli)
         db.session.commit()
     return redirect(request.referrer or url_for('web_shopping_list'))
@@ -1490,47 +2472,47 @@ def web_add_to_shopping_list(item_id):
 @app.route('/web/shopping-list/delete/<int:sli_id>', methods=['POST'])
 @login_required
 def web_delete_shopping_list_item(sli_id):
-    sli = ShoppingListItem.query.get_or_404(sli_id)
+    sli = ShoppingListItem.query.filter_by(id=sli_id, family_id=get_current_family_id()).first_or_404()
     db.session.delete(sli)
     db.session.commit()
     return redirect(request.referrer or url_for('web_shopping_list'))
 
 @app.route('/auth')
+@query_budget(3)
 def auth_page():
     reset_success = request.args.get('reset_success')
     return render_template('auth.html', reset_success=reset_success)
 
 @app.route('/family')
 @login_required
+@query_budget(6)
 def family_dashboard():
-    fam_member = FamilyMember.query.filter_by(user_id=current_user.id).first()
+    fam_member = get_current_membership()
     if fam_member:
-        family = Family.query.get(fam_member.family_id)
-        members = FamilyMember.query.filter_by(family_id=family.id).all()
-        for m in members:
-            m.user = User.query.get(m.user_id)
+        family = fam_member.family
+        members = FamilyMember.query.options(joinedload(FamilyMember.user)).filter_by(family_id=family.id).all()
         current_user_role = fam_member.role
         admin_count = FamilyMember.query.filter_by(family_id=family.id, role='admin').count()
         return render_template('family.html', family=family, members=members, current_user_role=current_user_role, admin_count=admin_count)
     return render_template('family.html', family=None, members=None, current_user_role=None, admin_count=0)
 
 @app.route('/logout', methods=['GET'])
+@query_budget(3)
 def logout_redirect():
     # Convenience: GET /logout redirects to /auth after POST logout
     return render_template('auth.html')
 
 @app.route('/user/profile')
 @login_required
+@query_budget(4)
 def user_profile():
-    fam_member = FamilyMember.query.filter_by(user_id=current_user.id).first()
+    fam_member = get_current_membership()
     family = fam_member.family if fam_member else None
     return render_template('user_profile.html', user=current_user, family=family)
 
 # --- TEST-ONLY ENDPOINT: Setup User & Family for UI tests ---
 @app.route('/test/setup-user', methods=['POST'])
 def test_setup_user():
-    print('TEST_SETUP_USER: TESTING =', app.config.get('TESTING'), 'ENV =', dict(os.environ))
-    import sys
     try:
         if not app.config.get('TESTING'):
             return '', 404
@@ -1542,6 +2524,7 @@ def test_setup_user():
         # Remove existing user and related family/family_member if present
         existing_user = User.query.filter_by(email=email).first()
         if existing_user:
+            principal_cache.invalidate(existing_user.id)
             # Remove family memberships
             FamilyMember.query.filter_by(user_id=existing_user.id).delete()
             # Remove families created by this user
@@ -1567,9 +2550,7 @@ def test_setup_user():
         login_user(user)
         return jsonify({'user_id': user.id, 'family_id': family.id})
     except Exception as e:
-        print('[ERROR] Exception in /test/setup-user:', e, file=sys.stderr)
-        import traceback
-        traceback.print_exc(file=sys.stderr)
+        logger.exception('Could not set up test user')
         return jsonify({'error': str(e)}), 500
 
 @app.route('/test/debug-locations', methods=['GET'])
@@ -1586,25 +2567,22 @@ def test_debug_locations():
 # API Routes
 @app.route('/api/shopping-list/count')
 @login_required
+@family_etag
+@query_budget(3)
 def api_get_shopping_list_count():
     """Get the count of items in the shopping list."""
     try:
-        if not hasattr(current_user, 'family_id') or not current_user.family_id:
-            app.logger.info('User does not have a family assigned')
+        family_id = get_current_family_id()
+        if not family_id:
+            logger.debug('User does not have a family assigned')
             return jsonify({'count': 0})
             
-        app.logger.info(f'Getting shopping list count for family_id: {current_user.family_id}')
-        count = db.session.query(ShoppingListItem).join(
-            MasterItem,
-            ShoppingListItem.item_id == MasterItem.id
-        ).filter(
-            MasterItem.family_id == current_user.family_id,
-            ShoppingListItem.checked == False
-        ).count()
-        app.logger.info(f'Found {count} items in shopping list')
+        count = ShoppingListItem.query.filter_by(family_id=family_id, checked=False).count()
+        # Polled by every page, so only a sample is logged even at DEBUG
+        logger.debug('Shopping list count %d for family %d', count, family_id, extra={'sample_rate': 0.01})
         return jsonify({'count': count})
     except Exception as e:
-        app.logger.error(f'Error getting shopping list count: {str(e)}')
+        logger.exception('Error getting shopping list count')
         return jsonify({'error': str(e)}), 500
 
 # The locations endpoint is already implemented elsewhere in the application
@@ -1619,21 +2597,7 @@ def test_new_navigation():
 @login_required
 def debug_locations():
     family_id = get_current_family_id()
-    locs = Location.query.filter_by(family_id=family_id).order_by(Location.name).all()
-    
-    # Get the locations with schema
-    result = locations_schema.dump(locs)
-    
-    # Add item count for each location
-    for loc_data in result:
-        # Get item count for this location
-        item_count = db.session.query(db.func.count(Inventory.id)).filter(
-            Inventory.location_id == loc_data['id'],
-            Inventory.family_id == family_id
-        ).scalar() or 0
-        
-        # Add item count to the location data
-        loc_data['item_count'] = item_count
+    result = dump_locations_with_counts(family_id)
     
     # Return as HTML for easy debugging
     html = '<h1>Locations Debug</h1>'
@@ -1642,6 +2606,10 @@ def debug_locations():
 
 if __name__ == '__main__':
     import sys
+    # The development server brings the schema up to date itself; other
+    # deployments run 'flask init-db' once, so importing the app does no schema work.
+    with app.app_context():
+        bootstrap_schema(db.engine)
     port = int(os.environ.get('PORT', 5000))
     if '--port' in sys.argv:
         idx = sys.argv.index('--port')
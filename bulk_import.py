@@ -0,0 +1,195 @@
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy import select, insert, update, bindparam
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+IMPORT_CHUNK_SIZE = 5000
+NAME_MAX_LENGTH = 80
+
+# Accepted header spellings for each import column
+COLUMN_ALIASES = {
+    'name': ('name', 'item', 'item_name'),
+    'location': ('location', 'location_name'),
+    'quantity': ('quantity', 'qty'),
+    'aisle': ('aisle', 'aisle_name'),
+    'store': ('store', 'stores', 'store_name'),
+}
+
+
+def normalize_name(value):
+    """Same normalization the web forms apply to names."""
+    return value.strip().title() if value else ''
+
+
+def _pick(record, column):
+    for alias in COLUMN_ALIASES[column]:
+        value = record.get(alias)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def parse_import(data, fmt):
+    """
+    Parse CSV text or a JSON array of objects into normalized import rows.
+
+    Returns (rows, errors). Each row is a dict with line, name, location,
+    quantity, aisle and stores (a list; several stores may be separated by
+    ';'). Each error is {'line': n, 'error': message}; line is the CSV line
+    number or the 1-based position in the JSON array.
+    """
+    if fmt == 'json':
+        records = json.loads(data)
+        if not isinstance(records, list):
+            raise ValueError('JSON import must be an array of objects')
+        numbered = [(n, record) for n, record in enumerate(records, start=1)]
+    else:
+        reader = csv.DictReader(io.StringIO(data))
+        if reader.fieldnames:
+            reader.fieldnames = [field.strip().lower() for field in reader.fieldnames]
+        numbered = [(reader.line_num, record) for record in reader]
+    rows, errors = [], []
+    for line, record in numbered:
+        if not isinstance(record, dict):
+            errors.append({'line': line, 'error': 'Row must be an object'})
+            continue
+        record = {str(key).strip().lower(): value for key, value in record.items() if key is not None}
+        name = normalize_name(str(_pick(record, 'name') or ''))
+        location = normalize_name(str(_pick(record, 'location') or ''))
+        aisle = normalize_name(str(_pick(record, 'aisle') or '')) or None
+        stores = [normalize_name(s) for s in str(_pick(record, 'store') or '').split(';') if s.strip()]
+        quantity = _pick(record, 'quantity')
+        if not name:
+            errors.append({'line': line, 'error': 'Item name is required'})
+            continue
+        if not location:
+            errors.append({'line': line, 'error': 'Location is required'})
+            continue
+        too_long = [value for value in [name, location, aisle] + stores if value and len(value) > NAME_MAX_LENGTH]
+        if too_long:
+            errors.append({'line': line, 'error': f'Name longer than {NAME_MAX_LENGTH} characters: {too_long[0][:20]}...'})
+            continue
+        try:
+            quantity = 1.0 if quantity is None else float(quantity)
+            if quantity < 0 or quantity != quantity:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors.append({'line': line, 'error': f'Invalid quantity: {quantity}'})
+            continue
+        rows.append({'line': line, 'name': name, 'location': location, 'quantity': quantity,
+                     'aisle': aisle, 'stores': stores})
+    return rows, errors
+
+
+class BulkImporter:
+    """
+    Write parsed import rows for one family in chunked transactions.
+
+    Locations, aisles, stores and master items are resolved by name with one
+    SELECT per chunk and the missing ones created with executemany INSERTs;
+    inventory rows are written with a single executemany upsert per chunk.
+    tables is db.metadata.tables. before_commit(connection) runs inside each
+    chunk's transaction, for bookkeeping such as version bumps.
+    """
+
+    def __init__(self, engine, tables, family_id, mode='set', chunk_size=IMPORT_CHUNK_SIZE, before_commit=None):
+        if mode not in ('set', 'add'):
+            raise ValueError(f"Unknown import mode '{mode}'")
+        self.engine = engine
+        self.tables = tables
+        self.family_id = family_id
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.before_commit = before_commit
+        self.ids = {'location': {}, 'aisle': {}, 'store': {}, 'master_item': {}}
+        self.created = {'location': 0, 'aisle': 0, 'store': 0, 'master_item': 0}
+        self.imported = 0
+        self.errors = []
+
+    def run(self, rows):
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = rows[start:start + self.chunk_size]
+            created, imported, errors = dict(self.created), self.imported, len(self.errors)
+            try:
+                with self.engine.begin() as connection:
+                    self._import_chunk(connection, chunk)
+                    if self.before_commit is not None:
+                        self.before_commit(connection)
+            except SQLAlchemyError as e:
+                # The chunk rolled back: forget ids it created and report its rows
+                self.ids = {kind: {} for kind in self.ids}
+                self.created, self.imported = created, imported
+                del self.errors[errors:]
+                reason = str(getattr(e, 'orig', e))
+                self.errors.extend({'line': row['line'], 'error': f'Not imported: {reason}'} for row in chunk)
+        return self
+
+    def summary(self):
+        return {'imported': self.imported, 'created': dict(self.created), 'errors': self.errors}
+
+    def _resolve(self, connection, kind, names, extra=None):
+        """Map names to ids for this family, creating the ones that don't exist yet."""
+        known = self.ids[kind]
+        wanted = sorted(set(names) - set(known))
+        if not wanted:
+            return known
+        table = self.tables[kind]
+        query = select(table.c.name, table.c.id).where(table.c.family_id == self.family_id)
+        for offset in range(0, len(wanted), 500):
+            known.update(connection.execute(query.where(table.c.name.in_(wanted[offset:offset + 500]))).all())
+        missing = [name for name in wanted if name not in known]
+        if missing:
+            values = [dict(name=name, family_id=self.family_id, **(extra(name) if extra else {})) for name in missing]
+            connection.execute(insert(table), values)
+            for offset in range(0, len(missing), 500):
+                found = connection.execute(query.where(table.c.name.in_(missing[offset:offset + 500]))).all()
+                self.created[kind] += len(found)
+                known.update(found)
+        return known
+
+    def _import_chunk(self, connection, chunk):
+        locations = self._resolve(connection, 'location', [row['location'] for row in chunk])
+        aisles = self._resolve(connection, 'aisle', [row['aisle'] for row in chunk if row['aisle']])
+        stores = self._resolve(connection, 'store', [store for row in chunk for store in row['stores']])
+        first_aisle = {}
+        for row in chunk:
+            if row['aisle']:
+                first_aisle.setdefault(row['name'], aisles[row['aisle']])
+        items = self._resolve(connection, 'master_item', [row['name'] for row in chunk],
+                              extra=lambda name: {'aisle_id': first_aisle.get(name)})
+
+        links, inventory = set(), []
+        now = datetime.utcnow()
+        for row in chunk:
+            item_id = items[row['name']]
+            links.update((item_id, stores[store]) for store in row['stores'])
+            inventory.append({'location_id': locations[row['location']], 'master_item_id': item_id,
+                              'family_id': self.family_id, 'quantity': row['quantity'], 'last_updated': now})
+
+        master_item = self.tables['master_item']
+        aisle_updates = [{'b_item_id': items[name], 'b_aisle_id': aisle_id} for name, aisle_id in first_aisle.items()]
+        if aisle_updates:
+            # Existing items take the imported aisle; unchanged ones aren't rewritten
+            connection.execute(
+                update(master_item).where(
+                    master_item.c.id == bindparam('b_item_id'),
+                    master_item.c.aisle_id.is_distinct_from(bindparam('b_aisle_id')),
+                ).values(aisle_id=bindparam('b_aisle_id')),
+                aisle_updates,
+            )
+        if links:
+            connection.execute(insert(self.tables['item_stores']).prefix_with('OR IGNORE'),
+                               [{'item_id': item_id, 'store_id': store_id} for item_id, store_id in sorted(links)])
+        if inventory:
+            table = self.tables['inventory']
+            stmt = sqlite_insert(table)
+            quantity = table.c.quantity + stmt.excluded.quantity if self.mode == 'add' else stmt.excluded.quantity
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['location_id', 'master_item_id', 'family_id'],
+                set_={'quantity': quantity, 'last_updated': stmt.excluded.last_updated},
+            )
+            connection.execute(stmt, inventory)
+            self.imported += len(inventory)
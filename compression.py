@@ -0,0 +1,143 @@
+import gzip
+import mimetypes
+import os
+from flask import request, send_from_directory
+from werkzeug.exceptions import NotFound
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+COMPRESS_DEFAULTS = {
+    'COMPRESS_ENABLED': True,
+    'COMPRESS_MIN_SIZE': 500,       # bytes; smaller bodies aren't worth a round of deflate
+    'COMPRESS_LEVEL': 6,            # gzip 1-9
+    'COMPRESS_BR_LEVEL': 5,         # brotli 0-11; above ~6 costs too much CPU per request
+    'COMPRESS_MIMETYPES': (
+        'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+        'application/javascript', 'application/json', 'application/x-ndjson', 'image/svg+xml',
+    ),
+}
+
+# Static file suffixes tried, best first, when the client accepts the encoding
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def choose_encoding(accept_encodings):
+    """The best encoding the client accepts: 'br' (if available), 'gzip' or None."""
+    if HAS_BROTLI and accept_encodings['br'] > 0:
+        return 'br'
+    if accept_encodings['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def compress_body(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BR_LEVEL'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+
+
+def _should_compress(response, config):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    return response.content_length is None or response.content_length >= config['COMPRESS_MIN_SIZE']
+
+
+def compress_response(response, config):
+    """Compress a buffered response in place when the client, type and size allow it."""
+    if not config['COMPRESS_ENABLED'] or response.mimetype not in config['COMPRESS_MIMETYPES']:
+        return response
+    response.vary.add('Accept-Encoding')
+    if not _should_compress(response, config):
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < config['COMPRESS_MIN_SIZE']:
+        return response
+    compressed = compress_body(data, encoding, config)
+    if len(compressed) >= len(data):
+        return response
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # Same representation, different bytes
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def send_precompressed_static(app, filename):
+    """Serve static/<filename>.br or .gz when the client accepts it, else the file itself."""
+    static_folder = app.static_folder
+    accepted = request.accept_encodings
+    for encoding, suffix in PRECOMPRESSED:
+        if accepted[encoding] <= 0:
+            continue
+        try:
+            response = send_from_directory(static_folder, filename + suffix, max_age=app.get_send_file_max_age(filename))
+        except NotFound:
+            continue
+        response.headers['Content-Encoding'] = encoding
+        response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response.vary.add('Accept-Encoding')
+        return response
+    response = app.send_static_file(filename)
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def precompress_static(static_folder, config):
+    """Write .gz (and .br when available) next to each compressible static file; returns the paths written."""
+    written = []
+    # Static files are compressed once, so use the slowest, smallest settings
+    level_config = dict(config, COMPRESS_LEVEL=9, COMPRESS_BR_LEVEL=11)
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if name.endswith(('.gz', '.br')):
+                continue
+            mimetype = mimetypes.guess_type(name)[0]
+            if mimetype not in config['COMPRESS_MIMETYPES']:
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) < config['COMPRESS_MIN_SIZE']:
+                continue
+            for encoding, suffix in PRECOMPRESSED:
+                if encoding == 'br' and not HAS_BROTLI:
+                    continue
+                with open(path + suffix, 'wb') as f:
+                    f.write(compress_body(data, encoding, level_config))
+                written.append(path + suffix)
+    return written
+
+
+def init_compression(app):
+    """Compress responses in an after_request hook and serve precompressed static files."""
+    for key, value in COMPRESS_DEFAULTS.items():
+        app.config.setdefault(key, value)
+
+    @app.after_request
+    def _compress(response):
+        return compress_response(response, app.config)
+
+    if 'static' in app.view_functions:
+        app.view_functions['static'] = lambda filename: send_precompressed_static(app, filename)
+
+    @app.cli.command('compress-static')
+    def compress_static_command():
+        """Write .gz/.br copies of static assets for the static route to serve."""
+        if not app.static_folder or not os.path.isdir(app.static_folder):
+            print('No static folder to compress.')
+            return
+        written = precompress_static(app.static_folder, app.config)
+        print(f"Wrote {len(written)} precompressed file(s)" + (' (brotli not installed; gzip only)' if not HAS_BROTLI else ''))
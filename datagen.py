@@ -0,0 +1,181 @@
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, func
+
+# Starter data for a new family; also the vocabulary synthetic tenants draw from
+SEED_LOCATIONS = ['Pantry', 'Refrigerator', 'Freezer']
+SEED_AISLES = ['Bakery', 'Canned Goods', 'Dairy', 'Meat', 'Produce', 'Spices']
+GROCERY_ITEMS = [
+    'Milk', 'Eggs', 'Butter', 'Cheddar Cheese', 'Yogurt', 'Orange Juice', 'Apples', 'Bananas', 'Grapes', 'Strawberries',
+    'Chicken Breast', 'Ground Beef', 'Pork Chops', 'Bacon', 'Ham', 'Salmon', 'Tilapia', 'Shrimp', 'Broccoli', 'Carrots',
+    'Potatoes', 'Onions', 'Tomatoes', 'Lettuce', 'Spinach', 'Cucumber', 'Bell Peppers', 'Mushrooms', 'Zucchini', 'Corn',
+    'Rice', 'Pasta', 'Bread', 'Tortillas', 'Cereal', 'Oatmeal', 'Peanut Butter', 'Jelly', 'Canned Beans', 'Canned Corn',
+    'Soup', 'Crackers', 'Chips', 'Cookies', 'Ice Cream', 'Frozen Pizza', 'Frozen Vegetables', 'Ketchup', 'Mustard', 'Mayonnaise'
+]
+
+EXTRA_LOCATIONS = ['Garage', 'Basement', 'Linen Closet', 'Laundry Room', 'Bathroom', 'Chest Freezer', 'Wine Rack', 'Shed']
+EXTRA_AISLES = ['Beverages', 'Frozen', 'Snacks', 'Cleaning', 'Household', 'Baby', 'Pet', 'Pharmacy', 'International']
+STORE_NAMES = ['Walmart', 'Costco', 'No Frills', 'Loblaws', 'Metro', 'Sobeys', 'Farm Stand', 'Corner Shop', 'Bulk Barn']
+ITEM_VARIANTS = ['', 'Organic', 'Low Fat', 'Family Size', 'Store Brand', 'Frozen', 'Spicy', 'Whole Grain', 'Unsalted']
+UNITS = [None, None, 'each', 'kg', 'g', 'l', 'ml', 'pack', 'can', 'box']
+
+# Timestamps are spread over the year before this date so output doesn't depend on the clock
+DATA_EPOCH = datetime(2024, 1, 1)
+
+TENANT_DEFAULTS = {
+    'skew': 1.1,                # Zipf exponent; 0 makes every family the largest size
+    'max_users': 6,
+    'max_locations': 12,
+    'max_aisles': 15,
+    'max_stores': 8,
+    'max_items': 2000,
+    'min_items': 5,
+    'locations_per_item': 2,    # each item is stocked in 1..n locations
+    'stores_per_item': 2,       # and linked to 0..n stores
+    'shopping_fraction': 0.1,   # share of items on the shopping list
+}
+
+
+def _numbered(names, count, fallback):
+    """The first count names, continuing with 'fallback N' once the list runs out."""
+    return list(names[:count]) + [f'{fallback} {n}' for n in range(len(names) + 1, count + 1)]
+
+
+class TenantGenerator:
+    """
+    Bulk-write deterministic synthetic families for benchmarking.
+
+    Family sizes follow a Zipf distribution over randomly ordered ranks, so a
+    handful of tenants get close to the max_* sizes and most stay small.
+    Everything but the row ids is derived from seed: ids continue from the
+    current maximum of each table and are assigned up front, so each table
+    takes one executemany INSERT with no read-back. Emails include the
+    family id, so repeated runs don't collide.
+
+    tables is db.metadata.tables; password_hash is stored for every user.
+    """
+
+    def __init__(self, tables, seed=0, password_hash=None, **options):
+        unknown = set(options) - set(TENANT_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown generator option(s): {', '.join(sorted(unknown))}")
+        self.tables = tables
+        self.seed = seed
+        self.password_hash = password_hash
+        self.options = dict(TENANT_DEFAULTS, **options)
+        self.rng = random.Random(seed)
+
+    def sizes(self, families):
+        """Per-family row counts; the big families land at random positions in the run."""
+        o = self.options
+        ranks = list(range(1, families + 1))
+        self.rng.shuffle(ranks)
+        sizes = []
+        for rank in ranks:
+            scale = rank ** -o['skew']
+            sizes.append({
+                'users': max(1, round(o['max_users'] * scale)),
+                'locations': max(1, round(o['max_locations'] * scale)),
+                'aisles': max(1, round(o['max_aisles'] * scale)),
+                'stores': max(1, round(o['max_stores'] * scale)),
+                'master_items': max(o['min_items'], round(o['max_items'] * scale)),
+            })
+        return sizes
+
+    def _next_ids(self, connection):
+        return {
+            name: connection.execute(select(func.coalesce(func.max(self.tables[name].c.id), 0))).scalar() + 1
+            for name in ('user', 'family', 'family_member', 'location', 'aisle', 'store', 'master_item',
+                         'inventory', 'shopping_list_item')
+        }
+
+    def _when(self):
+        return DATA_EPOCH - timedelta(seconds=self.rng.randrange(365 * 24 * 3600))
+
+    def run(self, connection, families):
+        """Generate families on connection (inside the caller's transaction); returns a summary."""
+        o, rng = self.options, self.rng
+        next_id = self._next_ids(connection)
+        rows = {name: [] for name in next_id}
+        rows['item_stores'] = []
+        item_names = [f'{variant} {item}'.strip() for item in GROCERY_ITEMS for variant in ITEM_VARIANTS]
+
+        def add(table, **values):
+            values['id'] = next_id[table]
+            next_id[table] += 1
+            rows[table].append(values)
+            return values['id']
+
+        summary = []
+        for size in self.sizes(families):
+            family_id = next_id['family']
+            first_inventory = len(rows['inventory'])
+            user_ids = [
+                add('user', email=f'user{n}.family{family_id}@example.test', password_hash=self.password_hash,
+                    created_at=self._when(), is_active=True, is_verified=True)
+                for n in range(1, size['users'] + 1)
+            ]
+            add('family', name=f'Family {family_id}', created_by_user_id=user_ids[0], created_at=self._when())
+            for n, user_id in enumerate(user_ids):
+                add('family_member', user_id=user_id, family_id=family_id, role='admin' if n == 0 else 'member',
+                    joined_at=self._when())
+            locations = [add('location', name=name, family_id=family_id)
+                         for name in _numbered(SEED_LOCATIONS + EXTRA_LOCATIONS, size['locations'], 'Shelf')]
+            aisles = [add('aisle', name=name, family_id=family_id)
+                      for name in _numbered(SEED_AISLES + EXTRA_AISLES, size['aisles'], 'Aisle')]
+            stores = [add('store', name=name, family_id=family_id)
+                      for name in _numbered(STORE_NAMES, size['stores'], 'Store')]
+            names = rng.sample(item_names, min(size['master_items'], len(item_names)))
+            names += [f'Item {n}' for n in range(len(names) + 1, size['master_items'] + 1)]
+            items = []
+            for name in names:
+                item_id = add('master_item', name=name, family_id=family_id,
+                              aisle_id=rng.choice(aisles) if rng.random() < 0.8 else None,
+                              default_unit=rng.choice(UNITS), notes=None)
+                items.append(item_id)
+                stocked = rng.sample(locations, min(len(locations), rng.randint(1, o['locations_per_item'])))
+                for location_id in stocked:
+                    add('inventory', location_id=location_id, master_item_id=item_id, family_id=family_id,
+                        quantity=float(rng.randint(0, 12)), last_updated=self._when())
+                for store_id in rng.sample(stores, min(len(stores), rng.randint(0, o['stores_per_item']))):
+                    rows['item_stores'].append({'item_id': item_id, 'store_id': store_id})
+            for item_id in rng.sample(items, round(len(items) * o['shopping_fraction'])):
+                add('shopping_list_item', item_id=item_id, family_id=family_id, checked=rng.random() < 0.2,
+                    created_at=self._when())
+            summary.append({
+                'id': family_id,
+                'users': [row['email'] for row in rows['user'][-len(user_ids):]],
+                'counts': dict(size, inventory=len(rows['inventory']) - first_inventory),
+            })
+
+        # Parents before children so foreign keys hold at every step
+        for name in ('user', 'family', 'family_member', 'location', 'aisle', 'store', 'master_item',
+                     'item_stores', 'inventory', 'shopping_list_item'):
+            if rows[name]:
+                connection.execute(insert(self.tables[name]), rows[name])
+        return {
+            'seed': self.seed,
+            'families': summary,
+            'counts': {name: len(values) for name, values in rows.items()},
+        }
+
+
+def seed_family(connection, tables, family_id, rng):
+    """Write the starter locations, aisles and grocery items for one family; returns the item count."""
+    location_table, aisle_table, item_table = tables['location'], tables['aisle'], tables['master_item']
+    connection.execute(insert(location_table), [{'name': name, 'family_id': family_id} for name in SEED_LOCATIONS])
+    connection.execute(insert(aisle_table), [{'name': name, 'family_id': family_id} for name in SEED_AISLES])
+    connection.execute(insert(item_table), [{'name': name.title(), 'family_id': family_id} for name in GROCERY_ITEMS])
+    location_ids = connection.execute(
+        select(location_table.c.id).where(location_table.c.family_id == family_id).order_by(location_table.c.id)
+    ).scalars().all()
+    item_ids = connection.execute(
+        select(item_table.c.id).where(item_table.c.family_id == family_id).order_by(item_table.c.id)
+    ).scalars().all()
+    # Each item goes to a random location with a random quantity (0-5)
+    connection.execute(insert(tables['inventory']), [
+        {'location_id': rng.choice(location_ids), 'master_item_id': item_id, 'family_id': family_id,
+         'quantity': rng.randint(0, 5), 'last_updated': datetime.utcnow()}
+        for item_id in item_ids
+    ])
+    return len(item_ids)
@@ -1,6 +1,6 @@
 import os
 import traceback
-from flask import jsonify, current_app
+from flask import jsonify, current_app, request, render_template_string
 
 def create_debug_routes(app, mailjet, generate_password_reset_token, User):
     """
@@ -98,3 +98,101 @@ def create_debug_routes(app, mailjet, generate_password_reset_token, User):
         })
 
     return app
+
+
+PROFILER_PANEL = """<!doctype html>
+<title>Recent requests</title>
+<style>
+  body { font-family: sans-serif; font-size: 14px; }
+  table { border-collapse: collapse; }
+  td, th { border-bottom: 1px solid #ddd; padding: 4px 8px; text-align: left; vertical-align: top; }
+  .num { text-align: right; }
+  .hot { color: #b00; font-weight: bold; }
+  pre { margin: 0; white-space: pre-wrap; max-width: 60em; }
+</style>
+<h1>Last {{ records|length }} requests</h1>
+<p>Sort by: <a href="?sort=recent">recent</a> | <a href="?sort=queries">queries</a> |
+  <a href="?sort=sql_ms">SQL time</a> | <a href="?sort=total_ms">total time</a> | <a href="?format=json">JSON</a></p>
+<table>
+  <tr><th>at</th><th>request</th><th>status</th><th class="num">total ms</th><th class="num">SQL ms</th>
+      <th class="num">render ms</th><th class="num">queries</th><th>repeated statements</th></tr>
+  {% for r in records %}
+  <tr>
+    <td>{{ r.at }}</td><td>{{ r.method }} {{ r.path }}<br><small>{{ r.endpoint }}</small></td><td>{{ r.status }}</td>
+    <td class="num">{{ r.total_ms }}</td><td class="num">{{ r.sql_ms }}</td><td class="num">{{ r.render_ms }}</td>
+    <td class="num {{ 'hot' if r.duplicates or r.over_budget }}">{{ r.queries }}{% if r.budget is not none %} / {{ r.budget }}{% endif %}</td>
+    <td>{% for d in r.duplicates %}<pre>{{ d.count }}x {{ d.statement }}</pre>{% endfor %}</td>
+  </tr>
+  {% endfor %}
+</table>
+"""
+
+
+def create_profiler_routes(app, profiler):
+    """
+    Create the /debug/requests panel listing the requests the profiler recorded.
+    Only accessible in development mode, like the routes above.
+    """
+
+    @app.route('/debug/requests', methods=['GET'])
+    def debug_requests():
+        """Recent requests with query counts, timings and repeated statements"""
+        if not app.config.get('DEBUG') and os.environ.get('FLASK_ENV') != 'development':
+            return "This endpoint is only available in development mode", 403
+        if not app.config.get('PROFILER_ENABLED'):
+            return "Request profiling is off; set PROFILER_ENABLED=true", 404
+
+        records = profiler.snapshot()
+        sort = request.args.get('sort', 'recent')
+        if sort in ('queries', 'sql_ms', 'total_ms'):
+            records.sort(key=lambda record: record[sort], reverse=True)
+        if request.args.get('format') == 'json':
+            return jsonify(records)
+        return render_template_string(PROFILER_PANEL, records=records)
+
+    return app
+
+
+SLOW_QUERY_PANEL = """<!doctype html>
+<title>Slow queries</title>
+<style>
+  body { font-family: sans-serif; font-size: 14px; }
+  .entry { border-bottom: 1px solid #ddd; padding: 8px 0; }
+  .scan { color: #b00; font-weight: bold; }
+  pre { margin: 4px 0; white-space: pre-wrap; max-width: 80em; }
+</style>
+<h1>Last {{ entries|length }} slow queries (over {{ threshold }} ms)</h1>
+<p><a href="?scans=1">only plans with table scans</a> | <a href="?">all</a> | <a href="?format=json">JSON</a></p>
+{% for e in entries %}
+<div class="entry">
+  <strong>{{ e.duration_ms }} ms</strong> at {{ e.at }} &mdash; {{ e.route or 'outside a request' }}
+  {% if e.call_site %}<br><small>{{ e.call_site }}</small>{% endif %}
+  {% if e.table_scans %}<div class="scan">Full scan of {{ e.table_scans|join(', ') }}: missing index?</div>{% endif %}
+  <pre>{{ e.statement }}</pre>
+  <pre>parameters: {{ e.parameters }}</pre>
+  {% if e.plan %}<pre>{{ e.plan|join('\n') }}</pre>{% endif %}
+</div>
+{% endfor %}
+"""
+
+
+def create_slow_query_routes(app, slow_log):
+    """
+    Create the /debug/slow-queries view of recent slow statements and their plans.
+    Only accessible in development mode, like the routes above.
+    """
+
+    @app.route('/debug/slow-queries', methods=['GET'])
+    def debug_slow_queries():
+        """Recent statements over SLOW_QUERY_MS, with query plans"""
+        if not app.config.get('DEBUG') and os.environ.get('FLASK_ENV') != 'development':
+            return "This endpoint is only available in development mode", 403
+
+        entries = slow_log.snapshot()
+        if request.args.get('scans'):
+            entries = [entry for entry in entries if entry['table_scans']]
+        if request.args.get('format') == 'json':
+            return jsonify(entries)
+        return render_template_string(SLOW_QUERY_PANEL, entries=entries, threshold=app.config['SLOW_QUERY_MS'])
+
+    return app
@@ -0,0 +1,255 @@
+import atexit
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+from flask import g, request, has_request_context, Response, abort
+from sqlalchemy import event
+from statement_timer import statement_timer
+
+METRICS_DEFAULTS = {
+    'METRICS_ENABLED': True,
+    'METRICS_DIR': None,            # shared directory for multi-process (gunicorn) aggregation
+    'METRICS_FLUSH_INTERVAL': 1.0,  # seconds between writes of this process's file
+    'METRICS_TOKEN': None,          # when set, /metrics requires 'Authorization: Bearer <token>'
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'homeinventory_http_requests_total': ('counter', 'HTTP requests by endpoint, method and status.', None),
+    'homeinventory_http_request_duration_seconds': ('histogram', 'Time to handle a request, by endpoint.', LATENCY_BUCKETS),
+    'homeinventory_sql_queries_total': ('counter', 'SQL statements executed, by endpoint.', None),
+    'homeinventory_sql_query_duration_seconds': ('histogram', 'Time spent in each SQL statement.', SQL_BUCKETS),
+    'homeinventory_sqlite_busy_errors_total': ('counter', "Statements that failed with SQLite 'database is locked/busy' after busy_timeout retries.", None),
+    'homeinventory_cache_hits_total': ('counter', 'Cache hits, by cache.', None),
+    'homeinventory_cache_misses_total': ('counter', 'Cache misses, by cache.', None),
+    'homeinventory_cache_hit_ratio': ('gauge', 'Hits / (hits + misses) across all processes, by cache.', None),
+    'homeinventory_mailjet_send_duration_seconds': ('histogram', 'Mailjet send API call latency.', LATENCY_BUCKETS),
+    'homeinventory_mailjet_send_failures_total': ('counter', 'Mailjet sends that failed, by reason.', None),
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class Metrics:
+    """
+    Process-local counters and histograms, aggregated across processes through files.
+
+    Each process keeps its samples in memory and, when a directory is set, a
+    background thread rewrites its own metrics_<pid>.json there every
+    flush_interval seconds, so requests never wait on the file. Rendering
+    sums every process's file, so any gunicorn worker can answer a scrape
+    for all of them. Files of exited workers are kept, so counters never go
+    backwards; empty the directory when redeploying.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.counters = {}
+        self.histograms = {}
+        self.caches = {}
+        self._flusher_pid = None
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        buckets = METRICS[name][2]
+        key = _key(name, labels)
+        with self._lock:
+            counts = self.histograms.get(key)
+            if counts is None:
+                # one count per bucket plus +Inf, then the sum
+                counts = self.histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            for n, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[n] += 1
+                    break
+            else:
+                counts[len(buckets)] += 1
+            counts[-1] += value
+
+    def track_cache(self, name, cache):
+        """Report an LRUCache's hit and miss counts under cache=name."""
+        self.caches[name] = cache
+
+    def _samples(self):
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {key: list(counts) for key, counts in self.histograms.items()}
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            counters[_key('homeinventory_cache_hits_total', {'cache': name})] = stats['hits']
+            counters[_key('homeinventory_cache_misses_total', {'cache': name})] = stats['misses']
+        return counters, histograms
+
+    def _path(self, pid=None):
+        return os.path.join(self.directory, f'metrics_{pid or os.getpid()}.json')
+
+    def start_flusher(self):
+        """
+        Start this process's flush thread if it isn't running. Called per
+        request rather than at import, since threads don't survive the fork
+        into gunicorn workers.
+        """
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_periodically, name='metrics-flush', daemon=True).start()
+
+    def stop_flusher(self):
+        self._flusher_pid = None
+
+    def _flush_periodically(self):
+        pid = os.getpid()
+        while True:
+            time.sleep(self.flush_interval)
+            if self._flusher_pid != pid:
+                return
+            try:
+                self.flush()
+            except OSError:
+                pass  # directory unavailable for now; try again next interval
+
+    def flush(self):
+        """Write this process's samples to its file in the metrics directory."""
+        if not self.directory:
+            return
+        counters, histograms = self._samples()
+        data = {
+            'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+            'histograms': [[name, labels, counts] for (name, labels), counts in histograms.items()],
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path()
+        with open(path + '.tmp', 'w') as f:
+            json.dump(data, f)
+        os.replace(path + '.tmp', path)
+
+    def collect(self):
+        """(counters, histograms) summed over this process and every other process's file."""
+        counters, histograms = self._samples()
+        if not self.directory:
+            return counters, histograms
+        own = self._path()
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+            if path == own:
+                continue
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue  # being replaced, or from an older format
+            for name, labels, value in data['counters']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, counts in data['histograms']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                total = histograms.setdefault(key, [0] * len(counts))
+                histograms[key] = [a + b for a, b in zip(total, counts)]
+        return counters, histograms
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        counters, histograms = self.collect()
+        for name in self.caches:
+            hits = counters.get(_key('homeinventory_cache_hits_total', {'cache': name}), 0)
+            misses = counters.get(_key('homeinventory_cache_misses_total', {'cache': name}), 0)
+            counters[_key('homeinventory_cache_hit_ratio', {'cache': name})] = hits / (hits + misses) if hits + misses else 0.0
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'histogram':
+                for (metric, labels), counts in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets + (float('inf'),), counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {cumulative}')
+                    lines.append(f'{name}_sum{_labels(labels)} {counts[-1]}')
+                    lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+            else:
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = ('{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+               for key, value in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _endpoint():
+    return (request.endpoint or 'none') if has_request_context() else 'none'
+
+
+def init_metrics(app, engine):
+    """Count requests and SQL on app/engine and serve the totals at /metrics."""
+    for key, value in METRICS_DEFAULTS.items():
+        app.config.setdefault(key, value)
+    metrics = Metrics(app.config['METRICS_DIR'], app.config['METRICS_FLUSH_INTERVAL'])
+    app.extensions['metrics'] = metrics
+    if not app.config['METRICS_ENABLED']:
+        return metrics
+
+    def _count_query(conn, cursor, statement, parameters, context, executemany, elapsed):
+        metrics.observe('homeinventory_sql_query_duration_seconds', elapsed)
+        metrics.inc('homeinventory_sql_queries_total', endpoint=_endpoint())
+
+    statement_timer(engine).add(_count_query)
+
+    @event.listens_for(engine, 'handle_error')
+    def _count_busy(context):
+        message = str(context.original_exception).lower()
+        if 'database is locked' in message or 'database is busy' in message or 'database table is locked' in message:
+            metrics.inc('homeinventory_sqlite_busy_errors_total', endpoint=_endpoint())
+
+    @app.before_request
+    def _start_request():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            endpoint = _endpoint()
+            metrics.observe('homeinventory_http_request_duration_seconds', time.perf_counter() - started, endpoint=endpoint)
+            metrics.inc('homeinventory_http_requests_total', endpoint=endpoint, method=request.method,
+                        status=str(response.status_code))
+            metrics.start_flusher()
+        return response
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        token = app.config['METRICS_TOKEN']
+        if not token and os.environ.get('FLASK_ENV') == 'production':
+            abort(404)  # never published unauthenticated in production
+        if token:
+            supplied = request.headers.get('Authorization', '')
+            if not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+                abort(401)
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    atexit.register(metrics.flush)
+    return metrics
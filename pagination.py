@@ -0,0 +1,99 @@
+import base64
+import json
+from flask import request, url_for, abort, jsonify, make_response
+from sqlalchemy import and_, or_, tuple_
+
+
+def encode_cursor(key, row_id):
+    """Opaque cursor for the row after which the next page starts."""
+    raw = json.dumps([key, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (key, id) from a cursor, or None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key, row_id = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(row_id, int) or not isinstance(key, (int, float, str, type(None))):
+        return None
+    return key, row_id
+
+
+class Page:
+    """
+    One keyset page of a collection ordered by (sort_column, id_column).
+
+    Rows after the cursor are selected with a row-value comparison, so
+    SQLite answers each page with a range scan of the (family_id, sort key)
+    index instead of skipping OFFSET rows. Sort keys must survive a JSON
+    round trip unchanged (ints and strings); pass id_column as sort_column
+    too to page in plain id order.
+    """
+
+    def __init__(self, sort_column, id_column, limit, after=None):
+        self.sort_column = sort_column
+        self.id_column = id_column
+        self.limit = limit
+        self.after = after
+
+    def apply(self, statement):
+        """Add the ordering, cursor range and LIMIT to a Select or Query."""
+        if self.sort_column is self.id_column:
+            if self.after is not None:
+                statement = statement.filter(self.id_column > self.after[1])
+            return statement.order_by(self.id_column).limit(self.limit + 1)
+        if self.after is not None:
+            key, row_id = self.after
+            if key is None:
+                # NULLs sort first in SQLite and never compare equal
+                statement = statement.filter(or_(
+                    and_(self.sort_column.is_(None), self.id_column > row_id),
+                    self.sort_column.isnot(None),
+                ))
+            else:
+                statement = statement.filter(tuple_(self.sort_column, self.id_column) > tuple_(key, row_id))
+        # One extra row tells us whether there is a next page
+        return statement.order_by(self.sort_column, self.id_column).limit(self.limit + 1)
+
+    def response(self, items):
+        """JSON envelope with this page's items and a link to the next one."""
+        next_url = None
+        if len(items) > self.limit:
+            items = items[:self.limit]
+            last = items[-1]
+            args = request.args.to_dict()
+            args.update(limit=self.limit, cursor=encode_cursor(last[self.sort_column.key], last['id']))
+            next_url = url_for(request.endpoint, **request.view_args, **args)
+        return jsonify({'items': items, 'next': next_url})
+
+
+def _bad_request(message):
+    abort(make_response(jsonify({'error': message}), 400))
+
+
+def requested_page(sort_column, id_column, max_limit):
+    """
+    Read ?limit= and ?cursor= from the request.
+
+    Returns None when neither is given, so callers keep returning the whole
+    collection as a plain list. Aborts with a JSON 400 on a bad limit or cursor.
+    """
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+    if limit is None and cursor is None:
+        return None
+    try:
+        limit = int(limit) if limit is not None else max_limit
+    except ValueError:
+        _bad_request('limit must be an integer')
+    if limit < 1:
+        _bad_request('limit must be at least 1')
+    after = None
+    if cursor:
+        after = decode_cursor(cursor)
+        if after is None:
+            _bad_request('Invalid cursor')
+    return Page(sort_column, id_column, min(limit, max_limit), after)
@@ -0,0 +1,19 @@
+# endpoint -> most SQL statements one request to it may issue, at any data size
+QUERY_BUDGETS = {}
+
+
+def query_budget(max_queries):
+    """
+    Declare how many queries the decorated view may issue per request.
+
+    Put it directly above the view function so the budget is registered
+    under the endpoint name. The budget counts every statement the request
+    runs, login included, with the per-worker caches empty, and must not
+    depend on how many rows the family has. tests/test_query_budgets.py
+    enforces it; the request profiler flags requests that go over.
+    """
+    def decorator(view):
+        QUERY_BUDGETS[view.__name__] = max_queries
+        view.query_budget = max_queries
+        return view
+    return decorator
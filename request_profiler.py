@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from flask import g, request, has_request_context, before_render_template, template_rendered
+from query_budget import QUERY_BUDGETS
+from statement_timer import statement_timer
+
+PROFILER_DEFAULTS = {
+    'PROFILER_ENABLED': False,
+    'PROFILER_HISTORY': 50,     # requests kept for the debug panel
+}
+
+
+class RequestProfile:
+    """SQL and template timings collected while one request is handled."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.render_started = None
+        self.statements = Counter()
+
+    def duplicates(self):
+        """Statements run more than once, most repeated first: the N+1 signature."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count > 1]
+
+
+class RequestProfiler:
+    """
+    Per-request SQL profiling for one engine.
+
+    Cursor events count statements and time them; the totals come back on
+    every response as X-Query-Count and Server-Timing (db, render and app
+    durations) and the last PROFILER_HISTORY requests are kept for the
+    /debug/requests panel, flagged when they exceed the endpoint's
+    query_budget. Streamed bodies run after the headers are sent, so their
+    queries aren't included.
+    """
+
+    def __init__(self, history=PROFILER_DEFAULTS['PROFILER_HISTORY']):
+        self.recent = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def init_app(self, app, engine):
+        for key, value in PROFILER_DEFAULTS.items():
+            app.config.setdefault(key, value)
+        self.recent = deque(maxlen=app.config['PROFILER_HISTORY'])
+        app.extensions['request_profiler'] = self
+
+        statement_timer(engine).add(self._statement)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+
+        @app.before_request
+        def _start_profile():
+            if app.config['PROFILER_ENABLED']:
+                g._request_profile = RequestProfile()
+
+        @app.after_request
+        def _finish_profile(response):
+            profile = g.pop('_request_profile', None)
+            if profile is not None:
+                self._finish(profile, response)
+            return response
+
+    @staticmethod
+    def current():
+        return g.get('_request_profile') if has_request_context() else None
+
+    def _statement(self, conn, cursor, statement, parameters, context, executemany, elapsed):
+        profile = self.current()
+        if profile is None:
+            return
+        profile.sql_time += elapsed
+        profile.queries += 1
+        profile.statements[statement] += 1
+
+    def _before_render(self, sender, template, context, **extra):
+        profile = self.current()
+        if profile is not None:
+            profile.render_started = time.perf_counter()
+
+    def _after_render(self, sender, template, context, **extra):
+        profile = self.current()
+        if profile is not None and profile.render_started is not None:
+            profile.render_time += time.perf_counter() - profile.render_started
+            profile.render_started = None
+
+    def _finish(self, profile, response):
+        total = time.perf_counter() - profile.started
+        budget = QUERY_BUDGETS.get(request.endpoint)
+        response.headers['X-Query-Count'] = str(profile.queries)
+        response.headers.add('Server-Timing', ', '.join([
+            f'db;dur={profile.sql_time * 1000:.1f};desc="{profile.queries} queries"',
+            f'render;dur={profile.render_time * 1000:.1f}',
+            f'app;dur={total * 1000:.1f}',
+        ]))
+        record = {
+            'at': datetime.utcnow().isoformat(timespec='seconds'),
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'sql_ms': round(profile.sql_time * 1000, 2),
+            'render_ms': round(profile.render_time * 1000, 2),
+            'queries': profile.queries,
+            'budget': budget,
+            'over_budget': budget is not None and profile.queries > budget,
+            'duplicates': [{'statement': statement, 'count': count} for statement, count in profile.duplicates()],
+        }
+        with self._lock:
+            self.recent.append(record)
+
+    def snapshot(self):
+        """Recorded requests, newest first."""
+        with self._lock:
+            return list(reversed(self.recent))
+
+
+def init_profiler(app, engine):
+    profiler = RequestProfiler()
+    profiler.init_app(app, engine)
+    return profiler
@@ -0,0 +1,105 @@
+"""
+Compare the ORM + marshmallow list path with the FastReader path.
+
+Builds a throwaway SQLite database with one large family and times both
+paths for each JSON list endpoint, reporting wall time and peak Python
+memory (tracemalloc) per call. The app database is not touched.
+
+    python scripts/benchmark_read_path.py --items 2000 --locations 20 --repeat 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from app import (app, db, Family, Location, Aisle, Store, MasterItem, Inventory,
+                 locations_schema, aisles_schema, stores_schema, master_items_schema, inventories_schema,
+                 location_reader, aisle_reader, store_reader, master_item_reader, inventory_reader,
+                 location_select, SCHEMA_LOAD_OPTIONS)
+
+
+def build_database(path, items, locations):
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        family_id = conn.execute(insert(Family.__table__).values(name='Benchmark')).inserted_primary_key[0]
+        conn.execute(insert(Location.__table__), [{'name': f'Location {n}', 'family_id': family_id} for n in range(locations)])
+        conn.execute(insert(Aisle.__table__), [{'name': f'Aisle {n}', 'family_id': family_id} for n in range(locations)])
+        conn.execute(insert(Store.__table__), [{'name': f'Store {n}', 'family_id': family_id} for n in range(locations)])
+        aisle_ids = conn.execute(select(Aisle.id)).scalars().all()
+        conn.execute(insert(MasterItem.__table__), [
+            {'name': f'Item {n}', 'family_id': family_id, 'aisle_id': aisle_ids[n % len(aisle_ids)],
+             'default_unit': 'each', 'notes': f'note {n}'}
+            for n in range(items)
+        ])
+        location_ids = conn.execute(select(Location.id)).scalars().all()
+        item_ids = conn.execute(select(MasterItem.id)).scalars().all()
+        conn.execute(insert(Inventory.__table__), [
+            {'location_id': location_ids[n % len(location_ids)], 'master_item_id': item_id,
+             'quantity': n % 7 + 0.5, 'family_id': family_id}
+            for n, item_id in enumerate(item_ids)
+        ])
+    return engine, family_id
+
+
+def orm_path(engine, model, schema, family_id):
+    with Session(engine) as session:
+        statement = select(model).where(model.family_id == family_id)
+        statement = statement.options(*SCHEMA_LOAD_OPTIONS.get(type(schema), ()))
+        return schema.dump(session.scalars(statement).unique().all())
+
+
+def fast_path(engine, reader, family_id):
+    statement = location_select() if reader is location_reader else reader.select()
+    with engine.connect() as conn:
+        return reader.dump(conn.execute(statement.where(reader.table.c.family_id == family_id)))
+
+
+def measure(fn, repeat):
+    fn()  # warm up statement caches
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--locations', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, app.app_context():
+        engine, family_id = build_database(os.path.join(tmp, 'bench.db'), args.items, args.locations)
+        cases = [
+            ('/inventory', Inventory, inventories_schema, inventory_reader),
+            ('/master-items', MasterItem, master_items_schema, master_item_reader),
+            ('/locations', Location, locations_schema, location_reader),
+            ('/aisles', Aisle, aisles_schema, aisle_reader),
+            ('/stores', Store, stores_schema, store_reader),
+        ]
+        print(f'{args.items} items, {args.locations} locations/aisles/stores, best of {args.repeat}')
+        print(f"{'endpoint':<14} {'orm ms':>9} {'fast ms':>9} {'speedup':>8} {'orm KiB':>9} {'fast KiB':>9} {'mem':>6}")
+        for url, model, schema, reader in cases:
+            orm_time, orm_peak = measure(lambda: orm_path(engine, model, schema, family_id), args.repeat)
+            fast_time, fast_peak = measure(lambda: fast_path(engine, reader, family_id), args.repeat)
+            print(f'{url:<14} {orm_time * 1000:>9.2f} {fast_time * 1000:>9.2f} {orm_time / fast_time:>7.1f}x '
+                  f'{orm_peak / 1024:>9.0f} {fast_peak / 1024:>9.0f} {orm_peak / max(fast_peak, 1):>5.1f}x')
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""
+Benchmark every user-facing route against generated datasets of several sizes.
+
+For each dataset size the database is rebuilt with generate_tenants and the
+routes are driven through the Flask test client as the first user of the
+largest family. Per route it records p50/p95/p99 latency, SQL statements per
+request and peak Python memory (tracemalloc) of one request.
+
+Results are written as JSON. With --baseline, the run is compared against an
+earlier result file and exits non-zero when a route's p95 or memory grows
+past --threshold, or when it issues more queries than before. --save-baseline
+writes the run as the new baseline instead.
+
+    python scripts/benchmark_routes.py --sizes small,medium --repeat 30
+    python scripts/benchmark_routes.py --baseline bench-baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+if __name__ == '__main__':
+    # Point the app at a throwaway database before it is imported. create_app
+    # builds the engine from DATABASE_URL; E2E_TEST/TEST_DB_PATH only change
+    # app.config afterwards and would leave the real database in use.
+    BENCH_DIR = tempfile.mkdtemp(prefix='homeinventory-bench-')
+    BENCH_DB = os.path.join(BENCH_DIR, 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{BENCH_DB}'
+    os.environ['FLASK_TESTING'] = '1'
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event, select
+from app import app, db, bootstrap_schema, generate_tenants, Inventory, ShoppingListItem
+
+# Dataset sizes; the benchmarked family is the largest one generated
+SIZES = {
+    'small': {'families': 20, 'max_items': 50},
+    'medium': {'families': 50, 'max_items': 500},
+    'large': {'families': 100, 'max_items': 5000},
+}
+SEED = 20240101
+
+# Password hashing dominates these, so fewer samples are enough
+SLOW_ROUTES = {'POST /login', 'POST /signup'}
+
+# Memory below this many KiB, or latency below this many ms, is noise
+MEMORY_NOISE_KIB = 64
+LATENCY_NOISE_MS = 1.0
+
+
+class Context:
+    """What the route table needs to build URLs and bodies for the benchmarked family."""
+
+    def __init__(self, family):
+        self.family = family
+        self.email = family['users'][0]
+        with app.app_context():
+            self.inventory_id = db.session.scalar(
+                select(Inventory.id).where(Inventory.family_id == family['id']).order_by(Inventory.id))
+            self.shopping_item_id = db.session.scalar(
+                select(ShoppingListItem.id).where(ShoppingListItem.family_id == family['id']).order_by(ShoppingListItem.id))
+        self.counter = 0
+
+    def unique(self):
+        self.counter += 1
+        return self.counter
+
+
+# name -> (method, url(ctx), json body(ctx) or None, needs a logged-in client)
+ROUTES = {
+    'GET /': ('GET', lambda c: '/', None, True),
+    'GET /auth': ('GET', lambda c: '/auth', None, False),
+    'POST /login': ('POST', lambda c: '/login', lambda c: {'email': c.email, 'password': 'password'}, False),
+    'POST /signup': ('POST', lambda c: '/signup',
+                     lambda c: {'email': f'bench{c.unique()}.{time.time_ns()}@example.test', 'password': 'password'}, False),
+    'GET /web/inventory': ('GET', lambda c: '/web/inventory', None, True),
+    'GET /web/shopping-list': ('GET', lambda c: '/web/shopping-list', None, True),
+    'GET /web/locations': ('GET', lambda c: '/web/locations', None, True),
+    'GET /web/master-items': ('GET', lambda c: '/web/master-items', None, True),
+    'GET /web/stores': ('GET', lambda c: '/web/stores', None, True),
+    'GET /web/aisles': ('GET', lambda c: '/web/aisles', None, True),
+    'GET /family': ('GET', lambda c: '/family', None, True),
+    'GET /user/profile': ('GET', lambda c: '/user/profile', None, True),
+    'GET /inventory': ('GET', lambda c: '/inventory', None, True),
+    'GET /inventory?limit=100': ('GET', lambda c: '/inventory?limit=100', None, True),
+    'GET /inventory/<id>': ('GET', lambda c: f'/inventory/{c.inventory_id}', None, True),
+    'GET /locations': ('GET', lambda c: '/locations', None, True),
+    'GET /aisles': ('GET', lambda c: '/aisles', None, True),
+    'GET /stores': ('GET', lambda c: '/stores', None, True),
+    'GET /master-items': ('GET', lambda c: '/master-items', None, True),
+    'GET /shopping-list': ('GET', lambda c: '/shopping-list', None, True),
+    'GET /api/shopping-list/count': ('GET', lambda c: '/api/shopping-list/count', None, True),
+    'GET /export/inventory.csv': ('GET', lambda c: '/export/inventory.csv', None, True),
+    'POST /inventory/<id>/adjust': ('POST', lambda c: f'/inventory/{c.inventory_id}/adjust', lambda c: {'delta': 1}, True),
+    'POST /web/shopping-list/toggle/<id>': ('POST', lambda c: f'/web/shopping-list/toggle/{c.shopping_item_id}', None, True),
+}
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+def build_dataset(size):
+    """Rebuild the database with a generated dataset; returns the largest family's summary."""
+    with app.app_context():
+        db.drop_all()
+        bootstrap_schema(db.engine)
+        engine = db.engine
+        summary = generate_tenants(seed=SEED, **SIZES[size])
+    return max(summary['families'], key=lambda family: family['counts']['inventory']), engine
+
+
+def run_route(name, ctx, engine, repeat):
+    method, url, body, logged_in = ROUTES[name]
+    endpoint = app.url_map.bind('localhost').match(url(ctx).split('?')[0], method=method)[0]
+    with app.test_client() as client:
+        if logged_in:
+            login = client.post('/login', json={'email': ctx.email, 'password': 'password'})
+            if login.status_code != 200:
+                raise RuntimeError(f'Could not log in as {ctx.email}')
+
+        def request():
+            response = client.open(url(ctx), method=method, json=body(ctx) if body else None)
+            response.get_data()  # drain streamed responses inside the timing
+            if response.status_code >= 400:
+                raise RuntimeError(f'{name} returned {response.status_code}')
+            response.close()
+
+        request()  # warm up caches and compiled statements
+        timings = []
+        with QueryCounter(engine) as queries:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                request()
+                timings.append((time.perf_counter() - start) * 1000)
+        tracemalloc.start()
+        request()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        'endpoint': endpoint,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'queries': round(queries.count / repeat, 2),
+        'peak_kib': round(peak / 1024, 1),
+        'samples': repeat,
+    }
+
+
+def run_benchmarks(sizes, repeat, routes=None, progress=print):
+    """Run the named routes (default: all) on each dataset size; returns the results document."""
+    results = {}
+    for size in sizes:
+        family, engine = build_dataset(size)
+        ctx = Context(family)
+        progress(f"[{size}] family {family['id']}: {family['counts']['master_items']} items, "
+                 f"{family['counts']['inventory']} inventory rows")
+        results[size] = {}
+        for name in routes or ROUTES:
+            samples = min(repeat, 5) if name in SLOW_ROUTES else repeat
+            results[size][name] = run_route(name, ctx, engine, samples)
+            r = results[size][name]
+            progress(f"  {name:<38} p50 {r['p50_ms']:>8.2f}  p95 {r['p95_ms']:>8.2f}  p99 {r['p99_ms']:>8.2f} ms  "
+                     f"{r['queries']:>6} q  {r['peak_kib']:>9.1f} KiB")
+    return {
+        'meta': {
+            'created': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'seed': SEED,
+            'repeat': repeat,
+            'sizes': {size: SIZES[size] for size in sizes},
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """List human-readable regressions of current against baseline; empty when there are none."""
+    regressions = []
+    for size, routes in current['results'].items():
+        if baseline['meta'].get('sizes', {}).get(size) != current['meta']['sizes'].get(size):
+            continue  # different dataset, numbers aren't comparable
+        for name, now in routes.items():
+            before = baseline['results'].get(size, {}).get(name)
+            if before is None:
+                continue
+            if now['p95_ms'] > before['p95_ms'] * (1 + threshold) and now['p95_ms'] - before['p95_ms'] > LATENCY_NOISE_MS:
+                regressions.append(f"[{size}] {name}: p95 {before['p95_ms']:.2f} -> {now['p95_ms']:.2f} ms")
+            if now['queries'] > before['queries']:
+                regressions.append(f"[{size}] {name}: queries {before['queries']} -> {now['queries']}")
+            if now['peak_kib'] > before['peak_kib'] * (1 + threshold) and now['peak_kib'] - before['peak_kib'] > MEMORY_NOISE_KIB:
+                regressions.append(f"[{size}] {name}: memory {before['peak_kib']:.0f} -> {now['peak_kib']:.0f} KiB")
+    return regressions
+
+
+def unbenchmarked_endpoints(current):
+    """Endpoints in the URL map that no benchmarked route reached."""
+    covered = {r['endpoint'] for routes in current['results'].values() for r in routes.values()}
+    return sorted({rule.endpoint for rule in app.url_map.iter_rules()} - covered)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='small,medium,large', help=f"Comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument('--repeat', type=int, default=20, help='Timed requests per route')
+    parser.add_argument('--routes', help="Only routes whose name contains this text, e.g. 'web/'")
+    parser.add_argument('--output', default='bench-results.json', help='Where to write this run')
+    parser.add_argument('--baseline', help='Result file to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Write this run to --baseline instead of comparing')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed relative growth of p95 and memory')
+    args = parser.parse_args()
+
+    sizes = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+    routes = [name for name in ROUTES if args.routes in name] if args.routes else None
+
+    app.config['TESTING'] = True
+    with app.app_context():
+        database = db.engine.url.database
+    if not database or os.path.abspath(database) != BENCH_DB:
+        shutil.rmtree(BENCH_DIR, ignore_errors=True)
+        sys.exit(f'Refusing to benchmark: the app is using {database}, not the throwaway {BENCH_DB}')
+    try:
+        current = run_benchmarks(sizes, args.repeat, routes)
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        shutil.rmtree(BENCH_DIR, ignore_errors=True)
+    print(f"Not benchmarked: {', '.join(unbenchmarked_endpoints(current))}")
+
+    if args.save_baseline:
+        if not args.baseline:
+            parser.error('--save-baseline needs --baseline')
+        args.output = args.baseline
+    with open(args.output, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f'Wrote {args.output}')
+    if args.baseline and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions against {args.baseline} (threshold {args.threshold:.0%})')
+
+
+if __name__ == '__main__':
+    main()
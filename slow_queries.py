@@ -0,0 +1,188 @@
+import json
+import logging
+import logging.handlers
+import os
+import re
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+from flask import request, has_request_context
+import statement_timer as statement_timer_module
+from statement_timer import statement_timer
+
+SLOW_QUERY_DEFAULTS = {
+    'SLOW_QUERY_MS': 250,               # 0 turns the slow query log off
+    'SLOW_QUERY_LOG_FILE': None,        # defaults to instance/slow_queries.log; '' for no file
+    'SLOW_QUERY_LOG_MAX_BYTES': 5 * 1024 * 1024,
+    'SLOW_QUERY_LOG_BACKUPS': 3,
+    'SLOW_QUERY_HISTORY': 100,          # entries kept for /debug/slow-queries
+    # A full table scan of these in a plan is flagged as a likely missing index
+    'SLOW_QUERY_SCAN_TABLES': ('inventory', 'master_item', 'shopping_list_item', 'item_stores',
+                               'location', 'store', 'aisle', 'family_member'),
+}
+
+# Only statements SQLite can explain; PRAGMA, BEGIN, EXPLAIN itself etc. are skipped
+EXPLAINABLE = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|WITH|REPLACE)\b', re.IGNORECASE)
+# 'SCAN inventory' or 'SCAN inventory AS i' but not 'SCAN inventory USING [COVERING] INDEX ...'
+TABLE_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+MAX_PARAMETERS_LENGTH = 1000
+# Frames from these files are the logging machinery, not the query's call site
+SKIPPED_FILES = {os.path.abspath(__file__), os.path.abspath(statement_timer_module.__file__)}
+# Bound parameters whose names match are written as REDACTED
+SENSITIVE_PARAMETER = re.compile(r'password|token|secret', re.IGNORECASE)
+REDACTED = 'REDACTED'
+
+
+def _short(value, limit=MAX_PARAMETERS_LENGTH):
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+def _redact_one(values, names):
+    if isinstance(values, dict):
+        return {key: REDACTED if SENSITIVE_PARAMETER.search(key) else value for key, value in values.items()}
+    if names is None or len(names) != len(values):
+        return REDACTED
+    return tuple(REDACTED if SENSITIVE_PARAMETER.search(name) else value for name, value in zip(names, values))
+
+
+def redact(statement, parameters, context, executemany):
+    """
+    parameters with password, token and secret values replaced.
+
+    Positional parameters are matched to the compiled statement's bind
+    names; when there are none to match (raw driver SQL) and the statement
+    mentions such a column, every parameter is replaced.
+    """
+    if not parameters:
+        return parameters
+    compiled = getattr(context, 'compiled', None)
+    names = getattr(compiled, 'positiontup', None)
+    if names is None and not SENSITIVE_PARAMETER.search(statement):
+        return parameters
+    if executemany:
+        return [_redact_one(values, names) for values in parameters]
+    return _redact_one(parameters, names)
+
+
+class SlowQueryLog:
+    """
+    Log statements slower than SLOW_QUERY_MS with their plan.
+
+    Each entry records the SQL and parameters, the route and the innermost
+    call site inside the app, and SQLite's EXPLAIN QUERY PLAN (run on a
+    separate cursor of the same connection, so no events fire and pending
+    results aren't disturbed). Password, token and secret parameters are
+    redacted. Plans with a full scan of a table in
+    SLOW_QUERY_SCAN_TABLES are flagged. Entries go to a rotating file as
+    one JSON object per line and to an in-memory list for the debug view.
+    """
+
+    def __init__(self, root_path, history=SLOW_QUERY_DEFAULTS['SLOW_QUERY_HISTORY']):
+        self.root_path = os.path.abspath(root_path)
+        self.recent = deque(maxlen=history)
+        self.logger = logging.getLogger('homeinventory.slow_queries')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self._handler = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, engine):
+        for key, value in SLOW_QUERY_DEFAULTS.items():
+            app.config.setdefault(key, value)
+        if app.config['SLOW_QUERY_LOG_FILE'] is None:
+            app.config['SLOW_QUERY_LOG_FILE'] = os.path.join(app.instance_path, 'slow_queries.log')
+        self.app = app
+        self.recent = deque(maxlen=app.config['SLOW_QUERY_HISTORY'])
+        self.configure_file(app.config['SLOW_QUERY_LOG_FILE'], app.config['SLOW_QUERY_LOG_MAX_BYTES'],
+                            app.config['SLOW_QUERY_LOG_BACKUPS'])
+        app.extensions['slow_query_log'] = self
+        statement_timer(engine).add(self._statement)
+
+    def configure_file(self, path, max_bytes=SLOW_QUERY_DEFAULTS['SLOW_QUERY_LOG_MAX_BYTES'],
+                       backups=SLOW_QUERY_DEFAULTS['SLOW_QUERY_LOG_BACKUPS']):
+        """Send entries to a rotating file at path, or nowhere when path is empty."""
+        if self._handler is not None:
+            self.logger.removeHandler(self._handler)
+            self._handler.close()
+            self._handler = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # delay: the file is only created once something is slow
+            self._handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                                                 delay=True)
+            self._handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger.addHandler(self._handler)
+
+    def _statement(self, conn, cursor, statement, parameters, context, executemany, elapsed):
+        threshold = self.app.config['SLOW_QUERY_MS']
+        if threshold and elapsed * 1000 >= threshold:
+            self.record(conn, cursor, statement, parameters, executemany, elapsed, context)
+
+    def call_site(self):
+        """'file.py:123 in function' for the innermost app frame that ran the query."""
+        for frame in reversed(traceback.extract_stack()):
+            filename = os.path.abspath(frame.filename)
+            if filename in SKIPPED_FILES or not filename.startswith(self.root_path) or 'site-packages' in filename:
+                continue
+            return f'{os.path.relpath(filename, self.root_path)}:{frame.lineno} in {frame.name}'
+        return None
+
+    def explain(self, cursor, statement, parameters, executemany):
+        """EXPLAIN QUERY PLAN detail lines, indented by depth, or None when it can't be explained."""
+        if not EXPLAINABLE.match(statement):
+            return None
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        explain_cursor = cursor.connection.cursor()
+        try:
+            rows = explain_cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters or ()).fetchall()
+        except Exception as e:
+            return [f'(plan unavailable: {e})']
+        finally:
+            explain_cursor.close()
+        depth = {0: -1}
+        plan = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            plan.append('  ' * depth[node_id] + detail)
+        return plan
+
+    def flagged_scans(self, plan):
+        watched = set(self.app.config['SLOW_QUERY_SCAN_TABLES'])
+        scans = []
+        for line in plan or ():
+            match = TABLE_SCAN.match(line.strip())
+            if match and match.group(1) in watched:
+                scans.append(match.group(1))
+        return scans
+
+    def record(self, conn, cursor, statement, parameters, executemany, elapsed, context=None):
+        plan = self.explain(cursor, statement, parameters, executemany) if conn.dialect.name == 'sqlite' else None
+        entry = {
+            'at': datetime.utcnow().isoformat(timespec='milliseconds'),
+            'duration_ms': round(elapsed * 1000, 2),
+            'statement': statement,
+            'parameters': _short(redact(statement, parameters, context, executemany)),
+            'executemany': bool(executemany),
+            'route': f'{request.method} {request.path} ({request.endpoint})' if has_request_context() else None,
+            'call_site': self.call_site(),
+            'plan': plan,
+            'table_scans': self.flagged_scans(plan),
+        }
+        with self._lock:
+            self.recent.append(entry)
+        self.logger.warning(json.dumps(entry))
+        return entry
+
+    def snapshot(self):
+        """Logged entries, newest first."""
+        with self._lock:
+            return list(reversed(self.recent))
+
+
+def init_slow_query_log(app, engine):
+    slow_log = SlowQueryLog(app.root_path)
+    slow_log.init_app(app, engine)
+    return slow_log
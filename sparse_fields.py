@@ -0,0 +1,76 @@
+from functools import lru_cache
+from flask import request, abort, jsonify, make_response
+from marshmallow import fields
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+@lru_cache(maxsize=None)
+def _declared(schema_cls):
+    """(scalar field names, {nested name: nested field names}) for a schema class."""
+    declared = schema_cls().dump_fields
+    nested = {
+        name: tuple(field.schema.dump_fields)
+        for name, field in declared.items() if isinstance(field, fields.Nested)
+    }
+    scalars = tuple(name for name in declared if name not in nested)
+    return scalars, nested
+
+
+def requested_only(schema, always=('id',), extra=()):
+    """
+    Translate ?fields= and ?embed= into a marshmallow only= set.
+
+    fields lists top-level keys and dotted keys of embedded objects
+    (fields=id,quantity,master_item.name); embed lists the nested objects to
+    include whole (embed=location). With only embed given every top-level key
+    is kept; with fields given, nested objects appear only when named. extra
+    names keys added outside the schema (e.g. item_count) that may also be
+    requested. Returns None when neither parameter is present, meaning the
+    full representation, and aborts with a JSON 400 on unknown names.
+    """
+    fields_arg = request.args.get('fields')
+    embed_arg = request.args.get('embed')
+    if fields_arg is None and embed_arg is None:
+        return None
+    scalars, nested = _declared(schema if isinstance(schema, type) else type(schema))
+    scalars = scalars + tuple(extra)
+    requested = _split(fields_arg or '')
+    top = [name for name in requested if '.' not in name]
+    dotted = [tuple(name.split('.', 1)) for name in requested if '.' in name]
+    if embed_arg is not None:
+        embed = set(_split(embed_arg))
+    else:
+        embed = set() if fields_arg is not None else set(nested)
+
+    unknown = [name for name in top if name not in scalars and name not in nested]
+    unknown += [f'{parent}.{child}' for parent, child in dotted if child not in nested.get(parent, ())]
+    unknown += [name for name in embed if name not in nested]
+    if unknown:
+        abort(make_response(jsonify({'error': f"Unknown field(s): {', '.join(sorted(unknown))}"}), 400))
+
+    embed.update(name for name in top if name in nested)
+    embed.update(parent for parent, _ in dotted)
+    only = {name for name in top if name in scalars} if top else set(scalars)
+    only.update(always)
+    for name in embed:
+        children = [child for parent, child in dotted if parent == name]
+        if children:
+            only.update(f'{name}.{child}' for child in children)
+        else:
+            only.add(name)
+    return frozenset(only)
+
+
+@lru_cache(maxsize=512)
+def _sparse_schema(schema_cls, only, many):
+    return schema_cls(only=only, many=many)
+
+
+def sparse_schema(schema, only, extra=()):
+    """schema restricted to only (a requested_only() result); schema itself when only is None."""
+    if only is None:
+        return schema
+    return _sparse_schema(type(schema), frozenset(only) - frozenset(extra), schema.many)
@@ -0,0 +1,84 @@
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Named engine profiles. Each value is overridable through SQLITE_<NAME>
+# environment variables, e.g. SQLITE_BUSY_TIMEOUT=10000.
+SQLITE_PROFILES = {
+    # SQLite's own defaults: rollback journal, no pragmas issued
+    'default': {},
+    # Multi-worker gunicorn deployment: readers never block on the writer
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,       # milliseconds
+        'cache_size': -64000,       # negative = KiB, i.e. 64 MB per connection
+        'mmap_size': 268435456,     # 256 MB
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    },
+}
+
+POOL_DEFAULTS = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 30,
+}
+
+
+def load_sqlite_profile(environ=None):
+    """
+    Resolve the engine profile named by SQLITE_PROFILE (default 'production').
+
+    Returns (name, pragmas, pool) where pragmas is an ordered dict of PRAGMA
+    name -> value and pool holds the QueuePool settings.
+    """
+    environ = os.environ if environ is None else environ
+    name = environ.get('SQLITE_PROFILE', 'production')
+    if name not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE '{name}'. Choose one of: {', '.join(SQLITE_PROFILES)}")
+    pragmas = dict(SQLITE_PROFILES[name])
+    for pragma in SQLITE_PROFILES['production']:
+        override = environ.get(f'SQLITE_{pragma.upper()}')
+        if override:
+            pragmas[pragma] = override
+    pool = {key: int(environ.get(f'SQLITE_{key.upper()}', default)) for key, default in POOL_DEFAULTS.items()}
+    return name, pragmas, pool
+
+
+def is_file_database(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def sqlite_engine_options(uri, pragmas, pool):
+    """Build SQLALCHEMY_ENGINE_OPTIONS for the profile."""
+    if not is_file_database(uri):
+        # In-memory databases use a StaticPool, which takes no pool sizing
+        return {}
+    options = dict(pool)
+    # Connections are handed between gunicorn threads by the pool
+    options['connect_args'] = {'check_same_thread': False}
+    if 'busy_timeout' in pragmas:
+        options['connect_args']['timeout'] = int(pragmas['busy_timeout']) / 1000
+    return options
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Issue the profile's PRAGMAs on every new DBAPI connection."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in pragmas.items():
+                cursor.execute(f'PRAGMA {pragma}={value}')
+        finally:
+            cursor.close()
+
+
+def describe_sqlite_profile(name, pragmas, pool):
+    settings = ', '.join(f'{key}={value}' for key, value in pragmas.items()) or 'sqlite defaults'
+    return f"SQLite profile '{name}': {settings}; pool_size={pool['pool_size']}, max_overflow={pool['max_overflow']}"
@@ -0,0 +1,49 @@
+import time
+import weakref
+from sqlalchemy import event
+
+_timers = weakref.WeakKeyDictionary()
+
+
+class StatementTimer:
+    """
+    Times every statement on an engine once and passes the duration on.
+
+    Listeners are called after each statement as
+    listener(conn, cursor, statement, parameters, context, executemany, elapsed).
+    The start time is a single value in conn.info that the next statement
+    overwrites and handle_error clears, so a failing statement can't leave
+    anything behind on a pooled connection.
+    """
+
+    def __init__(self, engine):
+        self.listeners = []
+        event.listen(engine, 'before_cursor_execute', self._start)
+        event.listen(engine, 'after_cursor_execute', self._finish)
+        event.listen(engine, 'handle_error', self._discard)
+
+    def add(self, listener):
+        self.listeners.append(listener)
+
+    def _start(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info['statement_start'] = time.perf_counter()
+
+    def _finish(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop('statement_start', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        for listener in self.listeners:
+            listener(conn, cursor, statement, parameters, context, executemany, elapsed)
+
+    def _discard(self, context):
+        if context.connection is not None:
+            context.connection.info.pop('statement_start', None)
+
+
+def statement_timer(engine):
+    """The engine's StatementTimer, installed on first use."""
+    timer = _timers.get(engine)
+    if timer is None:
+        timer = _timers[engine] = StatementTimer(engine)
+    return timer
@@ -0,0 +1,206 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from flask import g, request, has_request_context
+
+LOGGING_DEFAULTS = {
+    'LOG_LEVEL': 'INFO',
+    'LOG_LEVELS': '',               # per-logger overrides, e.g. 'homeinventory.mail=DEBUG,werkzeug=WARNING'
+    'LOG_FORMAT': 'json',           # 'json' lines or human-readable 'text'
+    'LOG_FILE': None,               # defaults to stderr
+    'LOG_DEBUG_SAMPLE_RATE': 1.0,   # share of DEBUG records kept
+}
+
+# Incoming X-Request-ID values are reused only when they look like an id
+REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+# Attributes every LogRecord has; anything else was passed through extra= and is logged as a field
+RECORD_ATTRIBUTES = set(logging.makeLogRecord({}).__dict__) | {'message', 'asctime', 'request_id', 'sample_rate'}
+
+
+def parse_levels(spec):
+    """{'logger.name': level} from 'logger.name=LEVEL,...'."""
+    levels = {}
+    for part in (spec or '').split(','):
+        if not part.strip():
+            continue
+        name, sep, level = part.partition('=')
+        level = level.strip().upper()
+        if not sep or not name.strip() or not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"Invalid LOG_LEVELS entry '{part.strip()}'. Use logger.name=LEVEL")
+        levels[name.strip()] = level
+    return levels
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request id, extra= fields and traceback."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the current request id while still on the request's thread."""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """
+    Keep only a share of DEBUG records.
+
+    The share is LOG_DEBUG_SAMPLE_RATE, or extra={'sample_rate': r} for one
+    chatty call site. Dropped records are never queued or formatted.
+    """
+
+    def __init__(self, rate=1.0, rng=None):
+        super().__init__()
+        self.rate = rate
+        self.rng = rng or random.Random()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = getattr(record, 'sample_rate', self.rate)
+        return rate >= 1 or self.rng.random() < rate
+
+
+class StderrHandler(logging.StreamHandler):
+    """Write to whatever sys.stderr is when a record is emitted, not when the handler was made."""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+
+class RequestQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hand records to the listener thread without formatting them here.
+
+    QueueHandler.prepare would format the record with this handler's
+    formatter; this only merges the arguments and renders the traceback, so
+    the listener's formatter still sees the logger name, level and extra
+    fields.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class StructuredLogging:
+    """
+    Queue-backed logging for one logger tree ('homeinventory' by default).
+
+    Request threads only filter records and put them on an in-memory queue;
+    a QueueListener thread formats them as JSON lines (or text) and writes
+    them to LOG_FILE or stderr. Every request gets an id, taken from a
+    well-formed X-Request-ID header or generated, which is added to its
+    records and echoed in the response's X-Request-ID header. The root
+    logger and other libraries' loggers are left as they are.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.handler = None
+        self.listener = None
+        self.logger = None
+        self.running = False
+
+    def init_app(self, app, logger=None):
+        for key, value in LOGGING_DEFAULTS.items():
+            app.config.setdefault(key, value)
+        self.logger = logging.getLogger('homeinventory') if logger is None else logger
+        for old in [h for h in self.logger.handlers if isinstance(h, RequestQueueHandler)]:
+            old.owner.close()
+
+        if app.config['LOG_FILE']:
+            output = logging.handlers.WatchedFileHandler(app.config['LOG_FILE'])
+        else:
+            output = logging.StreamHandler(self.stream) if self.stream else StderrHandler()
+        if app.config['LOG_FORMAT'] == 'text':
+            output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'))
+        else:
+            output.setFormatter(JsonFormatter())
+
+        self.handler = RequestQueueHandler(queue.Queue())
+        self.handler.owner = self
+        self.handler.addFilter(DebugSamplingFilter(app.config['LOG_DEBUG_SAMPLE_RATE']))
+        self.handler.addFilter(RequestContextFilter())
+        self.listener = logging.handlers.QueueListener(self.handler.queue, output, respect_handler_level=True)
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(app.config['LOG_LEVEL'].upper())
+        for name, level in parse_levels(app.config['LOG_LEVELS']).items():
+            logging.getLogger(name).setLevel(level)
+        self.listener.start()
+        self.running = True
+        atexit.register(self.close)
+        app.extensions['structured_logging'] = self
+
+        @app.before_request
+        def _assign_request_id():
+            supplied = request.headers.get('X-Request-ID', '')
+            g.request_id = supplied if REQUEST_ID.match(supplied) else uuid.uuid4().hex
+
+        @app.after_request
+        def _echo_request_id(response):
+            if 'request_id' in g:
+                response.headers['X-Request-ID'] = g.request_id
+            return response
+
+    def flush(self):
+        """Block until every queued record has been written."""
+        if self.running:
+            # QueueListener marks each record task_done once its handlers ran
+            self.handler.queue.join()
+
+    def close(self):
+        if not self.running:
+            return
+        self.running = False
+        self.logger.removeHandler(self.handler)
+        self.listener.stop()
+        for output in self.listener.handlers:
+            output.close()
+
+
+def init_logging(app, logger=None, stream=None):
+    structured = StructuredLogging(stream)
+    structured.init_app(app, logger)
+    return structured
@@ -103,3 +103,71 @@ def setup_e2e_db():
         print('DEBUG: test.db deleted after session', flush=True)
     except Exception as e:
         print(f'DEBUG: Failed to delete test.db: {e}', flush=True)
+
+@pytest.fixture(scope='module')
+def fresh_database():
+    """
+    Empty tables for one test module, dropped again when it finishes.
+
+    Modules opt in with pytestmark = pytest.mark.usefixtures('fresh_database').
+    """
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    yield
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+@pytest.fixture
+def signup_family():
+    """
+    signup_family(client, email) signs email up (password 'pw') with a family
+    of the same name and leaves client logged in; returns the family id.
+    """
+    from app import FamilyMember
+    def signup(client, email):
+        rv = client.post('/signup', json={'email': email, 'password': 'pw', 'family_name': email})
+        assert rv.status_code == 200, rv.get_json()
+        with app.app_context():
+            return db.session.scalar(db.select(FamilyMember.family_id).where(FamilyMember.user_id == rv.get_json()['user_id']))
+    return signup
+
+@pytest.fixture
+def engine():
+    """The app's engine, for tests/query_utils.count_queries."""
+    with app.app_context():
+        return db.engine
+
+@pytest.fixture
+def generate_families():
+    """Create synthetic families: generate_families(3, seed=1, max_items=50) returns the generator summary."""
+    from app import generate_tenants
+    def generate(families, **options):
+        with app.app_context():
+            return generate_tenants(families, **options)
+    return generate
+
+@pytest.fixture(scope='module')
+def small_and_large_family(fresh_database):
+    """
+    The smallest and largest of a skewed set of generated families.
+
+    Returns two dicts with the family's generator summary plus a test client
+    logged in as its first user, for checks that must hold at any data size.
+    """
+    from app import generate_tenants
+    with app.app_context():
+        summary = generate_tenants(6, seed=24, max_items=120, max_users=5)
+    families = sorted(summary['families'], key=lambda family: family['counts']['inventory'])
+    picked = []
+    for family in (families[0], families[-1]):
+        client = app.test_client()
+        client.post('/login', json={'email': family['users'][0], 'password': 'password'})
+        picked.append(dict(family, client=client))
+    return picked
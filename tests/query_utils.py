@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+
+
+@contextmanager
+def count_queries(engine):
+    """
+    Count the SQL statements executed on engine inside the with block.
+    Yields a list that collects the statements as they run.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def assert_queries_do_not_scale(engine, request, grow):
+    """
+    Fail if request() issues more queries after grow() has added rows.
+
+    request is called once before and once after grow; both calls must run
+    the same number of statements, otherwise the endpoint is loading rows
+    (or their relationships) one at a time.
+    """
+    request()  # warm up caches that are filled on first use
+    with count_queries(engine) as before:
+        request()
+    grow()
+    request()  # growing the data invalidates those caches again
+    with count_queries(engine) as after:
+        request()
+    assert len(after) == len(before), (
+        f"query count grew from {len(before)} to {len(after)} with more rows:\n" + '\n'.join(after)
+    )
+
+
+def cold_and_warm_queries(engine, request, clear_caches):
+    """Statements request() runs right after clear_caches(), and again once that call filled them."""
+    clear_caches()
+    with count_queries(engine) as cold:
+        request()
+    with count_queries(engine) as warm:
+        request()
+    return cold, warm
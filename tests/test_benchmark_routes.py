@@ -0,0 +1,41 @@
+import pytest
+from scripts import benchmark_routes as bench
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def test_percentile_is_nearest_rank():
+    samples = list(range(1, 101))
+    assert bench.percentile(samples, 50) == 50
+    assert bench.percentile(samples, 95) == 95
+    assert bench.percentile(samples, 99) == 99
+    assert bench.percentile([3.0], 99) == 3.0
+
+def result(p95, queries, peak, sizes=None):
+    return {'meta': {'sizes': sizes or {'small': {'families': 1}}},
+            'results': {'small': {'GET /x': {'p95_ms': p95, 'queries': queries, 'peak_kib': peak}}}}
+
+def test_compare_flags_regressions_past_threshold():
+    baseline = result(10.0, 3, 500)
+    assert bench.compare(baseline, result(11.5, 3, 550), 0.2) == []
+    assert bench.compare(baseline, result(0.5, 3, 500), 0.2) == []
+    regressions = bench.compare(baseline, result(13.0, 4, 800), 0.2)
+    assert regressions == ['[small] GET /x: p95 10.00 -> 13.00 ms', '[small] GET /x: queries 3 -> 4',
+                           '[small] GET /x: memory 500 -> 800 KiB']
+    # A different dataset isn't compared
+    assert bench.compare(baseline, result(99.0, 9, 9000, sizes={'small': {'families': 2}}), 0.2) == []
+    # Tiny absolute changes are noise
+    assert bench.compare(result(0.2, 3, 10), result(0.9, 3, 60), 0.2) == []
+
+def test_run_covers_routes_on_generated_data(monkeypatch):
+    monkeypatch.setitem(bench.SIZES, 'tiny', {'families': 3, 'max_items': 12})
+    routes = ['GET /web/inventory', 'GET /inventory', 'GET /inventory/<id>', 'POST /login']
+    current = bench.run_benchmarks(['tiny'], 3, routes, progress=lambda line: None)
+    assert current['meta']['sizes'] == {'tiny': {'families': 3, 'max_items': 12}}
+    measured = current['results']['tiny']
+    assert list(measured) == routes
+    assert measured['GET /inventory']['queries'] > 0
+    assert measured['POST /login']['samples'] == 3
+    for r in measured.values():
+        assert r['p50_ms'] <= r['p95_ms'] <= r['p99_ms']
+    assert 'get_inventory' not in bench.unbenchmarked_endpoints(current)
+    assert 'get_locations' in bench.unbenchmarked_endpoints(current)
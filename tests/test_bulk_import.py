@@ -0,0 +1,77 @@
+import io
+import json
+import pytest
+from app import app, db, import_inventory, Family, Location, Store, MasterItem, Inventory, ItemCount
+from bulk_import import parse_import
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def make_family(name):
+    with app.app_context():
+        fam = Family(name=name)
+        db.session.add(fam)
+        db.session.commit()
+        return fam.id
+
+CSV = """Name,Location,Quantity,Aisle,Store
+  milk ,fridge,2,dairy,corner shop
+Eggs,Fridge,12,Dairy,Corner Shop;farm stand
+rice,pantry,,,
+,pantry,1,,
+beans,,1,,
+flour,pantry,lots,,
+"""
+
+def test_parse_normalizes_and_reports_bad_rows():
+    rows, errors = parse_import(CSV, 'csv')
+    assert [(r['name'], r['location'], r['quantity']) for r in rows] == [
+        ('Milk', 'Fridge', 2.0), ('Eggs', 'Fridge', 12.0), ('Rice', 'Pantry', 1.0)]
+    assert rows[1]['stores'] == ['Corner Shop', 'Farm Stand']
+    assert [e['line'] for e in errors] == [5, 6, 7]
+
+def test_import_creates_and_links_everything():
+    family_id = make_family('ImportFam')
+    with app.app_context():
+        summary = import_inventory(family_id, CSV.replace('corner shop', 'Importfam Corner').replace('Corner Shop;', 'Importfam Corner;'), 'csv')
+        assert summary['imported'] == 3
+        assert summary['rows'] == 6 and len(summary['errors']) == 3
+        assert summary['created'] == {'location': 2, 'aisle': 1, 'store': 2, 'master_item': 3}
+        assert sorted(l.name for l in Location.query.filter_by(family_id=family_id)) == ['Fridge', 'Pantry']
+        eggs = MasterItem.query.filter_by(family_id=family_id, name='Eggs').one()
+        assert eggs.aisle.name == 'Dairy'
+        assert sorted(s.name for s in eggs.stores) == ['Farm Stand', 'Importfam Corner']
+        fridge = Location.query.filter_by(family_id=family_id, name='Fridge').one()
+        # item_count triggers fire for bulk writes too
+        assert ItemCount.query.filter_by(scope='location', scope_id=fridge.id).one().item_count == 2
+
+def test_reimport_upserts_in_place():
+    family_id = make_family('ReimportFam')
+    with app.app_context():
+        import_inventory(family_id, 'name,location,quantity\nTea,Pantry,1\n', 'csv')
+        import_inventory(family_id, 'name,location,quantity\ntea,pantry,5\n', 'csv')
+        rows = Inventory.query.filter_by(family_id=family_id).all()
+        assert [r.quantity for r in rows] == [5.0]
+        import_inventory(family_id, json.dumps([{'name': 'Tea', 'location': 'Pantry', 'quantity': 2}]), 'json', mode='add')
+        db.session.expire_all()
+        assert Inventory.query.filter_by(family_id=family_id).one().quantity == 7.0
+        assert MasterItem.query.filter_by(family_id=family_id).count() == 1
+
+def test_store_names_are_per_family():
+    owner = make_family('StoreOwner')
+    family_id = make_family('StoreBorrower')
+    with app.app_context():
+        db.session.add(Store(name='Shared Mart', family_id=owner))
+        db.session.commit()
+        summary = import_inventory(family_id, 'name,location,store\nSoap,Bathroom,shared mart\nTape,Garage,\n', 'csv', chunk_size=1)
+        assert summary['imported'] == 2 and summary['errors'] == []
+        assert Store.query.filter_by(name='Shared Mart', family_id=family_id).count() == 1
+
+def test_upload_endpoint(client, signup_family):
+    signup_family(client, 'importer@example.com')
+    rv = client.post('/import/inventory', data={'file': (io.BytesIO(b'name,location,quantity\nSalt,Pantry,1\nPepper,Pantry,x\n'), 'stock.csv')})
+    assert rv.status_code == 200
+    body = rv.get_json()
+    assert body['imported'] == 1 and body['error_count'] == 1
+    assert [row['master_item']['name'] for row in client.get('/inventory').get_json()] == ['Salt']
+    assert client.post('/import/inventory', data='{"not": "a list"}', content_type='application/json').status_code == 400
+    assert client.post('/import/inventory?mode=merge', data='name,location\n').status_code == 400
@@ -0,0 +1,66 @@
+import gzip
+import pytest
+from app import app, db, MasterItem
+from compression import precompress_static
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def teardown_module(module):
+    app.config['COMPRESS_ENABLED'] = True
+
+def add_items(family_id, count):
+    with app.app_context():
+        db.session.add_all([MasterItem(name=f'Item {n}', family_id=family_id, notes='pantry staple') for n in range(count)])
+        db.session.commit()
+
+def test_large_json_is_gzipped(client, signup_family):
+    add_items(signup_family(client, 'gzipjson@example.com'), 200)
+    plain = client.get('/master-items')
+    rv = client.get('/master-items', headers={'Accept-Encoding': 'gzip'})
+    assert rv.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in rv.headers['Vary']
+    assert gzip.decompress(rv.data) == plain.data
+    assert len(rv.data) < 0.3 * len(plain.data)
+
+def test_small_and_unlisted_responses_are_left_alone(client, signup_family):
+    add_items(signup_family(client, 'gzipsmall@example.com'), 1)
+    small = client.get('/master-items', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+    assert 'Content-Encoding' not in client.get('/master-items').headers
+
+def test_html_pages_are_compressed(client, signup_family):
+    add_items(signup_family(client, 'gziphtml@example.com'), 1)
+    rv = client.get('/web/master-items', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert rv.status_code == 200
+    assert rv.headers['Content-Encoding'] == 'gzip'
+    assert b'<html' in gzip.decompress(rv.data).lower()
+
+def test_compression_can_be_disabled(client, signup_family):
+    add_items(signup_family(client, 'gzipoff@example.com'), 200)
+    app.config['COMPRESS_ENABLED'] = False
+    try:
+        rv = client.get('/master-items', headers={'Accept-Encoding': 'gzip'})
+    finally:
+        app.config['COMPRESS_ENABLED'] = True
+    assert 'Content-Encoding' not in rv.headers
+
+def test_precompressed_static_files(client, tmp_path):
+    css = tmp_path / 'site.css'
+    css.write_text('body { color: #333; }\n' * 100)
+    written = precompress_static(str(tmp_path), app.config)
+    assert str(css) + '.gz' in written
+
+    original_folder = app.static_folder
+    app.static_folder = str(tmp_path)
+    try:
+        rv = client.get('/static/site.css', headers={'Accept-Encoding': 'gzip'})
+        assert rv.headers['Content-Encoding'] == 'gzip'
+        assert rv.mimetype == 'text/css'
+        assert gzip.decompress(rv.data) == css.read_bytes()
+        rv.close()
+        plain = client.get('/static/site.css')
+        assert 'Content-Encoding' not in plain.headers
+        assert plain.data == css.read_bytes()
+        plain.close()
+    finally:
+        app.static_folder = original_folder
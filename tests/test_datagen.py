@@ -0,0 +1,80 @@
+import pytest
+from app import app, FamilyMember, Location, MasterItem, Inventory, ShoppingListItem, Store, ItemCount
+from datagen import TenantGenerator
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def family_contents(family_id):
+    with app.app_context():
+        items = {item.id: item.name for item in MasterItem.query.filter_by(family_id=family_id)}
+        locations = {location.id: location.name for location in Location.query.filter_by(family_id=family_id)}
+        return sorted((locations[row.location_id], items[row.master_item_id], row.quantity, row.last_updated)
+                      for row in Inventory.query.filter_by(family_id=family_id))
+
+def test_same_seed_generates_same_data(generate_families):
+    first = generate_families(3, seed=7, max_items=40)
+    second = generate_families(3, seed=7, max_items=40)
+    assert [f['counts'] for f in first['families']] == [f['counts'] for f in second['families']]
+    assert first['counts'] == second['counts']
+    for a, b in zip(first['families'], second['families']):
+        assert a['id'] != b['id']
+        assert family_contents(a['id']) == family_contents(b['id'])
+    other = generate_families(3, seed=8, max_items=40)
+    assert family_contents(other['families'][0]['id']) != family_contents(first['families'][0]['id'])
+
+def test_generated_rows_are_family_scoped(generate_families):
+    summary = generate_families(4, seed=3, max_items=30, max_stores=3)
+    with app.app_context():
+        for family in summary['families']:
+            family_id = family['id']
+            counts = family['counts']
+            assert FamilyMember.query.filter_by(family_id=family_id).count() == counts['users']
+            assert MasterItem.query.filter_by(family_id=family_id).count() == counts['master_items']
+            assert Inventory.query.filter_by(family_id=family_id).count() == counts['inventory']
+            assert Store.query.filter_by(family_id=family_id).count() == counts['stores']
+            for row in ShoppingListItem.query.filter_by(family_id=family_id):
+                assert row.item.family_id == family_id
+            # item_count triggers ran for the bulk inserts
+            total = sum(c.item_count for c in ItemCount.query.filter_by(family_id=family_id, scope='location'))
+            assert total == counts['inventory']
+
+def test_sizes_are_skewed():
+    generator = TenantGenerator({}, seed=1, max_items=1000, min_items=5)
+    items = sorted((size['master_items'] for size in generator.sizes(50)), reverse=True)
+    assert items[0] == 1000
+    assert items[len(items) // 2] < 50
+    assert sum(items[:5]) > sum(items[5:])
+    flat = TenantGenerator({}, seed=1, max_items=100, skew=0).sizes(5)
+    assert {size['master_items'] for size in flat} == {100}
+    with pytest.raises(ValueError):
+        TenantGenerator({}, max_widgets=3)
+
+def test_generated_users_can_log_in(generate_families, client):
+    summary = generate_families(2, seed=5, max_items=10, password='s3cret')
+    email = summary['families'][0]['users'][0]
+    assert client.post('/login', json={'email': email, 'password': 's3cret'}).status_code == 200
+    items = client.get('/master-items').get_json()
+    assert len(items) == summary['families'][0]['counts']['master_items']
+
+def test_seed_route_fills_only_the_current_family(client, signup_family):
+    signup_family(client, 'seeder@example.com')
+    assert client.get('/seed').status_code == 201
+    assert client.get('/seed').status_code == 200
+    assert len(client.get('/master-items').get_json()) == 50
+    assert [l['name'] for l in client.get('/locations').get_json()] == ['Freezer', 'Pantry', 'Refrigerator']
+    assert len(client.get('/inventory').get_json()) == 50
+    client.post('/logout')
+    signup_family(client, 'seeder2@example.com')
+    assert client.get('/master-items').get_json() == []
+    assert client.get('/seed').status_code == 201
+
+def test_seed_stores_keeps_names_per_family(client, signup_family):
+    signup_family(client, 'storeseed@example.com')
+    client.post('/stores', json={'name': 'Costco'})
+    assert client.get('/seed_stores').get_data(as_text=True) == 'Stores seeded.'
+    assert client.get('/seed_stores').get_data(as_text=True) == 'Already seeded.'
+    assert sorted(s['name'] for s in client.get('/stores').get_json()) == ['Costco', 'No Frills', 'Walmart']
+    client.post('/logout')
+    signup_family(client, 'storeseed2@example.com')
+    assert client.get('/seed_stores').get_data(as_text=True) == 'Stores seeded.'
+    assert sorted(s['name'] for s in client.get('/stores').get_json()) == ['Costco', 'No Frills', 'Walmart']
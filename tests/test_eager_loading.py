@@ -0,0 +1,68 @@
+import pytest
+from app import app, db, Location, Aisle, Store, MasterItem, Inventory, ShoppingListItem
+from tests.query_utils import assert_queries_do_not_scale
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+@pytest.fixture
+def engine():
+    with app.app_context():
+        return db.engine
+
+def add_rows(family_id, count, start=0):
+    """Add count items, each with its own location, aisle, store, stock and list entry."""
+    with app.app_context():
+        for n in range(start, start + count):
+            loc = Location(name=f'Shelf {n}', family_id=family_id)
+            aisle = Aisle(name=f'Aisle {n}', family_id=family_id)
+            store = Store(name=f'Store {family_id}-{n}', family_id=family_id)
+            db.session.add_all([loc, aisle, store])
+            db.session.flush()
+            item = MasterItem(name=f'Item {n}', family_id=family_id, aisle_id=aisle.id)
+            db.session.add(item)
+            db.session.flush()
+            db.session.add(Inventory(location_id=loc.id, master_item_id=item.id, quantity=n, family_id=family_id))
+            db.session.add(ShoppingListItem(item_id=item.id, family_id=family_id))
+        db.session.commit()
+
+@pytest.mark.parametrize('url', ['/inventory', '/shopping-list', '/master-items', '/locations', '/aisles', '/stores'])
+def test_list_endpoint_query_count_is_constant(client, signup_family, engine, url):
+    family_id = signup_family(client, f'eager{url.strip("/").replace("-", "")}@example.com')
+    add_rows(family_id, 2)
+    assert_queries_do_not_scale(
+        engine,
+        lambda: client.get(url),
+        lambda: add_rows(family_id, 20, start=2),
+    )
+    assert len(client.get(url).get_json()) == 22
+
+def test_inventory_rows_include_nested_objects(client, signup_family):
+    family_id = signup_family(client, 'eagernested@example.com')
+    add_rows(family_id, 3)
+    rows = client.get('/inventory').get_json()
+    assert sorted(r['master_item']['name'] for r in rows) == ['Item 0', 'Item 1', 'Item 2']
+    assert all(r['location']['name'].startswith('Shelf') for r in rows)
+
+def test_web_inventory_loads_items_with_the_rows(client, signup_family, engine):
+    family_id = signup_family(client, 'eagerweb@example.com')
+    with app.app_context():
+        loc = Location(name='Pantry', family_id=family_id)
+        db.session.add(loc)
+        db.session.commit()
+        loc_id = loc.id
+
+    def stock(start, count):
+        with app.app_context():
+            for n in range(start, start + count):
+                item = MasterItem(name=f'Can {n}', family_id=family_id)
+                db.session.add(item)
+                db.session.flush()
+                db.session.add(Inventory(location_id=loc_id, master_item_id=item.id, quantity=1, family_id=family_id))
+            db.session.commit()
+
+    stock(0, 2)
+    assert_queries_do_not_scale(
+        engine,
+        lambda: client.get(f'/web/inventory?location_id={loc_id}'),
+        lambda: stock(2, 10),
+    )
@@ -0,0 +1,57 @@
+import pytest
+from app import app, db, get_family_data_version, mark_family_changed, Location, FamilyMember
+from tests.query_utils import count_queries
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def test_unchanged_collection_is_a_304_without_dumping(client, signup_family, engine):
+    signup_family(client, 'etag304@example.com')
+    client.post('/locations', json={'name': 'Pantry'})
+    first = client.get('/locations')
+    assert first.status_code == 200
+    assert first.headers['ETag'].startswith('W/"')
+    assert 'Last-Modified' in first.headers
+
+    with count_queries(engine) as statements:
+        again = client.get('/locations', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert not any('FROM location' in sql for sql in statements)
+
+def test_orm_and_core_writes_change_the_etag(client, signup_family):
+    signup_family(client, 'etagwrites@example.com')
+    etag = client.get('/inventory').headers['ETag']
+    loc_id = client.post('/locations', json={'name': 'Fridge'}).get_json()['id']
+    item_id = client.post('/master-items', json={'name': 'Milk'}).get_json()['id']
+    after_orm = client.get('/inventory').headers['ETag']
+    assert after_orm != etag
+
+    inv = client.post('/inventory', json={'location_id': loc_id, 'master_item_id': item_id, 'quantity': 1}).get_json()
+    after_upsert = client.get('/inventory', headers={'If-None-Match': after_orm})
+    assert after_upsert.status_code == 200
+    assert after_upsert.headers['ETag'] != after_orm
+
+    client.post(f"/inventory/{inv['id']}/adjust", json={'delta': 1})
+    assert client.get('/inventory', headers={'If-None-Match': after_upsert.headers['ETag']}).status_code == 200
+
+def test_versions_are_per_family(client, signup_family):
+    family_a = signup_family(client, 'etaga@example.com')
+    etag_a = client.get('/master-items').headers['ETag']
+    client.post('/logout')
+    signup_family(client, 'etagb@example.com')
+    client.post('/master-items', json={'name': 'Bread'})
+    client.post('/logout')
+    client.post('/login', json={'email': 'etaga@example.com', 'password': 'pw'})
+    assert client.get('/master-items', headers={'If-None-Match': etag_a}).status_code == 304
+    with app.app_context():
+        assert get_family_data_version(family_a)[0] >= 1
+
+def test_rollback_does_not_bump():
+    with app.app_context():
+        family_id = FamilyMember.query.first().family_id
+        before = get_family_data_version(family_id)
+        db.session.add(Location(name='Attic', family_id=family_id))
+        db.session.flush()
+        mark_family_changed(family_id)
+        db.session.rollback()
+        assert get_family_data_version(family_id) == before
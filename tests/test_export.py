@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+import pytest
+from datetime import datetime
+from app import app, db, Location, Aisle, Store, MasterItem, Inventory
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def add_stock(family_id):
+    with app.app_context():
+        pantry = Location(name='Pantry', family_id=family_id)
+        dairy = Aisle(name='Dairy', family_id=family_id)
+        shops = [Store(name='Corner shop', family_id=family_id), Store(name='Market', family_id=family_id)]
+        db.session.add_all([pantry, dairy] + shops)
+        db.session.flush()
+        milk = MasterItem(name='Milk', family_id=family_id, aisle_id=dairy.id, default_unit='l')
+        milk.stores.extend(shops)
+        rice = MasterItem(name='Rice', family_id=family_id)
+        db.session.add_all([milk, rice])
+        db.session.flush()
+        db.session.add_all([
+            Inventory(location_id=pantry.id, master_item_id=milk.id, quantity=2, family_id=family_id,
+                      last_updated=datetime(2024, 1, 1, 9, 0)),
+            Inventory(location_id=pantry.id, master_item_id=rice.id, quantity=1.5, family_id=family_id,
+                      last_updated=datetime(2024, 3, 1, 9, 0)),
+        ])
+        db.session.commit()
+
+def test_csv_export_streams_joined_names(client, signup_family):
+    add_stock(signup_family(client, 'exportcsv@example.com'))
+    rv = client.get('/export/inventory.csv')
+    assert rv.status_code == 200
+    assert rv.is_streamed
+    assert rv.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(rv.get_data(as_text=True))))
+    by_item = {row['item']: row for row in rows}
+    assert set(by_item) == {'Milk', 'Rice'}
+    milk = by_item['Milk']
+    assert milk['location'] == 'Pantry' and milk['aisle'] == 'Dairy' and milk['unit'] == 'l'
+    assert sorted(milk['stores'].split(', ')) == ['Corner shop', 'Market']
+    assert milk['quantity'] == '2.0'
+    assert by_item['Rice']['aisle'] == '' and by_item['Rice']['stores'] == ''
+
+def test_ndjson_export_and_since_filter(client, signup_family):
+    add_stock(signup_family(client, 'exportndjson@example.com'))
+    rv = client.get('/export/inventory.ndjson')
+    assert rv.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in rv.get_data(as_text=True).splitlines()]
+    assert {row['item'] for row in rows} == {'Milk', 'Rice'}
+    assert rows[0].keys() == {'id', 'location', 'item', 'quantity', 'unit', 'aisle', 'stores', 'last_updated'}
+
+    recent = client.get('/export/inventory.ndjson?since=2024-02-01T00:00:00').get_data(as_text=True).splitlines()
+    assert [json.loads(line)['item'] for line in recent] == ['Rice']
+    aware = client.get('/export/inventory.ndjson?since=2024-02-01T00:00:00%2B00:00').get_data(as_text=True)
+    assert aware.count('\n') == 1
+
+def test_export_is_family_scoped_and_validated(client, signup_family):
+    add_stock(signup_family(client, 'exportscope1@example.com'))
+    client.post('/logout')
+    signup_family(client, 'exportscope2@example.com')
+    assert client.get('/export/inventory.csv').get_data(as_text=True).strip() == \
+        'id,location,item,quantity,unit,aisle,stores,last_updated'
+    assert client.get('/export/inventory.ndjson?since=yesterday').status_code == 400
+    assert client.get('/export/inventory.xml').status_code == 404
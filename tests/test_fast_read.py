@@ -0,0 +1,73 @@
+import pytest
+from datetime import datetime
+from app import app, db, InventorySchema, Location, Aisle, Store, MasterItem, Inventory
+import fast_read
+from fast_read import FastReader
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def teardown_module(module):
+    app.config['FAST_READ_ENABLED'] = True
+
+def populate(family_id):
+    with app.app_context():
+        pantry = Location(name='Pantry', family_id=family_id)
+        fridge = Location(name='Fridge', family_id=family_id)
+        dairy = Aisle(name='Dairy', family_id=family_id)
+        store = Store(name=f'Corner Shop {family_id}', family_id=family_id)
+        db.session.add_all([pantry, fridge, dairy, store])
+        db.session.flush()
+        milk = MasterItem(name='Milk', family_id=family_id, aisle_id=dairy.id, default_unit='l', notes='whole')
+        rice = MasterItem(name='Rice', family_id=family_id)
+        milk.stores.append(store)
+        db.session.add_all([milk, rice])
+        db.session.flush()
+        db.session.add_all([
+            Inventory(location_id=fridge.id, master_item_id=milk.id, quantity=1.5, family_id=family_id),
+            Inventory(location_id=pantry.id, master_item_id=rice.id, quantity=2, family_id=family_id,
+                      last_updated=datetime(2024, 5, 1, 12, 30, 15, 250)),
+        ])
+        db.session.commit()
+
+@pytest.mark.parametrize('url', ['/inventory', '/master-items', '/locations', '/aisles', '/stores'])
+def test_fast_path_matches_schema_output(client, signup_family, url):
+    email = f'fast{url.strip("/").replace("-", "")}@example.com'
+    populate(signup_family(client, email))
+
+    app.config['FAST_READ_ENABLED'] = False
+    expected = client.get(url).get_data(as_text=True)
+    app.config['FAST_READ_ENABLED'] = True
+    fast = client.get(url).get_data(as_text=True)
+    assert fast == expected
+    assert len(client.get(url).get_json()) >= 1
+
+def test_reader_projects_only_schema_columns():
+    reader = FastReader(InventorySchema, Inventory.__table__, nested={
+        'location': Location.__table__,
+        'master_item': MasterItem.__table__,
+    })
+    columns = [column.name for column in reader.select().selected_columns]
+    assert 'inventory_quantity' in columns
+    assert 'master_item_notes' in columns
+    # location and master item keys are only selected once each for the None check
+    assert len(columns) == 6 + 1 + 3 + 1 + 6
+    row = {'inventory_id': 1, 'inventory_location_id': 2, 'inventory_master_item_id': 3,
+           'inventory_quantity': 2, 'inventory_last_updated': None, 'inventory_family_id': 4}
+    values = [row.get(name) for name in columns]
+    assert reader.to_dict(values) == {
+        'id': 1, 'location_id': 2, 'master_item_id': 3, 'quantity': 2.0, 'last_updated': None,
+        'family_id': 4, 'location': None, 'master_item': None,
+    }
+
+def test_restricted_readers_are_bounded(monkeypatch):
+    monkeypatch.setattr(fast_read, 'RESTRICTED_READERS', 2)
+    reader = FastReader(InventorySchema, Inventory.__table__, nested={
+        'location': Location.__table__,
+        'master_item': MasterItem.__table__,
+    })
+    first = reader.restrict(frozenset({'id', 'quantity'}))
+    assert reader.restrict(frozenset({'id', 'quantity'})) is first
+    reader.restrict(frozenset({'id', 'location_id'}))
+    reader.restrict(frozenset({'id', 'family_id'}))
+    assert len(reader._restricted._data) == 2
+    assert reader.restrict(frozenset({'id', 'quantity'})) is not first
@@ -0,0 +1,30 @@
+import pytest
+from app import app, db, explain_query_plan
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def index_names():
+    with db.engine.connect() as connection:
+        return {row[0] for row in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+def test_hot_lookups_use_indexes():
+    with app.app_context():
+        with db.engine.connect() as connection:
+            plan = ' '.join(explain_query_plan(connection, "SELECT family_id FROM family_member WHERE user_id = 1"))
+            assert 'ix_family_member_user_family' in plan
+            plan = ' '.join(explain_query_plan(connection, "SELECT id FROM master_item WHERE name = 'Milk' AND family_id = 1"))
+            assert 'ix_master_item_family_name' in plan
+            plan = ' '.join(explain_query_plan(connection, "SELECT id FROM invitation WHERE token = 'x' AND status = 'pending'"))
+            assert 'ix_invitation_token_status' in plan
+
+def test_ensure_indexes_recreates_missing_indexes():
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql("DROP INDEX ix_location_family_name")
+        assert 'ix_location_family_name' not in index_names()
+    result = app.test_cli_runner().invoke(args=['ensure-indexes'])
+    assert result.exit_code == 0, result.output
+    assert 'Query plans before:' in result.output
+    assert 'ix_location_family_name' in result.output
+    with app.app_context():
+        assert 'ix_location_family_name' in index_names()
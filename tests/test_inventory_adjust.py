@@ -0,0 +1,75 @@
+import pytest
+from app import parse_delta
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def create_inventory(client, quantity):
+    loc_id = client.post('/locations', json={'name': 'Pantry'}).get_json()['id']
+    item_id = client.post('/master-items', json={'name': 'Soup'}).get_json()['id']
+    inv = client.post('/inventory', json={'location_id': loc_id, 'master_item_id': item_id, 'quantity': quantity}).get_json()
+    return inv['id'], loc_id
+
+def test_parse_delta():
+    assert parse_delta('+2') == 2
+    assert parse_delta('-1') == -1
+    assert parse_delta('abc') is None
+    assert parse_delta(None) is None
+    assert parse_delta('nan') is None
+
+def test_json_adjust_returns_new_quantity(client, signup_family):
+    signup_family(client, 'adjust1@example.com')
+    inv_id, _ = create_inventory(client, 2)
+    rv = client.post(f'/inventory/{inv_id}/adjust', json={'delta': '+3'})
+    assert rv.status_code == 200
+    assert rv.get_json()['quantity'] == 5
+    rv = client.post(f'/inventory/{inv_id}/adjust', json={'delta': '-10'})
+    assert rv.get_json()['quantity'] == 0
+
+def test_form_adjust_redirects_to_location(client, signup_family):
+    signup_family(client, 'adjust2@example.com')
+    inv_id, loc_id = create_inventory(client, 1)
+    rv = client.post(f'/inventory/{inv_id}/adjust', data={'delta': '+1'})
+    assert rv.status_code == 302
+    assert f'location_id={loc_id}' in rv.headers['Location']
+    rv = client.post(f'/inventory/{inv_id}/adjust', data={'delta': '+1'})
+    assert client.get(f'/inventory/{inv_id}').get_json()['quantity'] == 3
+
+def test_patch_accepts_delta(client, signup_family):
+    signup_family(client, 'adjust3@example.com')
+    inv_id, _ = create_inventory(client, 4)
+    rv = client.patch(f'/inventory/{inv_id}', json={'delta': '-1'})
+    assert rv.status_code == 200
+    assert rv.get_json()['quantity'] == 3
+    assert rv.get_json()['id'] == inv_id
+
+def test_patch_rejects_missing_rows_and_bodies(client, signup_family):
+    signup_family(client, 'adjust7@example.com')
+    inv_id, _ = create_inventory(client, 1)
+    assert client.patch('/inventory/999999', json={'delta': '+1'}).status_code == 404
+    for body in ('null', '[1]', '5'):
+        rv = client.patch(f'/inventory/{inv_id}', data=body, content_type='application/json')
+        assert rv.status_code == 400
+        assert 'error' in rv.get_json()
+
+def test_adjust_is_family_scoped(client, signup_family):
+    signup_family(client, 'adjust4@example.com')
+    inv_id, _ = create_inventory(client, 1)
+    client.post('/logout')
+    signup_family(client, 'adjust5@example.com')
+    rv = client.post(f'/inventory/{inv_id}/adjust', json={'delta': '+1'})
+    assert rv.status_code == 404
+
+def test_malformed_requests_get_errors_not_500(client, signup_family):
+    signup_family(client, 'adjust6@example.com')
+    inv_id, _ = create_inventory(client, 1)
+    for body in ([1], 5, {}, {'delta': 'lots'}):
+        rv = client.post(f'/inventory/{inv_id}/adjust', json=body)
+        assert rv.status_code == 400
+        assert 'error' in rv.get_json()
+    rv = client.post(f'/inventory/{inv_id}/adjust', data={'delta': 'lots'})
+    assert rv.status_code == 302
+    assert 'error=' in rv.headers['Location']
+    rv = client.post('/inventory/999999/adjust', data={'delta': '+1'})
+    assert rv.status_code == 302
+    assert 'error=' in rv.headers['Location']
+    assert client.get(f'/inventory/{inv_id}').get_json()['quantity'] == 1
@@ -0,0 +1,83 @@
+import pytest
+from app import app, db, upsert_inventory, Family, Location, MasterItem, Inventory
+from tests.query_utils import count_queries
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def make_family(name):
+    fam = Family(name=name)
+    db.session.add(fam)
+    db.session.flush()
+    loc = Location(name='Pantry', family_id=fam.id)
+    item = MasterItem(name='Rice', family_id=fam.id)
+    db.session.add_all([loc, item])
+    db.session.commit()
+    return fam.id, loc.id, item.id
+
+def test_set_and_add_modes():
+    with app.app_context():
+        fam_id, loc_id, item_id = make_family('UpsertFam')
+        row = upsert_inventory(fam_id, loc_id, item_id, 2, mode='set')
+        db.session.commit()
+        assert row.quantity == 2
+        assert row.inserted and row.item_name == 'Rice'
+        row2 = upsert_inventory(fam_id, loc_id, item_id, 3, mode='add')
+        db.session.commit()
+        assert row2.id == row.id
+        assert row2.quantity == 5
+        assert not row2.inserted
+        row3 = upsert_inventory(fam_id, loc_id, item_id, 1, mode='set')
+        db.session.commit()
+        assert row3.quantity == 1
+        assert Inventory.query.filter_by(location_id=loc_id, master_item_id=item_id).count() == 1
+
+def test_upsert_is_a_single_statement():
+    with app.app_context():
+        fam_id, loc_id, item_id = make_family('UpsertFam2')
+        with count_queries(db.engine) as statements:
+            upsert_inventory(fam_id, loc_id, item_id, 1, mode='add')
+        db.session.commit()
+        assert len(statements) == 1
+        assert 'ON CONFLICT' in statements[0]
+
+def test_other_familys_location_is_rejected():
+    with app.app_context():
+        fam_a, loc_a, item_a = make_family('UpsertA')
+        fam_b, loc_b, item_b = make_family('UpsertB')
+        assert upsert_inventory(fam_a, loc_b, item_a, 1) is None
+        assert upsert_inventory(fam_a, loc_a, item_b, 1) is None
+        db.session.commit()
+        assert Inventory.query.filter_by(family_id=fam_a).count() == 0
+
+def test_api_post_twice_updates_the_same_row(client, signup_family):
+    signup_family(client, 'upsert@example.com')
+    loc_id = client.post('/locations', json={'name': 'Shelf'}).get_json()['id']
+    item_id = client.post('/master-items', json={'name': 'Beans'}).get_json()['id']
+    first = client.post('/inventory', json={'location_id': loc_id, 'master_item_id': item_id, 'quantity': 2})
+    second = client.post('/inventory', json={'location_id': loc_id, 'master_item_id': item_id, 'quantity': 4})
+    assert first.status_code == 201 and second.status_code == 200
+    assert first.get_json()['id'] == second.get_json()['id']
+    assert second.get_json()['quantity'] == 4
+    assert second.get_json()['master_item_id'] == item_id
+
+def test_create_and_add_increments_existing_item(client, signup_family):
+    signup_family(client, 'upsert2@example.com')
+    loc_id = client.post('/locations', json={'name': 'Cupboard'}).get_json()['id']
+    for _ in range(3):
+        rv = client.post('/web/inventory/create-and-add', data={'new_item_name': 'pasta', 'location_id': loc_id})
+        assert rv.status_code == 302
+    inventory = client.get('/inventory').get_json()
+    assert [inv['quantity'] for inv in inventory if inv['master_item']['name'] == 'Pasta'] == [3]
+
+def test_web_inventory_reports_add_and_update(client, signup_family, engine):
+    signup_family(client, 'upsertweb@example.com')
+    loc_id = client.post('/locations', json={'name': 'Cellar'}).get_json()['id']
+    item_id = client.post('/master-items', json={'name': 'Lentils'}).get_json()['id']
+    form = {'location_id': loc_id, 'master_item_id': item_id, 'quantity': 2}
+    rv = client.post('/web/inventory', data=form)
+    assert 'Item+added+to+inventory' in rv.headers['Location']
+    with count_queries(engine) as statements:
+        rv = client.post('/web/inventory', data=dict(form, quantity=5))
+    assert 'Updated+Lentils+in+inventory' in rv.headers['Location']
+    inventory_statements = [s for s in statements if 'inventory' in s]
+    assert len(inventory_statements) == 1 and 'ON CONFLICT' in inventory_statements[0]
@@ -0,0 +1,79 @@
+import pytest
+from app import app, db, get_item_counts, rebuild_item_counts, Family, Location, Aisle, Store, MasterItem, Inventory, ItemCount
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+@pytest.fixture
+def family():
+    with app.app_context():
+        fam = Family(name='CountFam')
+        db.session.add(fam)
+        db.session.flush()
+        pantry = Location(name='Pantry', family_id=fam.id)
+        fridge = Location(name='Fridge', family_id=fam.id)
+        aisle = Aisle(name='Dairy', family_id=fam.id)
+        store = Store(name=f'Store {fam.id}', family_id=fam.id)
+        db.session.add_all([pantry, fridge, aisle, store])
+        db.session.commit()
+        return {'id': fam.id, 'pantry': pantry.id, 'fridge': fridge.id, 'aisle': aisle.id, 'store': store.id}
+
+def test_location_counts_follow_inventory(family):
+    with app.app_context():
+        milk = MasterItem(name='Milk', family_id=family['id'])
+        eggs = MasterItem(name='Eggs', family_id=family['id'])
+        db.session.add_all([milk, eggs])
+        db.session.flush()
+        inv = Inventory(location_id=family['pantry'], master_item_id=milk.id, quantity=1, family_id=family['id'])
+        db.session.add_all([inv, Inventory(location_id=family['pantry'], master_item_id=eggs.id, quantity=6, family_id=family['id'])])
+        db.session.commit()
+        assert get_item_counts('location', [family['pantry']]) == {family['pantry']: 2}
+
+        inv.location_id = family['fridge']
+        db.session.commit()
+        counts = get_item_counts('location', [family['pantry'], family['fridge']])
+        assert counts == {family['pantry']: 1, family['fridge']: 1}
+
+        db.session.delete(inv)
+        db.session.commit()
+        assert get_item_counts('location', [family['fridge']]) == {family['fridge']: 0}
+
+def test_store_and_aisle_counts(family):
+    with app.app_context():
+        store = db.session.get(Store, family['store'])
+        item = MasterItem(name='Cheese', family_id=family['id'], aisle_id=family['aisle'])
+        item.stores.append(store)
+        db.session.add(item)
+        db.session.commit()
+        assert get_item_counts('store', [store.id]) == {store.id: 1}
+        assert get_item_counts('aisle', [family['aisle']]) == {family['aisle']: 1}
+
+        item.aisle_id = None
+        item.stores.remove(store)
+        db.session.commit()
+        assert get_item_counts('store', [store.id]) == {store.id: 0}
+        assert get_item_counts('aisle', [family['aisle']]) == {family['aisle']: 0}
+
+def test_deleting_location_removes_its_count_row(family):
+    with app.app_context():
+        item = MasterItem(name='Butter', family_id=family['id'])
+        db.session.add(item)
+        db.session.flush()
+        db.session.add(Inventory(location_id=family['pantry'], master_item_id=item.id, quantity=1, family_id=family['id']))
+        db.session.commit()
+        db.session.delete(db.session.get(Location, family['pantry']))
+        db.session.commit()
+        assert ItemCount.query.filter_by(scope='location', scope_id=family['pantry']).first() is None
+
+def test_rebuild_matches_trigger_counts(family):
+    with app.app_context():
+        item = MasterItem(name='Yogurt', family_id=family['id'], aisle_id=family['aisle'])
+        db.session.add(item)
+        db.session.flush()
+        db.session.add(Inventory(location_id=family['pantry'], master_item_id=item.id, quantity=1, family_id=family['id']))
+        db.session.commit()
+        before = {(c.scope, c.scope_id): c.item_count for c in ItemCount.query.all() if c.item_count}
+        with db.engine.begin() as connection:
+            rebuild_item_counts(connection)
+        db.session.expire_all()
+        after = {(c.scope, c.scope_id): c.item_count for c in ItemCount.query.all() if c.item_count}
+        assert before == after
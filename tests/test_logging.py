@@ -0,0 +1,113 @@
+import io
+import json
+import logging
+import random
+import pytest
+from flask import Flask
+from app import app, db
+from structured_logging import init_logging, parse_levels, DebugSamplingFilter, RequestQueueHandler
+from tests.query_utils import count_queries
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+@pytest.fixture
+def logged():
+    """A separate app whose 'structured_test' logger writes JSON lines to a buffer."""
+    stream = io.StringIO()
+    test_app = Flask(__name__)
+    structured = init_logging(test_app, logging.getLogger('structured_test'), stream)
+    log = logging.getLogger('structured_test.views')
+
+    @test_app.route('/hello')
+    def hello():
+        log.info('Saying hello', extra={'family_id': 7})
+        return 'hello'
+
+    @test_app.route('/fail')
+    def fail():
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            log.exception('Division failed')
+        return 'failed'
+
+    def lines():
+        structured.flush()
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    yield test_app, log, lines
+    structured.close()
+
+def test_records_are_json_lines_with_request_id(logged):
+    test_app, log, lines = logged
+    rv = test_app.test_client().get('/hello')
+    log.warning('Outside a request')
+    inside, outside = lines()
+    assert inside['message'] == 'Saying hello'
+    assert inside['level'] == 'INFO'
+    assert inside['logger'] == 'structured_test.views'
+    assert inside['family_id'] == 7
+    assert inside['request_id'] == rv.headers['X-Request-ID']
+    assert 'request_id' not in outside
+
+def test_supplied_request_id_is_reused_only_when_well_formed(logged):
+    test_app, log, lines = logged
+    client = test_app.test_client()
+    assert client.get('/hello', headers={'X-Request-ID': 'edge-42.a'}).headers['X-Request-ID'] == 'edge-42.a'
+    replaced = client.get('/hello', headers={'X-Request-ID': 'bad id; x=<script>'}).headers['X-Request-ID']
+    assert replaced != 'bad id; x=<script>'
+    assert [line['request_id'] for line in lines()] == ['edge-42.a', replaced]
+
+def test_exceptions_are_logged_with_traceback(logged):
+    test_app, log, lines = logged
+    test_app.test_client().get('/fail')
+    entry, = lines()
+    assert entry['level'] == 'ERROR'
+    assert 'ZeroDivisionError' in entry['exception']
+
+def test_debug_records_are_sampled():
+    sampler = DebugSamplingFilter(0.1, random.Random(1))
+    debug = [logging.makeLogRecord({'levelno': logging.DEBUG}) for _ in range(1000)]
+    kept = sum(sampler.filter(record) for record in debug)
+    assert 50 < kept < 150
+    assert sampler.filter(logging.makeLogRecord({'levelno': logging.INFO}))
+    assert not sampler.filter(logging.makeLogRecord({'levelno': logging.DEBUG, 'sample_rate': 0}))
+    assert DebugSamplingFilter(0).filter(logging.makeLogRecord({'levelno': logging.DEBUG, 'sample_rate': 1}))
+
+def test_per_logger_levels():
+    assert parse_levels('homeinventory.mail=debug, werkzeug=WARNING,') == {
+        'homeinventory.mail': 'DEBUG', 'werkzeug': 'WARNING'}
+    with pytest.raises(ValueError):
+        parse_levels('homeinventory.mail=LOUD')
+    test_app = Flask(__name__)
+    test_app.config['LOG_LEVELS'] = 'structured_levels.quiet=ERROR'
+    structured = init_logging(test_app, logging.getLogger('structured_levels'), io.StringIO())
+    try:
+        assert logging.getLogger('structured_levels').getEffectiveLevel() == logging.INFO
+        assert logging.getLogger('structured_levels.quiet').getEffectiveLevel() == logging.ERROR
+    finally:
+        structured.close()
+
+def test_importing_the_app_leaves_root_logging_alone():
+    assert not any(isinstance(h, RequestQueueHandler) for h in logging.getLogger().handlers)
+    assert any(isinstance(h, RequestQueueHandler) for h in logging.getLogger('homeinventory').handlers)
+
+def test_app_responses_carry_request_id(client):
+    rv = client.get('/auth')
+    assert len(rv.headers['X-Request-ID']) == 32
+
+def test_invitation_tokens_are_not_logged(client, caplog):
+    caplog.set_level(logging.DEBUG, logger='homeinventory')
+    client.post('/signup', json={'email': 'logtoken@example.com', 'password': 'pw', 'invite_token': 'secret-token-123'})
+    client.get('/invite/accept?token=secret-token-456')
+    assert 'Signup with an invalid invitation token' in caplog.text
+    assert 'secret-token' not in caplog.text
+
+def test_adding_a_location_reads_only_its_family(client, signup_family):
+    signup_family(client, 'loglocations@example.com')
+    with app.app_context():
+        engine = db.engine
+    with count_queries(engine) as statements:
+        client.post('/web/locations', data={'name': 'attic'})
+    location_reads = [s for s in statements if s.startswith('SELECT') and 'FROM location' in s]
+    assert location_reads and all('family_id' in s for s in location_reads)
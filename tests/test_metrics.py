@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import threading
+import time
+import pytest
+from sqlalchemy.exc import OperationalError
+from app import app, db, metrics as app_metrics
+import metrics as metrics_module
+from metrics import Metrics
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def teardown_module(module):
+    app.config['METRICS_TOKEN'] = None
+
+def samples(text):
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            values[name] = float(value)
+    return values
+
+def test_requests_sql_and_caches_are_exported(client, signup_family):
+    signup_family(client, 'metrics@example.com')
+    client.get('/locations')
+    client.get('/web/locations')
+    client.get('/web/locations')
+    rv = client.get('/metrics')
+    assert rv.status_code == 200
+    assert rv.mimetype == 'text/plain'
+    text = rv.get_data(as_text=True)
+    assert '# TYPE homeinventory_http_request_duration_seconds histogram' in text
+    values = samples(text)
+    assert values['homeinventory_http_requests_total{endpoint="get_locations",method="GET",status="200"}'] >= 1
+    assert values['homeinventory_http_request_duration_seconds_count{endpoint="web_locations"}'] >= 2
+    assert values['homeinventory_http_request_duration_seconds_bucket{endpoint="web_locations",le="+Inf"}'] >= 2
+    assert values['homeinventory_sql_queries_total{endpoint="get_locations"}'] >= 1
+    assert values['homeinventory_sql_query_duration_seconds_count'] >= 1
+    assert values['homeinventory_cache_hits_total{cache="nav"}'] >= 1
+    assert 0 < values['homeinventory_cache_hit_ratio{cache="nav"}'] <= 1
+
+def test_histogram_buckets_are_cumulative():
+    m = Metrics()
+    for value in (0.001, 0.02, 0.02, 7.0, 30.0):
+        m.observe('homeinventory_http_request_duration_seconds', value, endpoint='x')
+    values = samples(m.render())
+    bucket = 'homeinventory_http_request_duration_seconds_bucket{{endpoint="x",le="{}"}}'
+    assert values[bucket.format('0.005')] == 1
+    assert values[bucket.format('0.025')] == 3
+    assert values[bucket.format('10.0')] == 4
+    assert values[bucket.format('+Inf')] == 5
+    assert values['homeinventory_http_request_duration_seconds_count{endpoint="x"}'] == 5
+    assert values['homeinventory_http_request_duration_seconds_sum{endpoint="x"}'] == pytest.approx(37.041)
+
+def test_worker_files_are_summed(tmp_path, monkeypatch):
+    worker = Metrics(str(tmp_path), flush_interval=60)
+    monkeypatch.setattr(metrics_module.os, 'getpid', lambda: 1001)
+    worker.inc('homeinventory_http_requests_total', endpoint='index', method='GET', status='200')
+    worker.observe('homeinventory_mailjet_send_duration_seconds', 0.3)
+    worker.flush()
+    worker.inc('homeinventory_http_requests_total', endpoint='index', method='GET', status='200')  # not flushed yet
+    monkeypatch.setattr(metrics_module.os, 'getpid', lambda: 1002)
+    other = Metrics(str(tmp_path))
+    other.inc('homeinventory_http_requests_total', 2, endpoint='index', method='GET', status='200')
+    other.inc('homeinventory_mailjet_send_failures_total', reason='http_500')
+    values = samples(other.render())
+    assert values['homeinventory_http_requests_total{endpoint="index",method="GET",status="200"}'] == 3
+    assert values['homeinventory_mailjet_send_duration_seconds_count'] == 1
+    assert values['homeinventory_mailjet_send_failures_total{reason="http_500"}'] == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['metrics_1001.json']
+
+def test_sqlite_busy_errors_are_counted():
+    with app.app_context():
+        engine = db.engine
+    locker = sqlite3.connect(engine.url.database)
+    locker.execute('BEGIN EXCLUSIVE')
+    try:
+        with engine.connect() as conn:
+            conn.exec_driver_sql('PRAGMA busy_timeout=0')
+            with pytest.raises(OperationalError):
+                conn.exec_driver_sql("INSERT INTO family (name) VALUES ('Locked out')")
+            conn.invalidate()
+    finally:
+        locker.rollback()
+        locker.close()
+    assert samples(app_metrics.render())['homeinventory_sqlite_busy_errors_total{endpoint="none"}'] >= 1
+
+def test_token_protects_metrics(client):
+    app.config['METRICS_TOKEN'] = 's3cret'
+    try:
+        assert client.get('/metrics').status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer s3cret'}).status_code == 200
+    finally:
+        app.config['METRICS_TOKEN'] = None
+
+def test_metrics_need_a_token_in_production(client, monkeypatch):
+    monkeypatch.setenv('FLASK_ENV', 'production')
+    assert client.get('/metrics').status_code == 404
+    app.config['METRICS_TOKEN'] = 's3cret'
+    try:
+        assert client.get('/metrics', headers={'Authorization': 'Bearer s3cret'}).status_code == 200
+    finally:
+        app.config['METRICS_TOKEN'] = None
+
+def test_flusher_thread_writes_the_worker_file(tmp_path):
+    worker = Metrics(str(tmp_path), flush_interval=0.01)
+    worker.inc('homeinventory_http_requests_total', endpoint='index', method='GET', status='200')
+    worker.start_flusher()
+    worker.start_flusher()
+    try:
+        assert sum(t.name == 'metrics-flush' for t in threading.enumerate()) >= 1
+        deadline = time.monotonic() + 5
+        while not list(tmp_path.glob('metrics_*.json')) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [p.name for p in tmp_path.iterdir() if p.suffix == '.json'] == [f'metrics_{os.getpid()}.json']
+    finally:
+        worker.stop_flusher()
+
+class FakeMailjet:
+    def __init__(self, status_code):
+        self.send = self
+        self.status_code = status_code
+
+    def create(self, data):
+        return self
+
+    def json(self):
+        return {}
+
+def test_mailjet_sends_are_timed_and_failures_counted(monkeypatch):
+    import app as app_module
+    monkeypatch.setitem(app.config, 'MAILJET_API_KEY', 'key')
+    monkeypatch.setitem(app.config, 'MAILJET_SECRET_KEY', 'secret')
+    before = samples(app_metrics.render())
+    monkeypatch.setattr(app_module, 'mailjet', FakeMailjet(500))
+    with app.test_request_context():
+        assert app_module.send_password_reset_email('someone@example.com', 'http://localhost/reset/x') is False
+        monkeypatch.setattr(app_module, 'mailjet', FakeMailjet(200))
+        app_module.send_password_reset_email('someone@example.com', 'http://localhost/reset/x')
+    after = samples(app_metrics.render())
+    count = 'homeinventory_mailjet_send_duration_seconds_count'
+    assert after[count] - before.get(count, 0) == 2
+    failures = 'homeinventory_mailjet_send_failures_total{reason="http_500"}'
+    assert after[failures] - before.get(failures, 0) == 1
@@ -0,0 +1,85 @@
+import pytest
+from app import app, db, nav_cache, get_nav_locations, bump_family_versions, Family, Location, MasterItem, Inventory
+from caching import LRUCache
+from tests.query_utils import count_queries
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def setup_module(module):
+    # Family ids and versions restart with the tables, so entries from other modules would match
+    nav_cache.clear()
+
+def teardown_module(module):
+    app.config['NAV_CACHE_ENABLED'] = True
+
+@pytest.fixture
+def family_id():
+    with app.app_context():
+        fam = Family(name='NavFam')
+        db.session.add(fam)
+        db.session.flush()
+        db.session.add(Location(name='Pantry', family_id=fam.id))
+        db.session.commit()
+        return fam.id
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['hits'] == 3
+    assert cache.stats()['misses'] == 1
+
+def test_version_mismatch_is_a_miss():
+    cache = LRUCache()
+    cache.set('k', 'old', version=1)
+    assert cache.get('k', version=2) is None
+    assert cache.get('k', version=1) is None  # stale entry was dropped
+
+def test_sidebar_is_served_from_one_version_lookup(family_id):
+    app.config['NAV_CACHE_ENABLED'] = True
+    with app.app_context():
+        first = get_nav_locations(family_id)
+        with count_queries(db.engine) as statements:
+            second = get_nav_locations(family_id)
+        assert len(statements) == 1 and 'family_data_version' in statements[0]
+        assert first == second
+        assert second[0]['name'] == 'Pantry'
+        assert second[0]['item_count'] == 0
+
+def test_inventory_change_invalidates_sidebar(family_id):
+    app.config['NAV_CACHE_ENABLED'] = True
+    with app.app_context():
+        get_nav_locations(family_id)
+        loc = Location.query.filter_by(family_id=family_id).first()
+        item = MasterItem(name='Rice', family_id=family_id)
+        db.session.add(item)
+        db.session.flush()
+        db.session.add(Inventory(location_id=loc.id, master_item_id=item.id, quantity=1, family_id=family_id))
+        db.session.commit()
+        with count_queries(db.engine) as statements:
+            result = get_nav_locations(family_id)
+        assert len(statements) > 1
+        assert result[0]['item_count'] == 1
+
+def test_write_from_another_process_invalidates_sidebar(family_id):
+    app.config['NAV_CACHE_ENABLED'] = True
+    with app.app_context():
+        get_nav_locations(family_id)
+        # Another worker's commit only shows up here through the persisted version
+        with db.engine.begin() as connection:
+            connection.execute(Location.__table__.insert().values(name='Garage', family_id=family_id))
+            bump_family_versions(connection, [family_id])
+        assert [loc['name'] for loc in get_nav_locations(family_id)] == ['Garage', 'Pantry']
+
+def test_cache_can_be_disabled(family_id):
+    app.config['NAV_CACHE_ENABLED'] = False
+    with app.app_context():
+        get_nav_locations(family_id)
+        with count_queries(db.engine) as statements:
+            get_nav_locations(family_id)
+        assert statements and not any('family_data_version' in statement for statement in statements)
+    app.config['NAV_CACHE_ENABLED'] = True
@@ -0,0 +1,92 @@
+import pytest
+from sqlalchemy import event
+from app import app, db, Location, MasterItem, Inventory, ShoppingListItem, Store
+from pagination import encode_cursor, decode_cursor
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def teardown_module(module):
+    app.config['FAST_READ_ENABLED'] = True
+
+def add_items(family_id, count):
+    with app.app_context():
+        locations = [Location(name=f'Shelf {n}', family_id=family_id) for n in range(3)]
+        db.session.add_all(locations)
+        # Duplicate names make the id tie-breaker matter
+        items = [MasterItem(name=f'Item {n % 4}', family_id=family_id) for n in range(count)]
+        db.session.add_all(items)
+        db.session.add_all([Store(name=f'Store {n}', family_id=family_id) for n in range(count)])
+        db.session.flush()
+        for n, item in enumerate(items):
+            db.session.add(Inventory(location_id=locations[n % 3].id, master_item_id=item.id, quantity=n, family_id=family_id))
+            db.session.add(ShoppingListItem(item_id=item.id, family_id=family_id))
+        db.session.commit()
+    return family_id
+
+def walk(client, url):
+    pages = []
+    while url:
+        rv = client.get(url)
+        assert rv.status_code == 200
+        body = rv.get_json()
+        pages.append(body['items'])
+        url = body['next']
+    return pages
+
+@pytest.mark.parametrize('fast', [True, False])
+@pytest.mark.parametrize('url', ['/inventory', '/master-items', '/stores', '/shopping-list'])
+def test_pages_cover_the_collection_once(client, signup_family, url, fast):
+    app.config['FAST_READ_ENABLED'] = fast
+    add_items(signup_family(client, f'page{url.strip("/").replace("-", "")}{fast}@example.com'), 11)
+    everything = client.get(url).get_json()
+    assert isinstance(everything, list) and len(everything) == 11
+
+    pages = walk(client, f'{url}?limit=4')
+    assert [len(p) for p in pages] == [4, 4, 3]
+    paged = [row for page in pages for row in page]
+    assert sorted(row['id'] for row in paged) == sorted(row['id'] for row in everything)
+    assert len({row['id'] for row in paged}) == 11
+
+def test_pages_follow_sort_key_then_id(client, signup_family):
+    add_items(signup_family(client, 'pageorder@example.com'), 9)
+    paged = [row for page in walk(client, '/master-items?limit=2') for row in page]
+    assert paged == sorted(paged, key=lambda row: (row['name'], row['id']))
+
+def test_page_is_a_range_scan_without_offset(client, signup_family):
+    add_items(signup_family(client, 'pagesql@example.com'), 6)
+    first = client.get('/inventory?limit=3').get_json()
+    with app.app_context():
+        engine = db.engine
+    statements = []
+    listener = lambda *args: statements.append((args[2], args[3]))
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        client.get(first['next'])
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    page_sql, params = [s for s in statements if 'FROM inventory' in s[0]][-1]
+    assert '(inventory.location_id, inventory.id) > (?, ?)' in page_sql
+    # SQLite always renders LIMIT ? OFFSET ?; the offset stays 0 on every page
+    assert page_sql.endswith('LIMIT ? OFFSET ?') and params[-2:] == (4, 0)
+
+def test_bad_cursor_and_limit_are_rejected(client, signup_family):
+    add_items(signup_family(client, 'pagebad@example.com'), 1)
+    assert client.get('/inventory?cursor=not-a-cursor').status_code == 400
+    assert client.get('/inventory?limit=0').status_code == 400
+    assert client.get('/inventory?limit=ten').status_code == 400
+    assert client.get('/inventory?limit=ten').get_json() == {'error': 'limit must be an integer'}
+
+def test_limit_is_capped(client, signup_family):
+    add_items(signup_family(client, 'pagecap@example.com'), 5)
+    app.config['PAGINATION_MAX_LIMIT'] = 2
+    try:
+        body = client.get('/stores?limit=100').get_json()
+    finally:
+        app.config['PAGINATION_MAX_LIMIT'] = 500
+    assert len(body['items']) == 2
+    assert 'limit=2' in body['next']
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor('Milk', 7)) == ('Milk', 7)
+    assert decode_cursor(encode_cursor(None, 3)) == (None, 3)
+    assert decode_cursor(encode_cursor('x', 'y')) is None
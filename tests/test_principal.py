@@ -0,0 +1,65 @@
+import pytest
+from app import app, db, principal_cache, User, Family, FamilyMember
+from tests.query_utils import count_queries
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def teardown_module(module):
+    app.config['PRINCIPAL_CACHE_TTL'] = 0
+
+@pytest.fixture
+def principal_cache_on():
+    app.config['PRINCIPAL_CACHE_TTL'] = 30
+    principal_cache.clear()
+    yield
+    app.config['PRINCIPAL_CACHE_TTL'] = 0
+    principal_cache.clear()
+
+def create_family(suffix):
+    with app.app_context():
+        admin = User(email=f'padmin{suffix}@example.com', password_hash='hash')
+        member = User(email=f'pmember{suffix}@example.com', password_hash='hash')
+        db.session.add_all([admin, member])
+        db.session.flush()
+        family = Family(name=f'PrincipalFam{suffix}', created_by_user_id=admin.id)
+        db.session.add(family)
+        db.session.flush()
+        db.session.add_all([
+            FamilyMember(user_id=admin.id, family_id=family.id, role='admin'),
+            FamilyMember(user_id=member.id, family_id=family.id, role='member'),
+        ])
+        db.session.commit()
+        return admin.id, member.id, family.id
+
+def test_membership_is_loaded_once_per_request(client, engine):
+    admin_id, _, _ = create_family('1')
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin_id)
+    with count_queries(engine) as statements:
+        rv = client.get('/web/stores')
+    assert rv.status_code == 200
+    assert len([sql for sql in statements if 'family_member' in sql]) == 1
+
+def test_cached_principal_skips_user_query(client, engine, principal_cache_on):
+    admin_id, _, _ = create_family('2')
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin_id)
+    client.get('/locations')
+    with count_queries(engine) as statements:
+        rv = client.get('/locations')
+    assert rv.status_code == 200
+    assert not any('FROM user' in sql for sql in statements)
+    assert principal_cache.stats()['hits'] >= 1
+
+def test_role_change_invalidates_cached_principal(client, principal_cache_on):
+    admin_id, member_id, family_id = create_family('3')
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(member_id)
+    assert client.post(f'/family/{family_id}/role', json={'user_id': admin_id, 'role': 'member'}).status_code == 403
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin_id)
+    assert client.post(f'/family/{family_id}/role', json={'user_id': member_id, 'role': 'admin'}).status_code == 200
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(member_id)
+    rv = client.post(f'/family/{family_id}/role', json={'user_id': admin_id, 'role': 'member'})
+    assert rv.status_code == 200
@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import select
+from app import app, db, Inventory, MasterItem, QUERY_BUDGETS, nav_cache, principal_cache
+from tests.query_utils import cold_and_warm_queries
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+# endpoint -> URL for a family; every budgeted GET endpoint appears here
+BUDGETED_URLS = {
+    'index': lambda ids: '/',
+    'auth_page': lambda ids: '/auth',
+    'logout_redirect': lambda ids: '/logout',
+    'user_profile': lambda ids: '/user/profile',
+    'family_dashboard': lambda ids: '/family',
+    'web_locations': lambda ids: '/web/locations',
+    'web_inventory': lambda ids: '/web/inventory',
+    'web_master_items': lambda ids: '/web/master-items',
+    'web_edit_master_item': lambda ids: f"/web/master-items/edit/{ids['master_item']}",
+    'web_stores': lambda ids: '/web/stores',
+    'web_aisles': lambda ids: '/web/aisles',
+    'web_shopping_list': lambda ids: '/web/shopping-list',
+    'get_locations': lambda ids: '/locations',
+    'get_aisles': lambda ids: '/aisles',
+    'get_stores': lambda ids: '/stores',
+    'get_master_items': lambda ids: '/master-items',
+    'get_inventory': lambda ids: '/inventory',
+    'get_inventory_by_id': lambda ids: f"/inventory/{ids['inventory']}",
+    'get_shopping_list': lambda ids: '/shopping-list',
+    'api_get_shopping_list_count': lambda ids: '/api/shopping-list/count',
+    'export_inventory': lambda ids: '/export/inventory.csv',
+}
+
+# GET endpoints that aren't budgeted: token links, debug/test helpers and seeding
+UNBUDGETED = {
+    'static', 'login', 'reset_password_request', 'reset_password', 'invite_accept', 'seed', 'seed_stores',
+    'debug_locations', 'test_debug_locations', 'test_new_navigation', 'prometheus_metrics',
+    'debug_requests', 'debug_slow_queries',
+}
+
+def clear_caches():
+    nav_cache.clear()
+    principal_cache.clear()
+
+def family_ids(family):
+    with app.app_context():
+        return {
+            'inventory': db.session.scalar(select(Inventory.id).where(Inventory.family_id == family['id'])),
+            'master_item': db.session.scalar(select(MasterItem.id).where(MasterItem.family_id == family['id'])),
+        }
+
+def test_every_get_endpoint_has_a_budget():
+    get_endpoints = {rule.endpoint for rule in app.url_map.iter_rules() if 'GET' in rule.methods}
+    missing = get_endpoints - set(QUERY_BUDGETS) - UNBUDGETED
+    assert not missing, f'declare a @query_budget for: {sorted(missing)}'
+    assert set(BUDGETED_URLS) == set(QUERY_BUDGETS)
+
+@pytest.mark.parametrize('endpoint', sorted(BUDGETED_URLS))
+def test_route_stays_within_budget_at_any_size(endpoint, small_and_large_family):
+    with app.app_context():
+        engine = db.engine
+    budget = QUERY_BUDGETS[endpoint]
+    counts = []
+    for family in small_and_large_family:
+        url = BUDGETED_URLS[endpoint](family_ids(family))
+        client = family['client']
+
+        def request():
+            response = client.get(url)
+            response.get_data()
+            assert response.status_code < 400, f'{url} returned {response.status_code}'
+            response.close()
+
+        cold, warm = cold_and_warm_queries(engine, request, clear_caches)
+        for statements in (cold, warm):
+            assert len(statements) <= budget, (
+                f"{endpoint} ran {len(statements)} queries for family {family['id']}, budget is {budget}:\n"
+                + '\n'.join(statements))
+        counts.append((len(cold), len(warm)))
+    small, large = small_and_large_family
+    assert counts[0] == counts[1], (
+        f"{endpoint} query count scales with data: {counts[0]} for {small['counts']} vs {counts[1]} for {large['counts']}")
+
+def test_master_item_pages_are_scoped_to_the_family(small_and_large_family):
+    small, large = small_and_large_family
+    other_item = family_ids(small)['master_item']
+    assert small['client'].get(f'/web/master-items/edit/{other_item}').status_code == 200
+    assert large['client'].get(f'/web/master-items/edit/{other_item}').status_code == 404
+    assert large['client'].post(f'/web/master-items/delete/{other_item}').status_code == 404
+    with app.app_context():
+        assert db.session.get(MasterItem, other_item) is not None
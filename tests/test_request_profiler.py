@@ -0,0 +1,68 @@
+import pytest
+from app import app, db, MasterItem, Store, QUERY_BUDGETS
+from request_profiler import RequestProfile
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def setup_module(module):
+    app.config['PROFILER_ENABLED'] = True
+
+def teardown_module(module):
+    app.config['PROFILER_ENABLED'] = False
+    app.config['DEBUG'] = False
+
+def test_headers_report_queries_and_timings(client, signup_family):
+    signup_family(client, 'profiled@example.com')
+    rv = client.get('/locations')
+    count = int(rv.headers['X-Query-Count'])
+    assert count > 0
+    timing = rv.headers['Server-Timing']
+    assert f'desc="{count} queries"' in timing
+    assert 'db;dur=' in timing and 'render;dur=' in timing and 'app;dur=' in timing
+    page = client.get('/web/locations')
+    render_ms = float(page.headers['Server-Timing'].split('render;dur=')[1].split(',')[0])
+    assert render_ms > 0
+
+def test_disabled_profiler_adds_nothing(client, signup_family):
+    signup_family(client, 'unprofiled@example.com')
+    app.config['PROFILER_ENABLED'] = False
+    try:
+        rv = client.get('/locations')
+    finally:
+        app.config['PROFILER_ENABLED'] = True
+    assert 'X-Query-Count' not in rv.headers
+    assert 'Server-Timing' not in rv.headers
+
+def test_repeated_statements_are_reported():
+    profile = RequestProfile()
+    profile.statements.update(['SELECT store', 'SELECT store', 'SELECT store', 'SELECT item'])
+    assert profile.duplicates() == [('SELECT store', 3)]
+
+def test_panel_lists_requests_and_budgets(client, signup_family, monkeypatch):
+    family_id = signup_family(client, 'nplusone@example.com')
+    with app.app_context():
+        stores = [Store(name=f'Profiler Store {n}', family_id=family_id) for n in range(3)]
+        items = [MasterItem(name=f'Item {n}', family_id=family_id) for n in range(3)]
+        for item, store in zip(items, stores):
+            item.stores.append(store)
+        db.session.add_all(items)
+        db.session.commit()
+    client.get('/web/master-items')
+    monkeypatch.setitem(QUERY_BUDGETS, 'web_stores', 1)
+    client.get('/web/stores')
+
+    assert client.get('/debug/requests').status_code == 403
+    app.config['DEBUG'] = True
+    try:
+        records = client.get('/debug/requests?format=json').get_json()
+        html = client.get('/debug/requests?sort=queries').get_data(as_text=True)
+    finally:
+        app.config['DEBUG'] = False
+    record = next(r for r in records if r['path'] == '/web/master-items')
+    assert record['endpoint'] == 'web_master_items' and record['status'] == 200
+    # Stores are loaded for all items at once, not per item
+    assert record['duplicates'] == []
+    assert record['budget'] == QUERY_BUDGETS['web_master_items'] and not record['over_budget']
+    stores_page = next(r for r in records if r['path'] == '/web/stores')
+    assert stores_page['over_budget']
+    assert '/web/master-items' in html
@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import create_engine
+from app import app, db, bootstrap_schema, schema_is_current, SCHEMA_VERSION
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bootstrap.db'}")
+    yield engine
+    engine.dispose()
+
+def test_no_schema_work_on_the_request_path():
+    handlers = [func.__name__ for func in app.before_request_funcs.get(None, [])]
+    assert 'ensure_tables' not in handlers
+
+def test_bootstrap_creates_schema_once(engine):
+    assert bootstrap_schema(engine) is True
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql('PRAGMA user_version').scalar() == SCHEMA_VERSION
+        assert schema_is_current(connection)
+        triggers = connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'").scalars().all()
+        assert 'trg_item_count_inventory_insert' in triggers
+    assert bootstrap_schema(engine) is False
+
+def test_bootstrap_upgrades_an_older_database(engine):
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE family (id INTEGER PRIMARY KEY, name VARCHAR(128) NOT NULL)")
+        connection.exec_driver_sql(
+            "CREATE TABLE master_item (id INTEGER PRIMARY KEY, name VARCHAR(80) NOT NULL, aisle_id INTEGER, "
+            "default_unit VARCHAR(32), notes VARCHAR(256), family_id INTEGER NOT NULL)"
+        )
+        connection.exec_driver_sql(
+            "CREATE TABLE shopping_list_item (id INTEGER PRIMARY KEY, item_id INTEGER NOT NULL, "
+            "checked BOOLEAN NOT NULL, created_at DATETIME)"
+        )
+        connection.exec_driver_sql(
+            "CREATE TABLE inventory (id INTEGER PRIMARY KEY, location_id INTEGER NOT NULL, "
+            "master_item_id INTEGER NOT NULL, quantity FLOAT NOT NULL, last_updated DATETIME, "
+            "family_id INTEGER NOT NULL, UNIQUE (location_id, master_item_id, family_id))"
+        )
+        connection.exec_driver_sql(
+            "CREATE TABLE store (id INTEGER PRIMARY KEY, name VARCHAR(80) NOT NULL, "
+            "family_id INTEGER NOT NULL REFERENCES family(id), UNIQUE (name))"
+        )
+        connection.exec_driver_sql(
+            "CREATE TABLE item_stores (item_id INTEGER NOT NULL REFERENCES master_item(id), "
+            "store_id INTEGER NOT NULL REFERENCES store(id), PRIMARY KEY (item_id, store_id))"
+        )
+        connection.exec_driver_sql("INSERT INTO family VALUES (1, 'Old')")
+        connection.exec_driver_sql("INSERT INTO master_item VALUES (1, 'Milk', NULL, NULL, NULL, 1)")
+        connection.exec_driver_sql("INSERT INTO shopping_list_item VALUES (1, 1, 0, NULL)")
+        connection.exec_driver_sql("INSERT INTO store VALUES (1, 'Costco', 1)")
+        connection.exec_driver_sql("INSERT INTO item_stores VALUES (1, 1)")
+    assert bootstrap_schema(engine) is True
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT family_id FROM shopping_list_item").scalar() == 1
+        inventory_columns = [row[1] for row in connection.exec_driver_sql("PRAGMA table_info(inventory)")]
+        assert 'created_at' in inventory_columns
+        # Store names became unique per family; the rows and their links survive
+        connection.exec_driver_sql("INSERT INTO family VALUES (2, 'New')")
+        connection.exec_driver_sql("INSERT INTO store (name, family_id) VALUES ('Costco', 2)")
+        assert connection.exec_driver_sql("SELECT store_id FROM item_stores").scalar() == 1
+        counts = connection.exec_driver_sql("SELECT scope_id, item_count FROM item_count WHERE scope = 'store'").fetchall()
+        assert [tuple(row) for row in counts] == [(1, 1)]
+        triggers = connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'").scalars().all()
+        assert 'trg_item_count_store_delete' in triggers
+        indexes = connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars().all()
+        assert 'ix_master_item_family_name' in indexes
+
+def test_dropped_table_is_detected(engine):
+    bootstrap_schema(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE item_count")
+    with engine.connect() as connection:
+        assert not schema_is_current(connection)
+    assert bootstrap_schema(engine) is True
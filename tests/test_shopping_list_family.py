@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy import create_engine
+from app import migrate_shopping_list_family, schema_transaction
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def add_to_list(client, item_name):
+    item_id = client.post('/master-items', json={'name': item_name}).get_json()['id']
+    rv = client.post('/shopping-list', json={'item_id': item_id})
+    assert rv.status_code == 201
+    return item_id
+
+def test_shopping_list_is_partitioned_by_family(client, signup_family):
+    signup_family(client, 'lista@example.com')
+    item_a = add_to_list(client, 'Apples')
+    assert [sli['item']['name'] for sli in client.get('/shopping-list').get_json()] == ['Apples']
+    assert client.get('/api/shopping-list/count').get_json()['count'] == 1
+    client.post('/logout')
+
+    signup_family(client, 'listb@example.com')
+    add_to_list(client, 'Bread')
+    listed = client.get('/shopping-list').get_json()
+    assert [sli['item']['name'] for sli in listed] == ['Bread']
+    assert client.get('/api/shopping-list/count').get_json()['count'] == 1
+    html = client.get('/web/shopping-list').get_data(as_text=True)
+    assert 'Bread' in html and 'Apples' not in html
+    # Another family's item can't be added to this family's list
+    assert client.post('/shopping-list', json={'item_id': item_a}).status_code == 404
+
+def test_migration_backfills_family_id():
+    engine = create_engine('sqlite://')
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE family (id INTEGER PRIMARY KEY, name TEXT)")
+        connection.exec_driver_sql("CREATE TABLE master_item (id INTEGER PRIMARY KEY, name TEXT, family_id INTEGER)")
+        connection.exec_driver_sql(
+            "CREATE TABLE shopping_list_item (id INTEGER PRIMARY KEY, item_id INTEGER, checked BOOLEAN, created_at DATETIME)"
+        )
+        connection.exec_driver_sql("CREATE INDEX ix_shopping_list_item_created_at ON shopping_list_item (created_at)")
+        connection.exec_driver_sql("INSERT INTO family VALUES (7, 'Seven'), (8, 'Eight')")
+        connection.exec_driver_sql("INSERT INTO master_item VALUES (1, 'Milk', 7), (2, 'Eggs', 8)")
+        # Row 3's master item is gone
+        connection.exec_driver_sql("INSERT INTO shopping_list_item VALUES (1, 1, 0, NULL), (2, 2, 0, NULL), (3, 9, 0, NULL)")
+    with schema_transaction(engine) as connection:
+        assert migrate_shopping_list_family(connection) is True
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql("SELECT id, family_id FROM shopping_list_item ORDER BY id").fetchall()
+        assert [tuple(r) for r in rows] == [(1, 7), (2, 8)]
+        columns = {row[1]: row[3] for row in connection.exec_driver_sql("PRAGMA table_info(shopping_list_item)")}
+        assert columns['family_id'] == 1
+        indexes = connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars().all()
+        assert 'ix_shopping_list_item_family_checked_created' in indexes
+        assert migrate_shopping_list_family(connection) is False
@@ -0,0 +1,52 @@
+import pytest
+from app import app, db, shopping_list_rows, Location, Aisle, Store, MasterItem, Inventory, ShoppingListItem
+from tests.query_utils import count_queries
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def add_items(family_id, names, store_name=None):
+    with app.app_context():
+        aisle = Aisle(name='Dairy', family_id=family_id)
+        pantry = Location(name='Pantry', family_id=family_id)
+        fridge = Location(name='Fridge', family_id=family_id)
+        db.session.add_all([aisle, pantry, fridge])
+        store = None
+        if store_name:
+            store = Store(name=store_name, family_id=family_id)
+            db.session.add(store)
+        db.session.flush()
+        for name in names:
+            item = MasterItem(name=name, family_id=family_id, aisle_id=aisle.id)
+            if store:
+                item.stores.append(store)
+            db.session.add(item)
+            db.session.flush()
+            db.session.add(Inventory(location_id=pantry.id, master_item_id=item.id, quantity=1, family_id=family_id))
+            db.session.add(Inventory(location_id=fridge.id, master_item_id=item.id, quantity=2, family_id=family_id))
+            db.session.add(ShoppingListItem(item_id=item.id, family_id=family_id))
+        db.session.commit()
+        return store.id if store else None
+
+def test_rows_carry_totals_aisle_and_stores(client, signup_family):
+    family_id = signup_family(client, 'shop1@example.com')
+    store_id = add_items(family_id, ['Milk'], store_name='Corner Shop')
+    with app.app_context():
+        rows = [r for r in shopping_list_rows(family_id, store_id) if r.item_name == 'Milk']
+        assert len(rows) == 1
+        assert rows[0].total_quantity == 3
+        assert rows[0].aisle_name == 'Dairy'
+        assert rows[0].store_names == 'Corner Shop'
+        assert all(r.item_name != 'Milk' for r in shopping_list_rows(family_id, store_id + 1000))
+        assert shopping_list_rows(family_id + 1000) == []
+
+def test_page_query_count_does_not_grow_with_list(client, signup_family, engine):
+    family_id = signup_family(client, 'shop2@example.com')
+    add_items(family_id, ['Eggs', 'Butter'])
+    with count_queries(engine) as small:
+        html = client.get('/web/shopping-list').get_data(as_text=True)
+    assert 'Eggs' in html and 'Qty: 3' in html
+    add_items(family_id, [f'Item {n}' for n in range(20)])
+    with count_queries(engine) as large:
+        html = client.get('/web/shopping-list').get_data(as_text=True)
+    assert 'Item 19' in html
+    assert len(large) <= len(small)
@@ -0,0 +1,102 @@
+import json
+import pytest
+from sqlalchemy import text
+from app import app, db
+
+slow_log = app.extensions['slow_query_log']
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def teardown_module(module):
+    app.config['SLOW_QUERY_MS'] = 250
+    app.config['DEBUG'] = False
+    slow_log.configure_file(app.config['SLOW_QUERY_LOG_FILE'])
+
+@pytest.fixture
+def log_everything(tmp_path):
+    """Treat every statement as slow and log to a temporary file."""
+    path = tmp_path / 'slow.log'
+    slow_log.configure_file(str(path))
+    slow_log.recent.clear()
+    app.config['SLOW_QUERY_MS'] = 0.0001
+    yield path
+    app.config['SLOW_QUERY_MS'] = 250
+    slow_log.configure_file('')
+
+def read_log(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_fast_statements_are_not_logged(tmp_path):
+    slow_log.configure_file(str(tmp_path / 'slow.log'))
+    slow_log.recent.clear()
+    try:
+        with app.app_context():
+            db.session.execute(text('SELECT 1')).all()
+    finally:
+        slow_log.configure_file('')
+    assert slow_log.snapshot() == []
+    assert not (tmp_path / 'slow.log').exists()
+
+def test_slow_statement_logged_with_plan_and_scan_flag(log_everything):
+    with app.app_context():
+        db.session.execute(text('SELECT * FROM master_item WHERE notes = :notes'), {'notes': 'needle'}).all()
+        db.session.execute(text('SELECT * FROM master_item WHERE id = :id'), {'id': 1}).all()
+    entries = read_log(log_everything)
+    scan = next(e for e in entries if 'notes' in e['statement'])
+    assert scan['table_scans'] == ['master_item']
+    assert any(line.strip().startswith('SCAN master_item') for line in scan['plan'])
+    assert 'needle' in scan['parameters']
+    assert scan['route'] is None
+    assert scan['call_site'].startswith('tests/test_slow_queries.py:')
+    lookup = next(e for e in entries if 'id = ?' in e['statement'])
+    assert lookup['table_scans'] == []
+    assert any('USING INTEGER PRIMARY KEY' in line for line in lookup['plan'])
+
+def test_route_and_call_site_are_recorded(client, signup_family, log_everything):
+    signup_family(client, 'slowroute@example.com')
+    client.get('/master-items')
+    entry = next(e for e in slow_log.snapshot() if e['route'] == 'GET /master-items (get_master_items)'
+                 and 'master_item' in e['statement'])
+    assert entry['call_site'].split(':')[0] in ('app.py', 'fast_read.py')
+    assert entry['plan']
+
+def test_log_file_rotates(log_everything):
+    slow_log.configure_file(str(log_everything), max_bytes=2000, backups=2)
+    with app.app_context():
+        for n in range(20):
+            db.session.execute(text('SELECT * FROM master_item WHERE notes = :notes'), {'notes': f'n{n}'}).all()
+    assert (log_everything.parent / 'slow.log.1').exists()
+    assert not (log_everything.parent / 'slow.log.3').exists()
+
+def test_debug_view(client, log_everything):
+    with app.app_context():
+        db.session.execute(text('SELECT * FROM inventory WHERE quantity = :q'), {'q': 3}).all()
+    assert client.get('/debug/slow-queries').status_code == 403
+    app.config['DEBUG'] = True
+    try:
+        scans = client.get('/debug/slow-queries?scans=1&format=json').get_json()
+        page = client.get('/debug/slow-queries').get_data(as_text=True)
+    finally:
+        app.config['DEBUG'] = False
+    assert scans and all(entry['table_scans'] for entry in scans)
+    assert 'Full scan of' in page
+
+def test_secrets_are_redacted(client, log_everything):
+    client.post('/signup', json={'email': 'slowsecret@example.com', 'password': 'hunter2', 'family_name': 'Secret'})
+    client.post('/invite', json={'email': 'slowinvitee@example.com'})
+    with app.app_context():
+        db.session.connection().exec_driver_sql('SELECT id FROM user WHERE password_hash = ?', ('raw-secret',)).all()
+    text_log = log_everything.read_text()
+    assert 'pbkdf2' not in text_log and 'scrypt' not in text_log
+    assert 'raw-secret' not in text_log
+    invite = [e for e in read_log(log_everything) if e['statement'].startswith('INSERT INTO invitation')]
+    assert invite and 'REDACTED' in invite[0]['parameters']
+    assert "'slowinvitee@example.com'" in invite[0]['parameters']
+
+def test_failed_statements_leave_no_timing_state():
+    with app.app_context():
+        connection = db.session.connection()
+        with pytest.raises(Exception):
+            connection.exec_driver_sql('SELECT * FROM no_such_table')
+        assert 'statement_start' not in connection.info
+        db.session.rollback()
@@ -0,0 +1,71 @@
+import pytest
+from app import app, db, Location, MasterItem, Inventory, ShoppingListItem
+from tests.query_utils import count_queries
+
+pytestmark = pytest.mark.usefixtures('fresh_database')
+
+def teardown_module(module):
+    app.config['FAST_READ_ENABLED'] = True
+
+def add_stock(family_id):
+    with app.app_context():
+        loc = Location(name='Pantry', family_id=family_id)
+        item = MasterItem(name='Rice', family_id=family_id, notes='basmati')
+        db.session.add_all([loc, item])
+        db.session.flush()
+        inv = Inventory(location_id=loc.id, master_item_id=item.id, quantity=3, family_id=family_id)
+        db.session.add_all([inv, ShoppingListItem(item_id=item.id, family_id=family_id)])
+        db.session.commit()
+        return inv.id
+
+@pytest.mark.parametrize('fast', [True, False])
+def test_fields_and_dotted_nested_fields(client, signup_family, fast):
+    app.config['FAST_READ_ENABLED'] = fast
+    add_stock(signup_family(client, f'sparse{fast}@example.com'))
+    rows = client.get('/inventory?fields=id,quantity,master_item.name').get_json()
+    assert len(rows) == 1
+    assert set(rows[0]) == {'id', 'quantity', 'master_item'}
+    assert rows[0]['master_item'] == {'name': 'Rice'}
+    assert rows[0]['quantity'] == 3.0
+
+@pytest.mark.parametrize('fast', [True, False])
+def test_embed_controls_nested_objects(client, signup_family, fast):
+    app.config['FAST_READ_ENABLED'] = fast
+    add_stock(signup_family(client, f'sparseembed{fast}@example.com'))
+    full = client.get('/inventory').get_json()[0]
+    none = client.get('/inventory?embed=').get_json()[0]
+    assert 'location' not in none and 'master_item' not in none
+    assert none == {key: value for key, value in full.items() if key not in ('location', 'master_item')}
+    only_location = client.get('/inventory?embed=location').get_json()[0]
+    assert only_location['location'] == full['location'] and 'master_item' not in only_location
+
+def test_projection_shrinks_sql(client, signup_family, engine):
+    app.config['FAST_READ_ENABLED'] = True
+    add_stock(signup_family(client, 'sparsesql@example.com'))
+    with count_queries(engine) as statements:
+        client.get('/inventory?fields=id,quantity')
+    sql = [s for s in statements if 'FROM inventory' in s][-1]
+    assert 'JOIN' not in sql
+    assert 'last_updated' not in sql and 'master_item.name' not in sql
+
+def test_detail_endpoint_and_locations(client, signup_family):
+    inv_id = add_stock(signup_family(client, 'sparsedetail@example.com'))
+    assert client.get(f'/inventory/{inv_id}?fields=quantity').get_json() == {'id': inv_id, 'quantity': 3.0}
+    assert client.get('/inventory/999999?fields=quantity').status_code == 404
+    locations = client.get('/locations?fields=name,item_count').get_json()
+    assert [set(loc) for loc in locations] == [{'id', 'name', 'item_count'}]
+    assert locations[0]['item_count'] == 1
+    assert set(client.get('/locations?fields=name').get_json()[0]) == {'id', 'name'}
+
+def test_shopping_list_and_pagination_keep_cursor_fields(client, signup_family):
+    add_stock(signup_family(client, 'sparsepage@example.com'))
+    assert client.get('/shopping-list?fields=checked').get_json()[0].keys() == {'id', 'checked'}
+    body = client.get('/master-items?fields=notes&limit=5').get_json()
+    assert body['items'][0] == {'id': body['items'][0]['id'], 'name': 'Rice', 'notes': 'basmati'}
+
+def test_unknown_fields_are_rejected(client, signup_family):
+    add_stock(signup_family(client, 'sparsebad@example.com'))
+    assert client.get('/inventory?fields=secret').status_code == 400
+    assert client.get('/inventory?fields=secret').get_json() == {'error': 'Unknown field(s): secret'}
+    assert client.get('/inventory?fields=master_item.secret').status_code == 400
+    assert client.get('/inventory?embed=family').status_code == 400
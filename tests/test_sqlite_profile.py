@@ -0,0 +1,34 @@
+import pytest
+from app import app, db
+from sqlite_profile import load_sqlite_profile, sqlite_engine_options
+
+def test_production_profile_is_the_default():
+    name, pragmas, pool = load_sqlite_profile({})
+    assert name == 'production'
+    assert pragmas['journal_mode'] == 'WAL'
+    assert pragmas['synchronous'] == 'NORMAL'
+    assert pool['pool_size'] == 10
+
+def test_environment_overrides():
+    name, pragmas, pool = load_sqlite_profile({'SQLITE_PROFILE': 'default', 'SQLITE_BUSY_TIMEOUT': '250', 'SQLITE_POOL_SIZE': '3'})
+    assert name == 'default'
+    assert pragmas == {'busy_timeout': '250'}
+    assert pool['pool_size'] == 3
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        load_sqlite_profile({'SQLITE_PROFILE': 'turbo'})
+
+def test_memory_database_gets_no_pool_options():
+    assert sqlite_engine_options('sqlite:///:memory:', {'busy_timeout': 5000}, {'pool_size': 10}) == {}
+    options = sqlite_engine_options('sqlite:////tmp/x.db', {'busy_timeout': 5000}, {'pool_size': 10})
+    assert options['pool_size'] == 10
+    assert options['connect_args']['timeout'] == 5
+
+def test_pragmas_applied_on_connect():
+    with app.app_context():
+        with db.engine.connect() as connection:
+            assert connection.exec_driver_sql('PRAGMA journal_mode').scalar().lower() == 'wal'
+            assert connection.exec_driver_sql('PRAGMA busy_timeout').scalar() == 5000
+            assert connection.exec_driver_sql('PRAGMA foreign_keys').scalar() == 1
+            assert connection.exec_driver_sql('PRAGMA temp_store').scalar() == 2